@@ -0,0 +1,81 @@
+"""
+Aligning and rendering the word diffs of a 50k word document, rendering should
+only cost a fraction of the alignment.
+"""
+
+import random
+from benchmarkstt.diff.core import RatcliffObershelp
+from benchmarkstt.diff.formatter import format_diff
+
+_words = 50000
+
+
+def _documents():
+    rnd = random.Random(42)
+    vocabulary = ['word%d' % (i,) for i in range(2000)]
+    ref = [rnd.choice(vocabulary) for _ in range(_words)]
+    hyp = list(ref)
+    # roughly 10% word errors
+    for _ in range(_words // 10):
+        idx = rnd.randrange(len(hyp))
+        action = rnd.choice('sid')
+        if action == 's':
+            hyp[idx] = rnd.choice(vocabulary)
+        elif action == 'i':
+            hyp.insert(idx, rnd.choice(vocabulary))
+        else:
+            del hyp[idx]
+    return ref, hyp
+
+
+def _preprocessor(x):
+    return ' %s' % (' '.join(x),)
+
+
+def bench_diff_align():
+    ref, hyp = _documents()
+
+    def _():
+        RatcliffObershelp(ref, hyp).get_opcodes()
+    return _
+
+
+def bench_diff_counts():
+    """Counts only, without producing the opcodes (includes the alignment)"""
+    ref, hyp = _documents()
+
+    def _():
+        RatcliffObershelp(ref, hyp).get_opcode_counts()
+    return _
+
+
+def _render(dialect):
+    ref, hyp = _documents()
+    opcodes = RatcliffObershelp(ref, hyp).get_opcodes()
+
+    def _():
+        result = format_diff(ref, hyp, opcodes, dialect=dialect, preprocessor=_preprocessor)
+        if dialect == 'iter':
+            for _ in result:
+                pass
+    return _
+
+
+def bench_diff_render_ansi():
+    return _render('ansi')
+
+
+def bench_diff_render_text():
+    return _render('text')
+
+
+def bench_diff_render_html():
+    return _render('html')
+
+
+def bench_diff_render_list():
+    return _render('list')
+
+
+def bench_diff_render_iter():
+    return _render('iter')
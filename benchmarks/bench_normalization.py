@@ -0,0 +1,216 @@
+"""
+Normalizing a 10k word document with a file of 800 regex rules (the rules
+that don't interact are applied in a single pass), and with a stack of token
+local normalizers (each distinct word is only normalized once).
+
+Replacing 2000 words from a ReplaceWords file, in a single pass.
+
+Unidecoding 1000 copies of candide.txt, as is (ASCII) and with accents.
+
+Loading a config including 10 sections of another config, each loading the
+file of 800 regex rules: once cached, and parsing and building it every time.
+Loading the same config compiled to a bundle (not cached).
+"""
+
+import os
+import random
+import tempfile
+from benchmarkstt.normalization import File, NormalizationAggregate
+from benchmarkstt.normalization.core import Regex, Lowercase, Unidecode, ReplaceWords, Config
+from benchmarkstt.normalization import bundle
+from benchmarkstt import config
+
+_words = 10000
+_candide_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'resources', 'test', '_data', 'candide.txt')
+_rules = 800
+
+
+def _document():
+    rnd = random.Random(42)
+    vocabulary = ['word%d' % (i,) for i in range(2000)] + ['-', 'Hello,', '  ']
+    return ' '.join(rnd.choice(vocabulary) for _ in range(_words))
+
+
+def _rule_file():
+    fd, path = tempfile.mkstemp(suffix='.regex')
+    with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+        for idx in range(_rules):
+            f.write('"\\bword%d\\b",term%d\n' % (idx, idx))
+        f.write('"\\s+"," "\n')
+        f.write('"(?i)(h)ello","\\1i"\n')
+    return path
+
+
+def _words_file():
+    fd, path = tempfile.mkstemp(suffix='.replacewords')
+    with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+        for idx in range(2000):
+            f.write('word%d,Term%d\n' % (idx, idx))
+    return path
+
+
+def bench_normalization_replacewords_file():
+    normalizer = File(ReplaceWords, _words_file())
+    text = _document()
+
+    def _():
+        normalizer.normalize(text)
+    return _
+
+
+def bench_normalization_replacewords_naive():
+    """Applying the same rules one by one, on a tenth of the document"""
+    normalizer = File(ReplaceWords, _words_file())
+    text = _document()
+    text = text[:len(text) // 10]
+
+    def _():
+        normalizer._normalizer.naive(text)
+    return _
+
+
+def bench_normalization_regex_file_load():
+    path = _rule_file()
+
+    def _():
+        File(Regex, path)
+    return _
+
+
+def bench_normalization_regex_file():
+    normalizer = File(Regex, _rule_file())
+    text = _document()
+
+    def _():
+        normalizer.normalize(text)
+    return _
+
+
+def bench_normalization_regex_naive():
+    """Applying the same rules one by one"""
+    normalizer = File(Regex, _rule_file())
+    text = _document()
+
+    def _():
+        normalizer._normalizer.naive(text)
+    return _
+
+
+def _token_local():
+    normalizer = NormalizationAggregate()
+    normalizer.add(Lowercase())
+    normalizer.add(Unidecode())
+    for idx in range(50):
+        normalizer.add(ReplaceWords('word%d' % (idx,), 'term%d' % (idx,)))
+    return normalizer
+
+
+def bench_normalization_token_local():
+    normalizer = _token_local()
+    text = _document()
+
+    def _():
+        normalizer._memo.clear()
+        normalizer.normalize(text)
+    return _
+
+
+def bench_normalization_token_local_memoized():
+    """Words were normalized before (e.g. in the reference)"""
+    normalizer = _token_local()
+    text = _document()
+    normalizer.normalize(text)
+
+    def _():
+        normalizer.normalize(text)
+    return _
+
+
+def bench_normalization_token_local_whole_text():
+    """Applying the same normalizers to the whole text"""
+    normalizer = _token_local()
+    text = _document()
+
+    def _():
+        normalizer._apply(text)
+    return _
+
+
+def _candide(accents=False):
+    with open(_candide_file, encoding='UTF-8') as f:
+        text = f.read() * 1000
+    if accents:
+        text = text.translate(str.maketrans('aeiouc', '\xe0\xe9\xee\xf6\xfb\xe7'))
+    return text
+
+
+def bench_normalization_unidecode_ascii():
+    normalizer = Unidecode()
+    text = _candide()
+
+    def _():
+        normalizer.normalize(text)
+    return _
+
+
+def bench_normalization_unidecode():
+    normalizer = Unidecode()
+    text = _candide(accents=True)
+
+    def _():
+        normalizer.normalize(text)
+    return _
+
+
+def bench_normalization_unidecode_package():
+    """Using the unidecode package directly"""
+    from unidecode import unidecode
+    text = _candide(accents=True)
+
+    def _():
+        unidecode(text)
+    return _
+
+
+def _config_file():
+    rules = _rule_file()
+    fd, nested = tempfile.mkstemp(suffix='.conf')
+    with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+        for idx in range(10):
+            f.write('[section%d]\nlowercase\nregex "%s"\n' % (idx, rules))
+    fd, path = tempfile.mkstemp(suffix='.conf')
+    with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+        f.write('[normalization]\n')
+        for idx in range(10):
+            f.write('config "%s" section%d\n' % (nested, idx))
+    return path
+
+
+def bench_normalization_config_cached():
+    path = _config_file()
+    Config(path)
+
+    def _():
+        Config(path)
+    return _
+
+
+def bench_normalization_config_uncached():
+    path = _config_file()
+
+    def _():
+        config.cache.clear()
+        Config(path)
+    return _
+
+
+def bench_normalization_config_bundle():
+    fd, path = tempfile.mkstemp(suffix='.bundle')
+    os.close(fd)
+    bundle.compile([['config', _config_file()]], path)
+
+    def _():
+        config.cache.clear()
+        bundle.load(path)
+    return _
@@ -0,0 +1,34 @@
+"""
+Cold-start time of the command line tools, every run starts a fresh interpreter.
+"""
+
+import subprocess
+import sys
+
+
+def _run(code, *args):
+    def _():
+        subprocess.check_call([sys.executable, '-c', code] + list(args), stdout=subprocess.DEVNULL)
+    return _
+
+
+def _cli(module, *args):
+    return _run('import sys; from %s import run; sys.argv[0] = %r; run()' % (module, module), *args)
+
+
+def bench_startup_interpreter():
+    """Baseline: starting the interpreter without doing anything"""
+    return _run('pass')
+
+
+def bench_startup_help():
+    return _cli('benchmarkstt.cli.main', '--help')
+
+
+def bench_startup_tools_help():
+    return _cli('benchmarkstt.cli.tools', '--help')
+
+
+def bench_startup_wer():
+    return _cli('benchmarkstt.cli.main', '-r', 'HELLO WORLD', '-h', 'HELLO WORD', '-rt', 'argument', '-ht', 'argument',
+                '--wer')
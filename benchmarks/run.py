@@ -0,0 +1,48 @@
+"""
+Runs the benchmarks, i.e. all ``bench_*`` functions found in the ``bench_*.py``
+modules of this directory, and reports their timings.
+
+Usage::
+
+    python benchmarks/run.py [name ...]
+
+Each benchmark function may return a callable, in which case only the callable
+is timed (the function itself then serves as setup).
+"""
+
+import os
+import sys
+import timeit
+from importlib import import_module
+
+dirname = os.path.dirname(os.path.abspath(__file__))
+
+
+def find_benchmarks(names=None):
+    sys.path.insert(0, dirname)
+    for filename in sorted(os.listdir(dirname)):
+        if not filename.startswith('bench_') or not filename.endswith('.py'):
+            continue
+        module = import_module(filename[:-3])
+        for name in sorted(dir(module)):
+            if not name.startswith('bench_'):
+                continue
+            if names and not any(n in name for n in names):
+                continue
+            yield '%s.%s' % (module.__name__, name), getattr(module, name)
+
+
+def run(names=None, repeat=5):
+    for name, func in find_benchmarks(names):
+        timed = func()
+        if timed is None:
+            timed = func
+        number = getattr(func, 'number', 1)
+        timings = sorted(timeit.repeat(timed, repeat=repeat, number=number))
+        print('%-60s min %9.2fms  median %9.2fms' % (name,
+                                                     timings[0] * 1000 / number,
+                                                     timings[len(timings) // 2] * 1000 / number))
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:])
@@ -75,6 +75,12 @@ setup(
             "attrs==19.1.0",
         ],
         'docs': docs_require,
+        'arrow': [
+            "pyarrow>=0.17.0",
+        ],
+        'zstd': [
+            "zstandard>=0.13.0",
+        ],
     },
     platforms='any',
     entry_points={
@@ -11,5 +11,73 @@ class _Settings:
     def default_encoding(self):
         return getenv('DEFAULT_ENCODING', 'UTF-8')
 
+    @property
+    def daemon_socket(self):
+        return getenv('BENCHMARKSTT_SOCKET')
+
+    @property
+    def verify_batching(self):
+        return getenv('BENCHMARKSTT_VERIFY_BATCHING', '') not in ('', '0')
+
+    @property
+    def config_cache_size(self):
+        return int(getenv('BENCHMARKSTT_CONFIG_CACHE_SIZE', 256))
+
+    @property
+    def preload_normalizers(self):
+        return getenv('BENCHMARKSTT_PRELOAD_NORMALIZERS', '')
+
+    @property
+    def preload_entities(self):
+        return getenv('BENCHMARKSTT_PRELOAD_ENTITIES', '')
+
+    @property
+    def resources_dir(self):
+        return getenv('BENCHMARKSTT_RESOURCES_DIR')
+
+    @property
+    def resources_max_count(self):
+        return int(getenv('BENCHMARKSTT_RESOURCES_MAX_COUNT', 1000))
+
+    @property
+    def max_request_size(self):
+        return int(getenv('BENCHMARKSTT_MAX_REQUEST_SIZE', 64 << 20))
+
+    @property
+    def jobs_dir(self):
+        return getenv('BENCHMARKSTT_JOBS_DIR')
+
+    @property
+    def jobs_max_age(self):
+        return int(getenv('BENCHMARKSTT_JOBS_MAX_AGE', 3600))
+
+    @property
+    def jobs_max_count(self):
+        return int(getenv('BENCHMARKSTT_JOBS_MAX_COUNT', 1000))
+
+    @property
+    def jobs_max_queued(self):
+        return int(getenv('BENCHMARKSTT_JOBS_MAX_QUEUED', 100))
+
+    @property
+    def jobs_workers(self):
+        return int(getenv('BENCHMARKSTT_JOBS_WORKERS', 0)) or None
+
+    @property
+    def max_cost(self):
+        return int(getenv('BENCHMARKSTT_MAX_COST', 0))
+
+    @property
+    def max_job_cost(self):
+        return int(getenv('BENCHMARKSTT_MAX_JOB_COST', 0))
+
+    @property
+    def rate_limit(self):
+        return float(getenv('BENCHMARKSTT_RATE_LIMIT', 0))
+
+    @property
+    def rate_burst(self):
+        return int(getenv('BENCHMARKSTT_RATE_BURST', 10))
+
 
 settings = _Settings()
@@ -0,0 +1,230 @@
+"""
+Admission control: estimates the cost of an api call before running it, and
+limits the number of requests per client.
+
+The cost of a call is estimated from the size of its texts and the complexity
+of its algorithm, e.g. ``metrics.cer`` is quadratic in the number of
+characters (``len(ref) * len(hyp)``), ``metrics.wer`` in the number of words.
+Calls costing more than ``BENCHMARKSTT_MAX_COST`` are rejected, they can be
+queued instead using ``jobs.submit`` (see :py:mod:`benchmarkstt.api.jobs`) if
+they cost at most ``BENCHMARKSTT_MAX_JOB_COST``.
+
+Each client (address) may make ``BENCHMARKSTT_RATE_LIMIT`` requests per
+second, with bursts of at most ``BENCHMARKSTT_RATE_BURST`` requests (a token
+bucket). The buckets are kept per server process, i.e. per gunicorn worker.
+
+Zero (the default) means no limit. The limits are listed by the ``limits``
+api method, and in the description of the methods.
+"""
+
+from benchmarkstt import settings
+from collections import OrderedDict
+from functools import wraps
+from inspect import signature
+from threading import Lock
+import json
+import math
+import time
+
+#: Complexity of the metrics: the unit their cost is measured in and its order
+COMPLEXITY = {
+    'cer': ('characters', 2),
+    'wer': ('words', 2),
+    'diffcounts': ('words', 2),
+    'worddiffs': ('words', 2),
+    'beer': ('words', 1),
+}
+
+#: Complexity of metrics not listed in :py:data:`COMPLEXITY`
+DEFAULT_COMPLEXITY = ('words', 2)
+
+
+def _size(text, unit):
+    if type(text) is not str:
+        return 0
+    if unit == 'characters':
+        return len(text)
+    # (over)estimates the number of words, without splitting a (large) text
+    return sum(map(text.count, (' ', '\t', '\n'))) + 1
+
+
+def complexity(method):
+    """
+    :param str method: Name of the api method
+    :return: tuple of the unit and order of the method's cost, or None if its
+        cost is negligible
+    """
+    module, _, name = method.partition('.')
+    if module in ('metrics', 'benchmark'):
+        return COMPLEXITY.get(name, DEFAULT_COMPLEXITY)
+    if module == 'normalization' or method == 'resources.register':
+        return 'characters', 1
+    return None
+
+
+def cost(method, arguments):
+    """
+    Estimates the cost of an api call
+
+    :param str method: Name of the api method
+    :param dict arguments: Its arguments
+    :rtype: int
+    """
+    if method == 'jobs.submit':
+        return cost(arguments.get('method'), arguments.get('params') or {})
+
+    unit_order = complexity(method) if type(method) is str else None
+    if unit_order is None or type(arguments) is not dict:
+        return 0
+    unit, order = unit_order
+    if order == 1:
+        return sum(_size(arguments.get(name), unit) for name in ('text', 'content', 'ref', 'hyp'))
+    return _size(arguments.get('ref'), unit) * _size(arguments.get('hyp'), unit)
+
+
+class TokenBucket:
+    """
+    :param float rate: Tokens added per second
+    :param int burst: Maximum number of tokens
+    """
+
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def take(self):
+        """
+        Takes a token
+
+        :return: 0 if a token was available, otherwise the number of seconds
+            until there is one
+        """
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self._rate
+
+
+class Admission:
+    """
+    :param int max_cost: Maximum cost of a call, 0 for no limit
+    :param int max_job_cost: Maximum cost of a job, 0 for no limit
+    :param float rate: Requests per second per client, 0 for no limit
+    :param int burst: Maximum number of requests per client at once
+    :param int max_clients: Maximum number of clients tracked, the least
+        recently seen are forgotten first
+    """
+
+    def __init__(self, max_cost=0, max_job_cost=0, rate=0, burst=10, max_clients=10000):
+        self.max_cost = max_cost
+        self.max_job_cost = max_job_cost
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.max_cost or self.max_job_cost)
+
+    def check(self, method, arguments):
+        """
+        :raises AssertionError: If the call costs more than allowed
+        """
+        estimate = cost(method, arguments)
+        if method == 'jobs.submit':
+            budget, field = self.max_job_cost, 'params'
+        else:
+            budget, field = self.max_cost, None
+
+        if not budget or estimate <= budget:
+            return estimate
+
+        data = {
+            "message": "Request too expensive: estimated cost %d, at most %d allowed" % (estimate, budget),
+            "cost": estimate,
+            "max_cost": budget,
+        }
+        if field is not None:
+            data['field'] = field
+        elif not self.max_job_cost or estimate <= self.max_job_cost:
+            data['message'] += ', use jobs.submit'
+        raise AssertionError(json.dumps(data))
+
+    def _describe(self, method):
+        unit_order = complexity(method)
+        if unit_order is None:
+            return None
+        unit, order = unit_order
+        if order == 1:
+            description = 'linear in the number of %s' % (unit,)
+        else:
+            description = 'quadratic in the number of %s (%s of ref * %s of hyp)' % (unit, unit, unit)
+        if self.max_cost:
+            description += ', at most %d' % (self.max_cost,)
+        return description
+
+    def wrap(self, name, func):
+        """
+        Checks the cost of calls to api method `name` before calling `func`
+        """
+        sig = signature(func)
+        description = self._describe(name)
+
+        @wraps(func)
+        def _(*args, **kwargs):
+            try:
+                arguments = sig.bind_partial(*args, **kwargs).arguments
+            except TypeError:
+                arguments = kwargs
+            self.check(name, arguments)
+            return func(*args, **kwargs)
+
+        _.__signature__ = sig
+        if description is not None:
+            _.__doc__ = (func.__doc__ or '') + '\n    Cost: %s\n' % (description,)
+        return _
+
+    def allow(self, client):
+        """
+        Takes a token from the bucket of `client`
+
+        :return: 0 if the request is allowed, otherwise the number of seconds
+            until it is
+        """
+        if not self.rate:
+            return 0
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+                while len(self._buckets) > self._max_clients:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client)
+            return bucket.take()
+
+    @staticmethod
+    def retry_after(seconds):
+        """
+        :return: Value of the ``Retry-After`` header
+        """
+        return str(max(1, math.ceil(seconds)))
+
+    def limits(self):
+        """
+        Get the limits of the api
+
+        :return object: The maximum cost of a call (max_cost) and of a job (max_job_cost), the requests per second
+            (rate) and burst allowed per client, 0 meaning no limit, and the complexity of the metrics
+        """
+        return dict(max_cost=self.max_cost, max_job_cost=self.max_job_cost, rate=self.rate, burst=self.burst,
+                    complexity={name: dict(unit=unit, order=order) for name, (unit, order) in COMPLEXITY.items()})
+
+
+admission = Admission(settings.max_cost, settings.max_job_cost, settings.rate_limit, settings.rate_burst)
@@ -0,0 +1,160 @@
+"""
+Compressed api requests and responses (HTTP ``Content-Encoding``).
+
+Requests may be compressed using gzip, or zstd if the zstandard package is
+installed (``pip install benchmarkstt[zstd]``). They're decompressed while
+reading, at most ``BENCHMARKSTT_MAX_REQUEST_SIZE`` bytes (after
+decompression) are read.
+
+Responses are compressed using the encoding preferred by the client
+(``Accept-Encoding``), unless they're small.
+"""
+
+import gzip
+import zlib
+
+#: Responses smaller than this (in bytes) aren't compressed
+MIN_SIZE = 1024
+
+
+class UnsupportedEncodingError(ValueError):
+    """
+    Raised when a request uses an unsupported content encoding
+    """
+
+
+class RequestTooLargeError(ValueError):
+    """
+    Raised when a (decompressed) request is larger than allowed
+    """
+
+
+class CorruptRequestError(ValueError):
+    """
+    Raised when a request can't be decompressed
+    """
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _errors():
+    # the errors raised when decompressing corrupt data
+    zstandard = _zstandard()
+    if zstandard is None:
+        return OSError, EOFError, zlib.error
+    return OSError, EOFError, zlib.error, zstandard.ZstdError
+
+
+def supported_encodings():
+    """
+    :return: The supported content encodings, in order of preference
+    """
+    if _zstandard() is None:
+        return ['gzip']
+    return ['zstd', 'gzip']
+
+
+def _reader(stream, encoding):
+    if encoding in ('', 'identity'):
+        return stream
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if encoding == 'zstd':
+        zstandard = _zstandard()
+        if zstandard is not None:
+            return zstandard.ZstdDecompressor().stream_reader(stream)
+    raise UnsupportedEncodingError(encoding)
+
+
+def read(stream, content_encoding=None, max_size=None):
+    """
+    Reads (and decompresses) a request body.
+
+    :param stream: File-like object of the (compressed) body
+    :param str content_encoding: Value of the ``Content-Encoding`` header
+    :param int max_size: Maximum size (in bytes) of the decompressed body
+    :rtype: bytes
+    """
+    # the encodings are listed in the order they were applied
+    encodings = [encoding.strip().lower() for encoding in (content_encoding or '').split(',')]
+    reader = stream
+    for encoding in reversed(encodings):
+        reader = _reader(reader, encoding)
+
+    try:
+        data = reader.read(-1 if max_size is None else max_size + 1)
+    except _errors() as e:
+        raise CorruptRequestError(str(e))
+    if max_size is not None and len(data) > max_size:
+        raise RequestTooLargeError(max_size)
+    return data
+
+
+def negotiate(accept_encoding):
+    """
+    :param str accept_encoding: Value of the ``Accept-Encoding`` header
+    :return: The supported encoding the client prefers, or None for no
+        compression
+    """
+    if not accept_encoding:
+        return None
+
+    preferences = {}
+    for item in accept_encoding.split(','):
+        parts = item.split(';')
+        encoding = parts[0].strip().lower()
+        quality = 1.
+        for param in parts[1:]:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.
+        preferences[encoding] = quality
+
+    best = None
+    best_quality = 0.
+    for encoding in supported_encodings():
+        quality = preferences.get(encoding, preferences.get('*', 0.))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    """
+    :param bytes data:
+    :param str encoding: A supported encoding, see :py:func:`supported_encodings`
+    :rtype: bytes
+    """
+    if encoding == 'gzip':
+        return gzip.compress(data, 6)
+    if encoding == 'zstd':
+        return _zstandard().ZstdCompressor(level=3).compress(data)
+    raise UnsupportedEncodingError(encoding)
+
+
+def response(data, accept_encoding):
+    """
+    Compresses response `data` if the client accepts it
+
+    :param bytes data:
+    :param str accept_encoding: Value of the ``Accept-Encoding`` header
+    :return: tuple of the (compressed) data and the headers to add
+    """
+    headers = {'Vary': 'Accept-Encoding'}
+    if len(data) < MIN_SIZE:
+        return data, headers
+
+    encoding = negotiate(accept_encoding)
+    if encoding is not None:
+        data = compress(data, encoding)
+        headers['Content-Encoding'] = encoding
+    return data, headers
@@ -2,17 +2,21 @@ import benchmarkstt.metrics as metrics
 from io import StringIO
 from benchmarkstt.input.core import PlainText
 from benchmarkstt.normalization.core import Config
-from benchmarkstt.normalization.logger import LogCapturer
+from benchmarkstt.normalization.logger import LogCapturer, normalization_logger
+from benchmarkstt.api.resources import resources, ResourceNotFoundError
+import json
 
 factory = metrics.factory
 
 
-def callback(cls, ref: str, hyp: str, config: str = None, return_logs: bool = None, *args, **kwargs):
+def callback(cls, ref: str, hyp: str, config: str = None, return_logs: bool = None, normalizer: str = None,
+             *args, **kwargs):
     """
     :param ref: Reference text
     :param hyp: Hypothesis text
     :param config: The config to use
     :param bool return_logs: Return normalization logs
+    :param normalizer: Name of a loaded normalizer to use instead of config
 
     :example ref: 'Hello darkness my OLD friend'
     :example hyp: 'Hello darkness my old foe'
@@ -27,18 +31,32 @@ def callback(cls, ref: str, hyp: str, config: str = None, return_logs: bool = No
     :example result: ""
     """
 
-    normalizer = None
-    if config is not None and len(config.strip()):
+    if normalizer is not None:
+        try:
+            normalizer = resources.normalizer(normalizer)
+        except ResourceNotFoundError:
+            raise AssertionError(json.dumps({"message": "Unknown normalizer", "field": "normalizer"}))
+    elif config is not None and len(config.strip()):
         normalizer = Config(StringIO(config), section='normalization')
 
     ref = PlainText(ref, normalizer=normalizer)
     hyp = PlainText(hyp, normalizer=normalizer)
 
-    metric = cls(*args, **kwargs)
+    metric = resources.metric(cls, *args, **kwargs)
     cls_name = cls.__name__.lower()
 
     if not return_logs:
-        result = metric.compare(list(ref), list(hyp))
+        # title the logs, in case these are handled elsewhere (e.g. streamed)
+        prev_title = normalization_logger.title
+        try:
+            normalization_logger.title = 'Reference'
+            ref = list(ref)
+            normalization_logger.title = 'Hypothesis'
+            hyp = list(hyp)
+        finally:
+            normalization_logger.title = prev_title
+
+        result = metric.compare(ref, hyp)
         if isinstance(result, tuple) and hasattr(result, '_asdict'):
             result = result._asdict()
         return {
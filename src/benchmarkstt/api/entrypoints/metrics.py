@@ -1,5 +1,6 @@
 from benchmarkstt.input.core import PlainText
 import benchmarkstt.metrics as metrics
+from benchmarkstt.api.resources import resources
 
 factory = metrics.factory
 
@@ -11,4 +12,4 @@ def callback(cls, ref: str, hyp: str, *args, **kwargs):
     """
     ref = PlainText(ref)
     hyp = PlainText(hyp)
-    return cls(*args, **kwargs).compare(ref, hyp)
+    return resources.metric(cls, *args, **kwargs).compare(ref, hyp)
@@ -0,0 +1,3 @@
+# placeholder file to avoid warnings
+
+hidden = True
@@ -1,6 +1,20 @@
 """
 Entry point for a gunicorn server, serves at /api
+
+Run gunicorn with ``--preload`` to load the app (the api methods and the
+resources of :py:mod:`benchmarkstt.api.resources`) once in the master process,
+the workers then share it (copy-on-write) instead of each loading it again.
 """
 
+import gc  # pragma: no cover
+from benchmarkstt import settings  # pragma: no cover
+from benchmarkstt.api.resources import resources  # pragma: no cover
 from benchmarkstt.cli.entrypoints.api import create_app  # pragma: no cover
+
+resources.preload(settings.preload_normalizers, settings.preload_entities)  # pragma: no cover
 application = create_app('/api', with_explorer=True)  # pragma: no cover
+
+# keep the garbage collector from touching, and thereby copying, all that is
+# shared with the forked workers
+if hasattr(gc, 'freeze'):  # pragma: no cover
+    gc.freeze()
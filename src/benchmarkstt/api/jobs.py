@@ -0,0 +1,339 @@
+"""
+Asynchronous api calls (jobs), for long running comparisons that would
+otherwise hold a connection (and a server worker) for the whole computation.
+
+``jobs.submit`` runs any api method in a pool of processes and returns the
+id of the job, its result is then requested using ``jobs.status`` and
+``jobs.result``. The jobs are stored in ``BENCHMARKSTT_JOBS_DIR`` (by
+default a directory in the temporary directory, only accessible by the user
+running the server), so all server workers (on the same host) know them. Finished jobs older than
+``BENCHMARKSTT_JOBS_MAX_AGE`` seconds are removed, as are the oldest finished
+jobs when there are more than ``BENCHMARKSTT_JOBS_MAX_COUNT``. Queued and
+running jobs are never removed.
+
+A job that is cancelled while running still finishes (the metrics can't be
+interrupted), but its result is discarded. At most
+``BENCHMARKSTT_JOBS_MAX_QUEUED`` jobs are queued or running per server worker,
+more are refused.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+_finished = (DONE, FAILED, CANCELLED)
+
+#: Methods that only make sense in the server process, not in a job
+SERVER_METHODS = ('jobs.', 'resources.', 'limits')
+_id = re.compile(r'[0-9a-f]{32}\Z')
+
+
+class JobNotFoundError(KeyError):
+    """
+    Raised when a requested job doesn't exist (anymore)
+    """
+
+
+def _error(message, **data):
+    return AssertionError(json.dumps(dict(message=message, **data)))
+
+
+def _cancelled(job):
+    job['status'] = CANCELLED
+    job.pop('result', None)
+    job.pop('error', None)
+    job.setdefault('finished', time.time())
+    return job
+
+
+def default_directory():
+    """
+    :return: The default jobs directory of the current user
+    """
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), 'benchmarkstt-jobs-%d' % (uid,))
+
+
+def _check_private(directory):
+    # in a shared directory, other users could read the jobs, or plant their own
+    if not hasattr(os, 'getuid'):
+        return
+    stat = os.stat(directory)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        raise PermissionError("Jobs directory %s is accessible by other users, set BENCHMARKSTT_JOBS_DIR" %
+                              (directory,))
+
+
+class JobStore:
+    """
+    Stores the jobs (status and result) as json files in `directory`
+
+    :param directory: Defaults to :py:func:`default_directory`, which must
+        only be accessible by the current user
+    :param int max_age: Seconds after which a job is removed
+    :param int max_count: Maximum number of stored jobs, when exceeded the
+        oldest finished jobs are removed
+    """
+
+    def __init__(self, directory=None, max_age=3600, max_count=1000):
+        self._private = directory is None
+        self._directory = default_directory() if directory is None else directory
+        self._created = False
+        self._max_age = max_age
+        self._max_count = max_count
+
+    def directory(self):
+        """
+        :return: The directory, created (only accessible by the current user)
+            if it doesn't exist
+        """
+        if not self._created:
+            os.makedirs(self._directory, mode=0o700, exist_ok=True)
+            if self._private:
+                _check_private(self._directory)
+            self._created = True
+        return self._directory
+
+    def _path(self, id_, extension='.json'):
+        return os.path.join(self.directory(), id_ + extension)
+
+    def save(self, job):
+        # write to a temporary file first, so a partial job is never read
+        fd, tmp = tempfile.mkstemp(dir=self.directory(), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+                json.dump(job, f)
+            os.replace(tmp, self._path(job['id']))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, id_):
+        if type(id_) is not str or not _id.match(id_):
+            raise JobNotFoundError(id_)
+        try:
+            with open(self._path(id_), encoding='UTF-8') as f:
+                job = json.load(f)
+        except FileNotFoundError:
+            raise JobNotFoundError(id_)
+        if job.get('status') != CANCELLED and self.is_cancelled(id_):
+            # the marker is set before the status is saved, see Jobs.cancel
+            _cancelled(job)
+        return job
+
+    def update(self, id_, **kwargs):
+        job = self.load(id_)
+        job.update(kwargs)
+        self.save(job)
+        # the job may have been cancelled meanwhile (by another process), which
+        # must not be overwritten
+        if job['status'] != CANCELLED and self.is_cancelled(id_):
+            self.save(_cancelled(job))
+        return job
+
+    def cancel(self, id_):
+        """
+        Marks job `id_` as cancelled
+        """
+        open(self._path(id_, '.cancel'), 'a').close()
+
+    def is_cancelled(self, id_):
+        return os.path.exists(self._path(id_, '.cancel'))
+
+    def _remove(self, id_):
+        for extension in ('.json', '.cancel'):
+            try:
+                os.unlink(self._path(id_, extension))
+            except FileNotFoundError:
+                pass
+
+    def cleanup(self):
+        """
+        Removes the expired finished jobs, and the oldest finished jobs if
+        there are too many. Queued and running jobs are kept.
+        """
+        now = time.time()
+        jobs = []
+        for file in os.listdir(self.directory()):
+            id_, extension = os.path.splitext(file)
+            if extension != '.json' or not _id.match(id_):
+                continue
+            try:
+                modified = os.path.getmtime(self._path(id_))
+            except FileNotFoundError:
+                continue
+            if now - modified > self._max_age and self._finished(id_):
+                self._remove(id_)
+            else:
+                jobs.append((modified, id_))
+
+        excess = len(jobs) - self._max_count
+        for _, id_ in sorted(jobs):
+            if excess <= 0:
+                break
+            if self._finished(id_):
+                self._remove(id_)
+                excess -= 1
+
+    def _finished(self, id_):
+        try:
+            return self.load(id_)['status'] in _finished
+        except (JobNotFoundError, ValueError):
+            return False
+
+
+_methods = None
+
+
+def _run(directory, id_, method, params):
+    # runs in a pool process
+    global _methods
+    store = JobStore(directory)
+    if store.is_cancelled(id_):
+        return
+    try:
+        store.update(id_, status=RUNNING, started=time.time())
+    except JobNotFoundError:
+        logger.warning('Job %s was removed before it ran', id_)
+        return
+
+    if _methods is None:
+        # the cost of the job was checked when it was submitted
+        from benchmarkstt.api.admission import Admission
+        from benchmarkstt.api.jsonrpc import get_methods
+        _methods = get_methods(Admission())
+
+    try:
+        result = dict(status=DONE, result=_methods.items[method](**params))
+        json.dumps(result)
+    except Exception as e:
+        logger.info('Job %s failed: %r', id_, e)
+        result = dict(status=FAILED, error=str(e))
+
+    if not store.is_cancelled(id_):
+        try:
+            store.update(id_, finished=time.time(), **result)
+        except JobNotFoundError:
+            logger.warning('Job %s was removed while it ran, its result is discarded', id_)
+
+
+class Jobs:
+    """
+    :param JobStore store:
+    :param methods: The available api methods
+    :param int workers: Number of processes running the jobs, defaults to the
+        number of CPUs
+    :param int max_queued: Maximum number of jobs queued or running, more are
+        refused (their parameters are kept in memory until they run)
+    """
+
+    def __init__(self, store, methods, workers=None, max_queued=100):
+        self._store = store
+        self._methods = methods
+        self._workers = workers
+        self._max_queued = max_queued
+        self._executor = None
+        self._futures = {}
+        self._lock = Lock()
+
+    def _executor_(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers)
+            return self._executor
+
+    def _load(self, id_):
+        try:
+            return self._store.load(id_)
+        except JobNotFoundError:
+            raise _error('Job not found', field='id')
+
+    def submit(self, method: str, params: dict = None):
+        """
+        Run an api call asynchronously
+
+        :param method: The api method to call, e.g. "metrics.wer", not jobs.*, resources.* or limits
+        :param params: The parameters of the api method
+        :return str: The id of the job
+        """
+        if method not in self._methods.items:
+            raise _error('Method not found', field='method')
+        if method.startswith(SERVER_METHODS):
+            raise _error("Method can't be run as a job", field='method')
+        if params is None:
+            params = {}
+        if type(params) is not dict:
+            raise _error('Expected the parameters as an object', field='params')
+
+        executor = self._executor_()
+        self._store.cleanup()
+        with self._lock:
+            if len(self._futures) >= self._max_queued:
+                raise _error('Too many jobs queued, try again later', max_queued=self._max_queued)
+            id_ = uuid.uuid4().hex
+            self._store.save(dict(id=id_, method=method, status=QUEUED, submitted=time.time()))
+            future = self._futures[id_] = executor.submit(_run, self._store.directory(), id_, method, params)
+        future.add_done_callback(lambda _: self._futures.pop(id_, None))
+        return id_
+
+    def status(self, id: str):
+        """
+        Get the status of a job
+
+        :param id: The id of the job
+        :return object: The job: its status ("queued", "running", "done", "failed" or "cancelled"), and the time
+            (unix timestamp) it was submitted, started and finished
+        """
+        job = self._load(id)
+        job.pop('result', None)
+        return job
+
+    def result(self, id: str):
+        """
+        Get the result of a finished job
+
+        :param id: The id of the job
+        :return object: The result of the api call
+        """
+        job = self._load(id)
+        if job['status'] == DONE:
+            return job['result']
+        if job['status'] == FAILED:
+            raise _error(job['error'], field='id', status=FAILED)
+        raise _error('Job not finished', field='id', status=job['status'])
+
+    def cancel(self, id: str):
+        """
+        Cancel a job, a running job finishes but its result is discarded
+
+        :param id: The id of the job
+        :return object: The job, see jobs.status
+        """
+        job = self._load(id)
+        if job['status'] in _finished:
+            return self.status(id)
+        self._store.cancel(id)
+        future = self._futures.get(id)
+        if future is not None:
+            future.cancel()
+        return self._store.update(id, status=CANCELLED, finished=time.time())
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -25,8 +25,9 @@ class SecurityError(ValueError):
 class MagicMethods:
     possible_path_args = ['file', 'path']
 
-    def __init__(self):
+    def __init__(self, admission=None):
         self.methods = jsonrpcserver.methods.Methods()
+        self._admission = admission
 
     @staticmethod
     def is_safe_path(path):
@@ -127,6 +128,8 @@ class MagicMethods:
         :param name:
         :param callback:
         """
+        if self._admission is not None and self._admission.enabled:
+            callback = self._admission.wrap(name, callback)
         self.methods.add(**{name: callback})
 
 
@@ -152,17 +155,36 @@ class DefaultMethods:
         return _
 
 
-def get_methods() -> jsonrpcserver.methods.Methods:
+def get_methods(admission=None) -> jsonrpcserver.methods.Methods:
     """
     Returns the available JSON-RPC api methods
 
+    :param benchmarkstt.api.admission.Admission admission: The limits to
+        apply, defaults to those configured in the settings
     :return: jsonrpcserver.methods.Methods
     """
 
-    methods = MagicMethods()
+    from benchmarkstt import settings
+    from benchmarkstt.api.jobs import Jobs, JobStore
+    from benchmarkstt.api.resources import resources
+
+    if admission is None:
+        from benchmarkstt.api.admission import admission
+
+    methods = MagicMethods(admission)
     methods.register('version', DefaultMethods.version)
+    methods.register('limits', admission.limits)
+    methods.register('resources.register', resources.register)
+    methods.register('resources.list', resources.list)
     for name, module in Modules('api'):
         methods.load(name, module)
 
+    jobs = Jobs(JobStore(settings.jobs_dir, settings.jobs_max_age, settings.jobs_max_count),
+                methods.methods, settings.jobs_workers, settings.jobs_max_queued)
+    methods.register('jobs.submit', jobs.submit)
+    methods.register('jobs.status', jobs.status)
+    methods.register('jobs.result', jobs.result)
+    methods.register('jobs.cancel', jobs.cancel)
+
     methods.register('help', DefaultMethods.help(methods.methods))
     return methods.methods
@@ -0,0 +1,279 @@
+"""
+Named normalizers and entity lists, built once and shared by all api calls.
+
+Resources listed in ``BENCHMARKSTT_PRELOAD_NORMALIZERS`` and
+``BENCHMARKSTT_PRELOAD_ENTITIES`` (comma separated ``name=file`` items) are
+loaded when starting the gunicorn app, i.e. in the gunicorn master process
+when using ``--preload``, so all workers share them.
+
+Normalizer files are configs (section ``normalization``), or bundles compiled
+using ``benchmarkstt-tools normalization ... --compile file`` if the file name
+ends with ``.bundle``. Entity files are json files, as used by
+:py:class:`benchmarkstt.metrics.core.BEER`.
+
+Api clients can also register normalizer configs and entity lists themselves
+(``resources.register``), these are identified by the sha256 of their content.
+They're built once and stored in ``BENCHMARKSTT_RESOURCES_DIR`` (if set),
+shared by all workers. Files referred to by a registered config are read when
+registering it. At most ``BENCHMARKSTT_RESOURCES_MAX_COUNT`` registered
+resources are kept (in memory, and in the directory), the least recently used
+are removed first.
+
+.. warning:: Without ``BENCHMARKSTT_RESOURCES_DIR``, registered resources are
+    only kept in memory of the process that registered them, i.e. a single
+    gunicorn worker: other workers don't know their ids.
+"""
+
+from benchmarkstt import settings
+from benchmarkstt.normalization.bundle import Bundle
+from benchmarkstt.normalization.core import Config
+from collections import OrderedDict
+from csvlike import csv
+from hashlib import sha256
+from io import StringIO
+from threading import Lock
+import json
+import os
+import pickle
+import re
+import tempfile
+
+_id = re.compile(r'[0-9a-f]{64}\Z')
+
+
+def _entities(data):
+    if type(data) is not dict:
+        raise ValueError("Expected an object of entities and their weights")
+    return tuple(data.keys()), tuple(data.values())
+
+
+class ResourceNotFoundError(KeyError):
+    """
+    Raised when a requested resource wasn't loaded
+    """
+
+
+def parse_spec(spec):
+    """
+    :param str spec: Comma separated ``name=file`` items
+    :return: list of (name, file) tuples
+    """
+    result = []
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if '=' not in item:
+            raise ValueError("Expected name=file, got %r" % (item,))
+        name, file = item.split('=', 1)
+        result.append((name.strip(), file.strip()))
+    return result
+
+
+class Resources:
+    """
+    :param directory: Directory to store registered resources in, so they're
+        shared with other processes (e.g. the other gunicorn workers). If
+        None, they're only kept in memory.
+    :param int max_count: Maximum number of registered resources kept, when
+        exceeded the least recently used are removed
+    """
+
+    def __init__(self, directory=None, max_count=1000):
+        self._directory = directory
+        self._max_count = max_count
+        # id -> (kind, name, value)
+        self._resources = {}
+        # ids of the registered resources in memory, least recently used first
+        self._registered = OrderedDict()
+        self._lock = Lock()
+
+    def _add(self, id_, kind, name, value):
+        with self._lock:
+            self._resources[id_] = (kind, name, value)
+
+    def add_normalizer(self, name, file):
+        """
+        Loads the config or bundle `file` as normalizer `name`
+        """
+        if file.endswith('.bundle'):
+            normalizer = Bundle(file)
+        else:
+            normalizer = Config(file, section='normalization')
+        self._add(name, 'normalizer', name, normalizer)
+        return normalizer
+
+    def add_entities(self, name, file):
+        """
+        Loads the entities (and their weights) of json file `file` as entity list `name`
+        """
+        with open(file) as f:
+            entities = _entities(json.load(f))
+        self._add(name, 'entities', name, entities)
+        return entities
+
+    def _add_registered(self, id_, resource, replace=True):
+        with self._lock:
+            if replace or id_ not in self._resources:
+                self._resources[id_] = resource
+            resource = self._resources[id_]
+            self._registered[id_] = None
+            self._registered.move_to_end(id_)
+            while len(self._registered) > self._max_count:
+                del self._resources[self._registered.popitem(last=False)[0]]
+            return resource
+
+    def _get(self, id_, kind):
+        resource = self._resources.get(id_)
+        if resource is not None:
+            with self._lock:
+                if id_ in self._registered:
+                    self._registered.move_to_end(id_)
+        if resource is None and self._directory is not None:
+            resource = self._load(id_)
+        if resource is None or resource[0] != kind:
+            raise ResourceNotFoundError(id_)
+        return resource[2]
+
+    def normalizer(self, id_):
+        return self._get(id_, 'normalizer')
+
+    def entities(self, id_):
+        """
+        :return: tuple of the entities and their weights
+        """
+        return self._get(id_, 'entities')
+
+    def has_entities(self, id_):
+        try:
+            self.entities(id_)
+        except ResourceNotFoundError:
+            return False
+        return True
+
+    def _path(self, id_, extension):
+        return os.path.join(self._directory, id_ + extension)
+
+    def _load(self, id_):
+        # only ids, not arbitrary paths
+        if type(id_) is not str or not _id.match(id_):
+            return None
+        try:
+            with open(self._path(id_, '.pickle'), 'rb') as f:
+                resource = pickle.load(f)
+            # marks it as recently used, see _cleanup
+            os.utime(self._path(id_, '.json'))
+        except FileNotFoundError:
+            return None
+        # another thread may have loaded it meanwhile
+        return self._add_registered(id_, resource, replace=False)
+
+    def _write(self, path, data):
+        # write to a temporary file first, so other processes never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _cleanup(self):
+        """
+        Removes the least recently used registered resources from the
+        directory, if there are too many
+        """
+        resources = []
+        for file in os.listdir(self._directory):
+            id_, extension = os.path.splitext(file)
+            if extension != '.json' or not _id.match(id_):
+                continue
+            try:
+                resources.append((os.path.getmtime(self._path(id_, '.json')), id_))
+            except FileNotFoundError:
+                continue
+
+        for _, id_ in sorted(resources)[:max(0, len(resources) - self._max_count)]:
+            # the json file first, so it's not listed without its pickle
+            for extension in ('.json', '.pickle'):
+                try:
+                    os.unlink(self._path(id_, extension))
+                except FileNotFoundError:
+                    pass
+
+    def register(self, kind: str, content: str, name: str = None):
+        """
+        Register a normalizer config or an entity list, to refer to by its id
+        in later calls (as ``normalizer`` or ``entities_file``), instead of
+        sending it with every call. The least recently used resources are
+        removed when too many are registered.
+
+        :param kind: "normalizer" or "entities"
+        :param content: The config (using section ``normalization``), or the
+            entities and their weights as json
+        :param name: Descriptive name
+        :return str: The id of the resource, identical content gets the same id
+        """
+        try:
+            if kind == 'normalizer':
+                value = Config(StringIO(content), section='normalization')
+            elif kind == 'entities':
+                value = _entities(json.loads(content))
+            else:
+                raise AssertionError(json.dumps({"message": "Unknown kind of resource", "field": "kind"}))
+        except (csv.CSVParserError, ValueError) as e:
+            raise AssertionError(json.dumps({"message": str(e), "field": "content"}))
+
+        id_ = sha256(('%s\0%s' % (kind, content)).encode('UTF-8')).hexdigest()
+        self._add_registered(id_, (kind, name, value))
+        if self._directory is not None:
+            os.makedirs(self._directory, exist_ok=True)
+            self._write(self._path(id_, '.pickle'), pickle.dumps((kind, name, value), pickle.HIGHEST_PROTOCOL))
+            self._write(self._path(id_, '.json'), json.dumps(dict(kind=kind, name=name)).encode('UTF-8'))
+            self._cleanup()
+        return id_
+
+    def metric(self, cls, *args, **kwargs):
+        """
+        Creates metric `cls`, if its ``entities_file`` is the name of a loaded
+        entity list, that list is used instead of reading a file.
+        """
+        name = kwargs.get('entities_file')
+        if type(name) is not str or not self.has_entities(name):
+            return cls(*args, **kwargs)
+
+        kwargs = {key: value for key, value in kwargs.items() if key != 'entities_file'}
+        metric = cls(*args, **kwargs)
+        entities, weights = self.entities(name)
+        metric.set_entities(list(entities))
+        metric.set_weight(list(weights))
+        return metric
+
+    def list(self):
+        """
+        Get the available (loaded and registered) resources
+
+        :return object: With key being the resource id, and value its kind and name
+        """
+        result = {id_: dict(kind=kind, name=name) for id_, (kind, name, _) in self._resources.items()}
+        if self._directory is not None and os.path.isdir(self._directory):
+            for file in os.listdir(self._directory):
+                id_, extension = os.path.splitext(file)
+                if extension == '.json' and id_ not in result:
+                    with open(os.path.join(self._directory, file), encoding='UTF-8') as f:
+                        result[id_] = json.load(f)
+        return result
+
+    def preload(self, normalizers=None, entities=None):
+        """
+        :param str normalizers: Comma separated ``name=file`` items
+        :param str entities: Comma separated ``name=file`` items
+        """
+        for name, file in parse_spec(normalizers):
+            self.add_normalizer(name, file)
+        for name, file in parse_spec(entities):
+            self.add_entities(name, file)
+
+
+resources = Resources(settings.resources_dir, settings.resources_max_count)
@@ -0,0 +1,178 @@
+"""
+Streams the normalization logs and word diffs of an api call while it runs,
+as Server-Sent Events, instead of returning them all at once.
+
+The call runs in a separate thread, its output is passed on through a bounded
+queue: when the client doesn't keep up, the call waits (backpressure), so at
+most `queue_size` events are held in memory. It stops when the client
+disconnects.
+
+Events sent:
+
+- ``log``: a normalization log entry (title, stack and the diff in html)
+- ``diff``: a chunk of word diffs, when a ``worddiffs`` call uses dialect
+  ``list`` (or ``iter``)
+- ``result``: the result of the call, without the logs and word diffs already
+  sent, the last event
+- ``error``: a JSON-RPC error object, the last event
+"""
+
+from benchmarkstt.normalization.logger import DiffLoggingFormatter, normalization_logger
+from collections import OrderedDict
+from inspect import signature
+from itertools import islice
+import json
+import logging
+import queue
+import threading
+
+#: Maximum number of events waiting to be sent
+QUEUE_SIZE = 64
+
+#: Number of word diffs sent per ``diff`` event
+CHUNK_SIZE = 1000
+
+
+class StreamClosedError(Exception):
+    """
+    Raised in the running call when the client disconnected
+    """
+
+
+def _error(code, message, data=None):
+    return OrderedDict((('code', code), ('message', message), ('data', data)))
+
+
+class _Stream:
+    def __init__(self, queue_size):
+        self._queue = queue.Queue(queue_size)
+        self.closed = threading.Event()
+
+    def put(self, event, data):
+        while True:
+            if self.closed.is_set():
+                raise StreamClosedError()
+            try:
+                self._queue.put((event, data), timeout=.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self):
+        return self._queue.get()
+
+
+class _StreamHandler(logging.Handler):
+    """
+    Sends the normalization logs of a single thread to a stream
+    """
+
+    def __init__(self, stream, thread):
+        super().__init__()
+        self._stream = stream
+        self._thread = thread
+        self.setFormatter(DiffLoggingFormatter(dialect='html', diff_formatter_dialect='dict'))
+
+    def handle(self, record):
+        # other threads may be normalizing (and logging) at the same time
+        if record.thread != self._thread:
+            return False
+        # not catching StreamClosedError, so it stops the normalization
+        self._stream.put('log', self.format(record))
+        return True
+
+
+def _iterator(value):
+    return hasattr(value, '__next__')
+
+
+def _run(stream, func, params, chunk_size):
+    handler = _StreamHandler(stream, threading.get_ident())
+    normalization_logger.add_handler(handler)
+    try:
+        result = func(**params)
+
+        streamed = None
+        if _iterator(result):
+            streamed, result = result, None
+        elif isinstance(result, dict):
+            # e.g. the word diffs of a benchmark call
+            for key, value in result.items():
+                if _iterator(value):
+                    streamed = value
+                    result = dict(result)
+                    result[key] = None
+                    break
+
+        if streamed is not None:
+            while True:
+                chunk = list(islice(streamed, chunk_size))
+                if not chunk:
+                    break
+                stream.put('diff', chunk)
+        last = 'result', result
+    except StreamClosedError:
+        return
+    except AssertionError as e:
+        last = 'error', _error(-32602, 'Invalid parameters', str(e))
+    except Exception as e:
+        last = 'error', _error(-32000, 'Server error', '%s: %s' % (type(e).__name__, e))
+    finally:
+        normalization_logger.remove_handler(handler)
+
+    try:
+        stream.put(*last)
+    except StreamClosedError:
+        pass
+
+
+def events(methods, method, params=None, queue_size=None, chunk_size=None):
+    """
+    Runs api call `method`, generating its events as they're produced
+
+    :param methods: The api methods, see :py:func:`benchmarkstt.api.jsonrpc.get_methods`
+    :param str method: Name of the api method
+    :param dict params: Its parameters
+    :return: Generator of tuples of the event and its data
+    """
+    if method not in methods.items:
+        yield 'error', _error(-32601, 'Method not found')
+        return
+    if params is None:
+        params = {}
+    if type(params) is not dict:
+        yield 'error', _error(-32602, 'Invalid parameters', 'Expected the parameters as an object')
+        return
+
+    # the logs are streamed anyway, and the word diffs are produced lazily
+    params = {key: value for key, value in params.items() if key != 'return_logs'}
+    if method.endswith('.worddiffs') and params.get('dialect') == 'list':
+        params['dialect'] = 'iter'
+
+    func = methods.items[method]
+    try:
+        signature(func).bind(**params)
+    except TypeError as e:
+        yield 'error', _error(-32602, 'Invalid parameters', str(e))
+        return
+
+    stream = _Stream(queue_size or QUEUE_SIZE)
+    thread = threading.Thread(target=_run, args=(stream, func, params, chunk_size or CHUNK_SIZE),
+                              name='benchmarkstt-stream', daemon=True)
+    thread.start()
+    try:
+        while True:
+            event, data = stream.get()
+            yield event, data
+            if event in ('result', 'error'):
+                break
+    finally:
+        # e.g. the client disconnected
+        stream.closed.set()
+
+
+def format_event(event, data):
+    """
+    :return str: The Server-Sent Event
+    """
+    return 'event: %s\ndata: %s\n\n' % (event, json.dumps(data))
@@ -0,0 +1,222 @@
+"""
+Keeps the main command line tool warm in a long-running local process, reachable through a unix domain socket.
+
+The client sends its command line arguments, working directory and relevant
+environment to the daemon, which runs ``benchmarkstt`` in-process and sends
+back the exit code and output. Each message is a JSON object preceded by its
+length (4 bytes, network byte order). The output on stdout is sent base64
+encoded, as it may be binary (e.g. output format ``npz``).
+"""
+
+import base64
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+
+logger = logging.getLogger(__name__)
+
+# environment variables that influence the outcome of a run and are forwarded to the daemon
+forwarded_environment = ('DEFAULT_ENCODING',)
+
+_header = struct.Struct('!I')
+
+
+class DaemonError(Exception):
+    """Communication with the daemon failed"""
+
+
+def default_socket_path():
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), 'benchmarkstt-%d.sock' % (uid,))
+
+
+def send(sock, message):
+    data = json.dumps(message).encode('UTF-8')
+    sock.sendall(_header.pack(len(data)) + data)
+
+
+def _receive_exactly(sock, length):
+    chunks = []
+    while length:
+        chunk = sock.recv(min(length, 1 << 16))
+        if not chunk:
+            raise DaemonError('Connection closed unexpectedly')
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b''.join(chunks)
+
+
+def receive(sock):
+    length, = _header.unpack(_receive_exactly(sock, _header.size))
+    return json.loads(_receive_exactly(sock, length).decode('UTF-8'))
+
+
+def execute(argv, cwd, environment=None, encoding=None):
+    """
+    Runs the main command line tool in-process, as if it was called from `cwd`
+    with arguments `argv`.
+
+    :param str encoding: Encoding of the client's stdout
+    :return: dict with the exit code, stdout (base64 encoded bytes) and stderr
+        output
+    """
+    from benchmarkstt.cli.main import run
+    from benchmarkstt.normalization.logger import normalization_logger
+
+    # binary output formats write to stdout.buffer
+    stdout_bytes = io.BytesIO()
+    stdout = io.TextIOWrapper(stdout_bytes, encoding=encoding or 'UTF-8', newline='', write_through=True)
+    stderr = io.StringIO()
+
+    # everything a run may change in the process' global state
+    prev_cwd = os.getcwd()
+    prev_argv = sys.argv
+    prev_environment = {name: os.environ.get(name) for name in forwarded_environment}
+    root_logger = logging.getLogger()
+    prev_root_handlers = list(root_logger.handlers)
+    prev_root_level = root_logger.level
+    prev_normalization_handlers = list(normalization_logger.logger.handlers)
+
+    handler = logging.StreamHandler(stderr)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root_logger.handlers = [handler]
+
+    code = 0
+    try:
+        os.chdir(cwd)
+        sys.argv = ['benchmarkstt'] + list(argv)
+        for name in forwarded_environment:
+            value = environment.get(name) if environment else None
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                run()
+            except SystemExit as e:
+                code = e.code
+                if code is None:
+                    code = 0
+                elif type(code) is not int:
+                    print(code, file=sys.stderr)
+                    code = 1
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    finally:
+        os.chdir(prev_cwd)
+        sys.argv = prev_argv
+        for name, value in prev_environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        root_logger.handlers = prev_root_handlers
+        root_logger.setLevel(prev_root_level)
+        normalization_logger.logger.handlers = prev_normalization_handlers
+
+    stdout.flush()
+    return dict(code=code, stdout=base64.b64encode(stdout_bytes.getvalue()).decode('ascii'), stderr=stderr.getvalue())
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = receive(self.connection)
+        except DaemonError:
+            # e.g. a probe checking whether a daemon is listening
+            return
+        logger.info('Running: %r', request['argv'])
+        response = execute(request['argv'], request['cwd'], request.get('environment'), request.get('encoding'))
+        send(self.connection, response)
+
+
+class Server(socketserver.UnixStreamServer):
+    """
+    Handles one request at a time, a run changes process-wide state (working
+    directory, stdout, ...) so runs can't be done concurrently.
+    """
+
+    def server_bind(self):
+        super().server_bind()
+        # only the current user is allowed to run commands
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def warm_up():
+    """
+    Imports and registers everything a run needs, so it is done only once
+    """
+    from benchmarkstt.cli.main import argparser
+    from benchmarkstt.output import factory as output_factory
+    from benchmarkstt.diff.formatter import HTMLDiffDialect
+    from benchmarkstt.normalization.core import Unidecode
+
+    argparser()
+    list(output_factory)
+    HTMLDiffDialect.preprocessor('')
+    Unidecode().normalize('')
+
+
+def create_server(path=None):
+    if path is None:
+        path = default_socket_path()
+
+    if os.path.exists(path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # stale socket file, left over by a daemon that wasn't shut down properly
+            os.unlink(path)
+        else:
+            raise DaemonError('A daemon is already listening on %s' % (path,))
+
+    # runs are executed in-process, never forward them (back) to a daemon
+    os.environ.pop('BENCHMARKSTT_SOCKET', None)
+    warm_up()
+    return Server(path, RequestHandler)
+
+
+def forward(path, argv):
+    """
+    Forwards a run of the main command line tool to the daemon listening on
+    `path`, and outputs its results.
+
+    :return: The exit code, or None if no daemon could be reached
+    """
+    environment = {name: os.environ[name] for name in forwarded_environment if name in os.environ}
+    encoding = getattr(sys.stdout, 'encoding', None) or 'UTF-8'
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            send(sock, dict(argv=list(argv), cwd=os.getcwd(), environment=environment, encoding=encoding))
+            response = receive(sock)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+
+    stdout = base64.b64decode(response['stdout'])
+    if hasattr(sys.stdout, 'buffer'):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(stdout)
+        sys.stdout.buffer.flush()
+    else:
+        sys.stdout.write(stdout.decode(encoding))
+    sys.stderr.write(response['stderr'])
+    return response['code']
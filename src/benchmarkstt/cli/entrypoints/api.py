@@ -9,11 +9,9 @@ Make benchmarkstt available through a rudimentary JSON-RPC_ interface
 
 """
 
-import jsonrpcserver
+import json
 import os
-from flask import Flask, request, Response, render_template
 from benchmarkstt.docblock import format_docs, parse, process_rst
-from benchmarkstt.api.jsonrpc import get_methods
 
 
 def argparser(parser):
@@ -49,6 +47,14 @@ def create_app(entrypoint: str = None, with_explorer: bool = None):
     :return:
     """
 
+    # imported here so that the (heavy) web dependencies are only loaded when actually serving the api
+    import jsonrpcserver
+    from flask import Flask, request, Response, render_template
+    from benchmarkstt.api.jsonrpc import get_methods
+    from benchmarkstt.api import compression, streaming
+    from benchmarkstt.api.admission import admission
+    from benchmarkstt import settings
+
     template_folder = os.path.abspath(os.path.join(
         __file__,
         os.pardir,
@@ -65,12 +71,50 @@ def create_app(entrypoint: str = None, with_explorer: bool = None):
 
     methods = get_methods()
 
+    def read_request():
+        """
+        :return: tuple of the request body, and the error response if it can't be handled
+        """
+        wait = admission.allow(request.remote_addr)
+        if wait:
+            return None, Response('Too many requests', 429, headers={'Retry-After': admission.retry_after(wait)})
+
+        try:
+            return compression.read(request.stream, request.headers.get('Content-Encoding'),
+                                    settings.max_request_size).decode(), None
+        except compression.UnsupportedEncodingError as e:
+            return None, Response('Unsupported content encoding: %s' % (e,), 415)
+        except compression.RequestTooLargeError:
+            return None, Response('Request too large', 413)
+        except (compression.CorruptRequestError, UnicodeDecodeError) as e:
+            return None, Response('Invalid request: %s' % (e,), 400)
+
     @app.route(entrypoint, methods=["POST"])
     def jsonrpc():
-        req = request.get_data().decode()
+        req, error = read_request()
+        if error is not None:
+            return error
+
         response = jsonrpcserver.dispatch(req, methods=methods, debug=True, convert_camel_case=False)
-        response_str = str(response)
-        return Response(response_str, response.http_status, mimetype="application/json")
+        data, headers = compression.response(str(response).encode(), request.headers.get('Accept-Encoding'))
+        return Response(data, response.http_status, mimetype="application/json", headers=headers)
+
+    @app.route(entrypoint + '/stream', methods=["POST"])
+    def stream():
+        req, error = read_request()
+        if error is not None:
+            return error
+
+        try:
+            req = json.loads(req)
+        except ValueError as e:
+            return Response('Invalid request: %s' % (e,), 400)
+        if type(req) is not dict or type(req.get('method')) is not str:
+            return Response('Invalid request: expected an object with a method', 400)
+
+        events = streaming.events(methods, req['method'], req.get('params'))
+        return Response((streaming.format_event(event, data) for event, data in events), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
     if with_explorer:  # pragma: nocover
         app.template_filter('parse_rst')(process_rst)
@@ -98,6 +142,8 @@ def create_app(entrypoint: str = None, with_explorer: bool = None):
 
 
 def run(_parser, args):  # pragma: nocover
+    from benchmarkstt.api.jsonrpc import get_methods
+
     if args.list_methods:
         methods = get_methods()
         for name, func in methods.items.items():
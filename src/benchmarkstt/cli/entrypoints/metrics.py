@@ -10,7 +10,9 @@ from benchmarkstt.normalization.logger import normalization_logger
 import argparse
 from inspect import signature, Parameter
 import logging
+import os
 from collections import OrderedDict
+from functools import partial
 
 
 def argparser(parser: argparse.ArgumentParser):
@@ -39,6 +41,18 @@ def argparser(parser: argparse.ArgumentParser):
 
     parser.add_argument('-o', '--output-format', default='restructuredtext', choices=output_factory.keys(),
                         help='Format of the outputted results')
+    parser.add_argument('--output-buffer-size', type=int, metavar='CHARACTERS',
+                        help='Number of characters to collect before writing them, '
+                             'for output formats that support buffering (json, jsonlines)')
+
+    parser.add_argument('--incremental', metavar='DIRECTORY',
+                        help='Store the alignments in DIRECTORY, and only re-align the changed parts of the '
+                             'hypothesis when scoring the same reference and hypothesis file again (the result may '
+                             'differ from a full alignment, which is logged as a warning)')
+    parser.add_argument('--alignment-cache', metavar='FILE',
+                        help='Cache alignments in FILE (SQLite database), identical comparisons are never re-aligned')
+    parser.add_argument('--alignment-cache-size', metavar='MEGABYTES', type=float,
+                        help='Maximum size of the alignment cache, least recently used alignments are evicted first')
 
     metrics_desc = "A list of metrics to calculate. At least one metric needs to be provided."
 
@@ -65,7 +79,36 @@ def run(parser, args, normalizer=None):
     if 'metrics' not in args or not len(args.metrics):
         parser.error("need at least one metric")
 
-    with output_factory.create(args.output_format) as out:
+    output_cls = output_factory[args.output_format]
+    output_kwargs = dict()
+    if getattr(args, 'output_buffer_size', None) is not None:
+        if 'buffer_size' not in signature(output_cls.__init__).parameters:
+            parser.error("output format %r does not support --output-buffer-size" % (args.output_format,))
+        output_kwargs['buffer_size'] = args.output_buffer_size
+    # structured output formats get the diffs as a list of items
+    diff_dialect = getattr(output_cls, 'diff_dialect', None)
+
+    # differs wrapping the differ used by the metrics, innermost first
+    differ_wrappers = []
+    if getattr(args, 'alignment_cache', None):
+        from benchmarkstt.diff.cache import AlignmentCache, CachedDiffer
+        max_size = args.alignment_cache_size
+        if max_size is not None:
+            max_size = int(max_size * 1024 * 1024)
+        differ_wrappers.append(partial(partial, CachedDiffer, cache=AlignmentCache(args.alignment_cache, max_size)))
+    if getattr(args, 'incremental', None):
+        # wraps the cache, so only full alignments are cached, never approximate re-alignments
+        from benchmarkstt.diff.incremental import AlignmentStore, IncrementalDiffer
+        source = None if args.hypothesis_type == 'argument' else os.path.abspath(args.hypothesis)
+        differ_wrappers.append(partial(partial, IncrementalDiffer, store=AlignmentStore(args.incremental),
+                                       source=source))
+
+    def wrap_differ(differ_class=None):
+        for wrapper in differ_wrappers:
+            differ_class = wrapper(differ_class=differ_class)
+        return differ_class
+
+    with output_cls(**output_kwargs) as out:
         for item in args.metrics:
             metric_name = item.pop(0).replace('-', '.')
             cls = factory[metric_name]
@@ -80,13 +123,20 @@ def run(parser, args, normalizer=None):
                 sig = sig['dialect']
                 if sig.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.POSITIONAL_ONLY):
                     if len(item) <= idx:
-                        if args.output_format == 'json':
-                            kwargs['dialect'] = 'list'
+                        if diff_dialect is not None:
+                            kwargs['dialect'] = diff_dialect
                             if 'diff_formatter_dialect' in sigkeys:
                                 kwargs['diff_formatter_dialect'] = 'dict'
                         else:
                             kwargs['dialect'] = 'ansi'
 
+            if differ_wrappers and 'differ_class' in sigkeys:
+                idx = sigkeys.index('differ_class') - 1
+                if len(item) > idx:
+                    item[idx] = wrap_differ(item[idx])
+                else:
+                    kwargs['differ_class'] = wrap_differ()
+
             metric = cls(*item, **kwargs)
             result = metric.compare(ref, hyp)
             out.result(metric_name, result)
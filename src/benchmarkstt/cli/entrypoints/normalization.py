@@ -3,14 +3,22 @@ Apply normalization to given input
 """
 
 import sys
+import os
+import glob
 import argparse
 import logging
+import re
 from benchmarkstt import settings
 
+logger = logging.getLogger(__name__)
+
+_glob_magic = re.compile(r'[*?[]')
+
 
 def args_inputfile(parser):
     parser.add_argument('-i', '--inputfile', action='append', nargs=1,
-                        help='read input from this file, defaults to STDIN',
+                        help='read input from this file, all files in this directory or all files matching'
+                             ' this glob pattern, defaults to STDIN',
                         metavar='file')
 
 
@@ -20,9 +28,27 @@ def args_logs(parser: argparse.ArgumentParser):
                              ' cause a significant performance penalty and a lot of output data)')
 
 
+def args_jobs(parser: argparse.ArgumentParser):
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='normalize multiple input files, or large inputs in chunks of lines, using N'
+                             ' processes, the latter is only possible if all normalizers are line local (default: 1)')
+
+
+def args_stream(parser: argparse.ArgumentParser):
+    parser.add_argument('--stream', action='store_true',
+                        help='normalize STDIN while reading it, writing each block of lines to STDOUT as soon as'
+                             ' it is normalized, only possible if all normalizers are line local')
+
+
+def args_compile(parser: argparse.ArgumentParser):
+    parser.add_argument('--compile', metavar='file',
+                        help='instead of normalizing, compile the normalizers to a bundle file, that loads without'
+                             ' building them again (use it with --bundle file)')
+
+
 def args_normalizers(parser: argparse.ArgumentParser):
     from benchmarkstt.normalization import factory
-    from benchmarkstt.cli import args_from_factory
+    from benchmarkstt.cli import args_from_factory, action_with_arguments
 
     normalizers_desc = """
       A list of normalizers to execute on the input, can be one or more normalizers
@@ -33,6 +59,11 @@ def args_normalizers(parser: argparse.ArgumentParser):
 
     normalizers = parser.add_argument_group('available normalizers', description=normalizers_desc)
     args_from_factory('normalizers', factory, normalizers)
+    # bundles are pickles, so they're not in the factory (nor available to the api)
+    normalizers.add_argument('--bundle', nargs=1, metavar='file',
+                             action=action_with_arguments('normalizers', ['file'], []),
+                             help='Use normalizers compiled to a bundle file (see --compile), only use bundles from a'
+                                  ' trusted source')
 
 
 def argparser(parser: argparse.ArgumentParser):
@@ -40,6 +71,9 @@ def argparser(parser: argparse.ArgumentParser):
     Adds the help and arguments specific to this module
     """
     args_logs(parser)
+    args_jobs(parser)
+    args_stream(parser)
+    args_compile(parser)
 
     files_desc = """
       You can provide multiple input and output files, each preceded by -i and -o
@@ -47,20 +81,25 @@ def argparser(parser: argparse.ArgumentParser):
       If no input file is given, only one output file can be used.
       If using both multiple input and output files there should be an equal amount
       of each. Each processed input file will then be written to the corresponding
-      output file."""
+      output file.
+      Alternatively all processed input files can be written to an output directory,
+      using the same file names (relative to the input directory)."""
 
     files = parser.add_argument_group('input and output files', description=files_desc)
     args_inputfile(files)
     files.add_argument('-o', '--outputfile', action='append', nargs=1,
                        help='write output to this file, defaults to STDOUT',
                        metavar='file')
+    files.add_argument('--output-dir', metavar='directory',
+                       help='write the output of each input file to this directory')
 
     args_normalizers(parser)
     return parser
 
 
 def get_normalizer_from_args(args):
-    from benchmarkstt.normalization import factory, NormalizationAggregate
+    from benchmarkstt.normalization import NormalizationAggregate
+    from benchmarkstt.normalization.bundle import create
     from benchmarkstt.normalization.logger import DiffLoggingFormatter, normalization_logger
 
     if args.log:
@@ -68,19 +107,45 @@ def get_normalizer_from_args(args):
         formatter = DiffLoggingFormatter('ansi', show_color_key=False)
         handler.setFormatter(formatter)
         handler.setLevel(logging.INFO)
-        normalization_logger.logger.addHandler(handler)
+        normalization_logger.add_handler(handler)
 
     composite = NormalizationAggregate()
 
     if 'normalizers' in args:
         for item in args.normalizers:
             normalizer_name = item.pop(0).replace('-', '.')
-            normalizer = factory.create(normalizer_name, *item)
+            normalizer = create(normalizer_name, *item)
             composite.add(normalizer)
 
     return composite
 
 
+def expand_inputfiles(paths):
+    """
+    Expands directories (recursively) and glob patterns to the files they
+    contain.
+
+    :return: list of (file, name) tuples, the name being the path relative to
+        the given directory or to the directory part of the glob pattern
+    """
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                result.extend((os.path.join(root, file), os.path.relpath(os.path.join(root, file), path))
+                              for file in sorted(files))
+        elif _glob_magic.search(path) and not os.path.exists(path):
+            base = path
+            while _glob_magic.search(base):
+                base = os.path.dirname(base)
+            result.extend((file, os.path.relpath(file, base or '.'))
+                          for file in sorted(glob.glob(path, recursive=True)) if os.path.isfile(file))
+        else:
+            result.append((path, os.path.basename(path)))
+    return result
+
+
 def run(parser, args):
     input_files = [f[0] for f in args.inputfile] if args.inputfile else None
     output_files = [f[0] for f in args.outputfile] if args.outputfile else None
@@ -88,28 +153,96 @@ def run(parser, args):
     if 'normalizers' not in args or not len(args.normalizers):
         parser.error("need at least one normalizer")
 
+    if args.compile is not None:
+        if input_files is not None or output_files is not None or args.output_dir is not None or args.stream:
+            parser.error("--compile doesn't normalize any input")
+        from benchmarkstt.normalization import bundle
+        bundle.compile([[item[0].replace('-', '.')] + item[1:] for item in args.normalizers], args.compile)
+        return
+
     if input_files is None and output_files is not None:
         parser.error("can only write output to stdout when reading from stdin")
 
+    if args.output_dir is not None:
+        if input_files is None:
+            parser.error("can only write output to an output directory when reading from input files")
+        if output_files is not None:
+            parser.error("can't write output to both output files and an output directory")
+
+    if input_files is not None:
+        input_files = expand_inputfiles(input_files)
+        if not len(input_files):
+            parser.error("no input files found")
+
+    if args.output_dir is not None:
+        output_files = [os.path.join(args.output_dir, name) for _, name in input_files]
+        if len(set(output_files)) != len(output_files):
+            parser.error("multiple input files have the same name")
+    elif output_files is not None:
+        if len(output_files) != len(input_files):
+            parser.error("need an equal amount of input and output files")
+
+    for output_file in output_files or ():
+        if os.path.exists(output_file):
+            parser.error("output file %s already exists" % (output_file,))
+
+    if args.jobs < 1:
+        parser.error("--jobs should be at least 1")
+
+    if args.jobs > 1 and args.log:
+        parser.error("can't show normalization logs when using multiple jobs")
+
+    if args.stream:
+        if input_files is not None:
+            parser.error("--stream can only be used when reading from stdin")
+        if args.jobs > 1:
+            parser.error("--stream can't be used with multiple jobs")
+
     composite = get_normalizer_from_args(args)
 
+    if args.stream and not composite.line_local:
+        parser.error("--stream can only be used if all normalizers are line local")
+
+    def normalize(text):
+        if args.jobs > 1:
+            if composite.line_local:
+                from benchmarkstt.normalization.parallel import normalize as normalize_parallel
+                return normalize_parallel(composite, text, args.jobs)
+            logger.warning('Not all normalizers are line local, ignoring --jobs')
+            args.jobs = 1
+        return (composite.normalize(text),)
+
     encoding = settings.default_encoding
-    if output_files is not None:
-        # pre-open the output files before doing the grunt work
-        output_files = [open(output_file, 'xt', encoding=encoding) for output_file in output_files]
 
-    if input_files is not None:
-        for idx, file in enumerate(input_files):
-            with open(file, encoding=encoding) as input_file:
-                text = input_file.read()
-            text = composite.normalize(text)
-            if output_files is None:
+    if input_files is None:
+        if args.stream:
+            from benchmarkstt.normalization.stream import normalize as normalize_stream
+            for text in normalize_stream(composite, sys.stdin):
                 sys.stdout.write(text)
-            else:
-                output_file = output_files[idx]
-                output_file.write(text)
-                output_file.close()
-    else:
-        text = sys.stdin.read()
-        text = composite.normalize(text)
-        sys.stdout.write(text)
+                sys.stdout.flush()
+        else:
+            sys.stdout.writelines(normalize(sys.stdin.read()))
+        return
+
+    input_files = [file for file, _ in input_files]
+    if output_files is None:
+        for file in input_files:
+            with open(file, encoding=encoding) as input_file:
+                sys.stdout.writelines(normalize(input_file.read()))
+        return
+
+    from benchmarkstt.normalization.parallel import normalize_files, write_atomic
+    for output_dir in set(os.path.dirname(output_file) for output_file in output_files):
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    if args.jobs > 1 and len(input_files) > 1:
+        # the files are normalized in parallel, each as a whole
+        for output_file in normalize_files(composite, zip(input_files, output_files), args.jobs, encoding):
+            logger.debug('Wrote %s', output_file)
+        return
+
+    for file, output_file in zip(input_files, output_files):
+        with open(file, encoding=encoding) as input_file:
+            text = input_file.read()
+        write_atomic(output_file, normalize(text), encoding)
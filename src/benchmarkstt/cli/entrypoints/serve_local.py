@@ -0,0 +1,39 @@
+"""
+Run a local daemon that keeps benchmarkstt loaded and warm, so repeated calls of
+the main command line tool don't have to pay the start-up cost every time.
+
+The daemon listens on a unix domain socket, only accessible by the current user.
+To make ``benchmarkstt`` forward its runs to the daemon, set the environment
+variable ``BENCHMARKSTT_SOCKET`` to the path of the socket. If no daemon is
+listening on that path, ``benchmarkstt`` runs as usual.
+
+Runs are handled one at a time. External code loaded with ``--load`` stays
+loaded for the lifetime of the daemon.
+"""
+
+import argparse
+import logging
+from benchmarkstt.cli import daemon
+
+logger = logging.getLogger(__name__)
+
+
+def argparser(parser: argparse.ArgumentParser):
+    """
+    Adds the help and arguments specific to this module
+    """
+
+    parser.add_argument('--socket', default=daemon.default_socket_path(),
+                        help='Path of the unix domain socket to listen on (default: %(default)s)')
+    return parser
+
+
+def run(_parser, args):  # pragma: nocover
+    server = daemon.create_server(args.socket)
+    print('Listening on %s, use it with: export BENCHMARKSTT_SOCKET=%s' % (args.socket, args.socket))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
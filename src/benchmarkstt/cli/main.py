@@ -1,7 +1,7 @@
 import logging
 import sys
 from contextlib import contextmanager
-from benchmarkstt import __meta__
+from benchmarkstt import __meta__, settings
 from benchmarkstt.cli import create_parser, args_help, args_common, before_parseargs, args_complete
 
 
@@ -33,6 +33,13 @@ def argparser():
 
 
 def run():
+    if settings.daemon_socket:
+        # forward to a warm daemon (see ``benchmarkstt-tools serve-local``), if one is listening
+        from benchmarkstt.cli.daemon import forward
+        code = forward(settings.daemon_socket, sys.argv[1:])
+        if code is not None:
+            exit(code)
+
     before_parseargs()
 
     # import done here to avoid circular dependencies
@@ -1,21 +1,26 @@
+import os
 import re
+from collections import OrderedDict
+from threading import Lock
 from csvlike import csv
+from benchmarkstt import settings
 
 
 class SectionConfigReader:
+    _section = re.compile(r'\[[a-z0-9]+\]\Z', re.IGNORECASE)
+
     def __init__(self, config):
         self.config = list(config)
         sections = {}
-        regex = re.compile(r'\[[a-z0-9]+\]', re.IGNORECASE)
-        prev_idx = 0
-        prev_section = None
+        section = None
+        start = 0
         for idx, line in enumerate(self.config):
-            if len(line) == 1 and regex.match(line[0]):
-                sections[prev_section] = slice(prev_idx + 1 if prev_idx != 0 else 0, idx)
-                prev_idx = idx
-                prev_section = line[0][1:-1]
+            if len(line) == 1 and line[0][:1] == '[' and self._section.match(line[0]):
+                sections[section] = slice(start, idx)
+                section = line[0][1:-1]
+                start = idx + 1
 
-        sections[prev_section] = slice(prev_idx + 1, idx + 1)
+        sections[section] = slice(start, len(self.config))
         self.sections = sections
 
     def __iter__(self):
@@ -32,3 +37,89 @@ def reader(file):
     csvreader = csv.reader(file, 'whitespace')
     sectionreader = SectionConfigReader(csvreader)
     return sectionreader
+
+
+def file_version(path):
+    """
+    :return: Identifies the current contents of the file at `path`
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileCache:
+    """
+    Keeps the values built from files (e.g. parsed configs, normalizers),
+    as long as none of those files changed.
+
+    :param int size: Maximum number of values kept, the least recently used
+        are removed first. 0 disables the cache.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._values = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        :return: The cached value, or None if not cached or one of its files
+            changed
+        """
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            self._values.move_to_end(key)
+
+        value, files = entry
+        try:
+            if all(file_version(path) == version for path, version in files.items()):
+                return value
+        except OSError:
+            pass
+
+        with self._lock:
+            if self._values.get(key) is entry:
+                del self._values[key]
+        return None
+
+    def set(self, key, value, files):
+        """
+        :param key:
+        :param value:
+        :param dict files: The files (real path -> :py:func:`file_version`
+            before reading it) the value was built from
+        """
+        if not self._size:
+            return
+        with self._lock:
+            self._values[key] = (value, dict(files))
+            self._values.move_to_end(key)
+            while len(self._values) > self._size:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+cache = FileCache(settings.config_cache_size)
+
+
+def read(file, encoding):
+    """
+    Reads config file `file`, parsing it only if it changed since it was
+    last read.
+
+    :rtype: SectionConfigReader
+    """
+    path = os.path.realpath(file)
+    files = {path: file_version(path)}
+    key = ('config', path, encoding)
+    result = cache.get(key)
+    if result is None:
+        with open(path, encoding=encoding) as f:
+            result = reader(f)
+        cache.set(key, result, files)
+    return result
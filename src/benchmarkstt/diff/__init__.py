@@ -3,8 +3,35 @@ Responsible for calculating differences.
 """
 
 from abc import ABC, abstractmethod
+from collections import namedtuple
 from benchmarkstt.factory import CoreFactory
 
+OpcodeCounts = namedtuple('OpcodeCounts',
+                          ('equal', 'replace', 'insert', 'delete'))
+
+
+def get_opcode_counts(opcodes) -> OpcodeCounts:
+    counts = OpcodeCounts(0, 0, 0, 0)._asdict()
+    for tag, alo, ahi, blo, bhi in opcodes:
+        if tag == 'equal':
+            counts[tag] += ahi - alo
+        elif tag == 'insert':
+            counts[tag] += bhi - blo
+        elif tag == 'delete':
+            counts[tag] += ahi - alo
+        elif tag == 'replace':
+            ca = ahi - alo
+            cb = bhi - blo
+            if ca < cb:
+                counts['insert'] += cb - ca
+                counts['replace'] += ca
+            elif ca > cb:
+                counts['delete'] += ca - cb
+                counts['replace'] += cb
+            else:
+                counts[tag] += ahi - alo
+    return OpcodeCounts(counts['equal'], counts['replace'], counts['insert'], counts['delete'])
+
 
 class Differ(ABC):
     @abstractmethod
@@ -32,5 +59,23 @@ class Differ(ABC):
         """
         raise NotImplementedError()
 
+    def iter_opcodes(self):
+        """
+        Same as :py:meth:`get_opcodes`, but as a generator. Differs should
+        override this if they can produce the opcodes without building the
+        complete list.
+        """
+        yield from self.get_opcodes()
+
+    def get_opcode_counts(self) -> OpcodeCounts:
+        """
+        Return the number of equal, replaced, inserted and deleted items.
+
+        A replace of unequal length is counted as a replace of the shortest
+        length, plus the remaining insertions or deletions. Differs should
+        override this if they can count without producing the opcodes.
+        """
+        return get_opcode_counts(self.iter_opcodes())
+
 
 factory = CoreFactory(Differ, False)
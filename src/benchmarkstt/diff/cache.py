@@ -0,0 +1,281 @@
+"""
+Content-addressed cache of alignments, so identical comparisons (e.g.
+unchanged hypotheses between nightly runs) are never re-aligned.
+
+Alignments are stored in a SQLite database, keyed by the hashes of the
+reference and hypothesis words and the differ used. The database is opened
+in write-ahead-log mode, so multiple processes (e.g. pool workers) can use
+the same cache file concurrently.
+"""
+
+from array import array
+from benchmarkstt.diff import Differ, OpcodeCounts, get_opcode_counts, factory
+from benchmarkstt.diff.core import RatcliffObershelp
+from functools import partial
+from hashlib import sha1
+import logging
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+#: Approximate storage (in bytes) of an alignment besides its key and opcodes
+#: (the counts, access time and index entries)
+ROW_SIZE = 64
+
+#: Seconds after which the access time of a cached alignment is updated when
+#: it's used, so most reads don't write
+ACCESS_INTERVAL = 60
+
+#: Version of the format of the packed opcodes, stored as their first byte
+OPCODES_FORMAT = 1
+
+_tags = ('equal', 'replace', 'insert', 'delete')
+_tag_codes = {tag: code for code, tag in enumerate(_tags)}
+# typecode of 4 byte unsigned integers
+_uint32 = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def digest(words):
+    """
+    :return: sha1 hex digest of a sequence of words
+    """
+    result = sha1()
+    for word in words:
+        result.update(word.encode('UTF-8'))
+        result.update(b'\0')
+    return result.hexdigest()
+
+
+def differ_name(differ_class):
+    """
+    Name identifying the differ (configuration), also for partials of
+    differs wrapping another differ (e.g. :py:class:`benchmarkstt.diff.incremental.IncrementalDiffer`).
+    """
+    if differ_class is None:
+        differ_class = RatcliffObershelp
+    elif type(differ_class) is str:
+        differ_class = factory[differ_class]
+
+    if isinstance(differ_class, partial):
+        name = differ_name(differ_class.func)
+        if 'differ_class' in differ_class.keywords:
+            name = '%s(%s)' % (name, differ_name(differ_class.keywords['differ_class']))
+        return name
+    return '%s.%s' % (differ_class.__module__, differ_class.__qualname__)
+
+
+def pack_opcodes(opcodes):
+    """
+    Packs opcodes as a compressed array of 4 byte little-endian unsigned
+    integers, five per opcode, preceded by the format version (so the cache
+    can be shared between machines)
+    """
+    data = array(_uint32)
+    for tag, i1, i2, j1, j2 in opcodes:
+        data.extend((_tag_codes[tag], i1, i2, j1, j2))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return bytes((OPCODES_FORMAT,)) + zlib.compress(data.tobytes(), 1)
+
+
+def unpack_opcodes(packed):
+    """
+    :return: list of opcodes, or None if packed using another format
+    """
+    if packed[:1] != bytes((OPCODES_FORMAT,)):
+        return None
+    data = array(_uint32)
+    data.frombytes(zlib.decompress(packed[1:]))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return [(_tags[data[idx]], data[idx + 1], data[idx + 2], data[idx + 3], data[idx + 4])
+            for idx in range(0, len(data), 5)]
+
+
+class AlignmentCache:
+    """
+    :param path: SQLite database file, created if it doesn't exist
+    :param max_size: Maximum total size (in bytes) of the stored alignments,
+        the least recently used alignments are evicted first. Default is
+        unlimited.
+    :param timeout: Seconds to wait for another process holding a lock
+    """
+
+    def __init__(self, path, max_size=None, timeout=30):
+        self._path = path
+        self._max_size = max_size
+        self._timeout = timeout
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        # connections can't be shared with forked (pool worker) processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, timeout=self._timeout, isolation_level=None)
+            self._pid = os.getpid()
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS alignments ('
+                                     'key TEXT PRIMARY KEY, opcodes BLOB, size INTEGER NOT NULL, '
+                                     'n_equal INTEGER NOT NULL, n_replace INTEGER NOT NULL, '
+                                     'n_insert INTEGER NOT NULL, n_delete INTEGER NOT NULL, '
+                                     'accessed REAL NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS alignments_accessed ON alignments (accessed)')
+            # running total of the sizes, so it's not summed on every write
+            self._connection.execute('CREATE TABLE IF NOT EXISTS total ('
+                                     'id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)')
+            self._connection.execute('INSERT OR IGNORE INTO total SELECT 0, COALESCE(SUM(size), 0) FROM alignments '
+                                     'WHERE NOT EXISTS (SELECT 1 FROM total)')
+        return self._connection
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        return state
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def key(a, b, differ_class=None):
+        return '%s:%s:%s' % (digest(a), digest(b), differ_name(differ_class))
+
+    def _get(self, key, columns):
+        row = self.connection.execute('SELECT accessed, %s FROM alignments WHERE key = ?' % (columns,),
+                                      (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        # the least recently used are evicted first, which doesn't need to be exact
+        if now - row[0] > ACCESS_INTERVAL:
+            self.connection.execute('UPDATE alignments SET accessed = ? WHERE key = ?', (now, key))
+        return row[1:]
+
+    def get_counts(self, key):
+        """
+        :rtype: OpcodeCounts or None if not cached
+        """
+        row = self._get(key, 'n_equal, n_replace, n_insert, n_delete')
+        return None if row is None else OpcodeCounts(*row)
+
+    def get_opcodes(self, key):
+        """
+        :rtype: list of opcodes or None if not cached (or cached using
+            another format)
+        """
+        row = self._get(key, 'opcodes')
+        if row is None or row[0] is None:
+            return None
+        return unpack_opcodes(row[0])
+
+    def set(self, key, counts, opcodes=None):
+        """
+        Store the counts, and optionally the opcodes (if known)
+        """
+        packed = None if opcodes is None else pack_opcodes(opcodes)
+        size = ROW_SIZE + len(key) + (0 if packed is None else len(packed))
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT size FROM alignments WHERE key = ?', (key,)).fetchone()
+            connection.execute('INSERT OR REPLACE INTO alignments VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                               (key, packed, size) + tuple(counts) + (time.time(),))
+            connection.execute('UPDATE total SET size = size + ?', (size - (0 if row is None else row[0]),))
+            if self._max_size is not None:
+                self._evict(self._max_size)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def size(self):
+        """
+        :return: The total size (in bytes) of the stored alignments
+        """
+        return self.connection.execute('SELECT size FROM total').fetchone()[0]
+
+    def _evict(self, max_size):
+        connection = self.connection
+        total, = connection.execute('SELECT size FROM total').fetchone()
+        if total <= max_size:
+            return
+
+        keys = []
+        rows = connection.execute('SELECT key, size FROM alignments ORDER BY accessed')
+        for key, size in rows:
+            if total <= max_size:
+                break
+            keys.append((key,))
+            total -= size
+        rows.close()
+        connection.executemany('DELETE FROM alignments WHERE key = ?', keys)
+        connection.execute('UPDATE total SET size = ?', (total,))
+        logger.debug('Evicted %d alignments from the cache', len(keys))
+
+    def evict(self, max_size):
+        """
+        Remove the least recently used alignments until the total size is at most `max_size` bytes
+        """
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._evict(max_size)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+
+class CachedDiffer(Differ):
+    """
+    Looks up the alignment in `cache`, only aligns (using `differ_class`)
+    if it wasn't cached before.
+
+    Use with e.g. ``functools.partial(CachedDiffer, cache=AlignmentCache(path))``
+
+    :param AlignmentCache cache:
+    :param differ_class: Differ used for the alignment, default RatcliffObershelp
+    """
+
+    def __init__(self, a, b, cache=None, differ_class=None):
+        if differ_class is None:
+            differ_class = RatcliffObershelp
+        elif type(differ_class) is str:
+            differ_class = factory[differ_class]
+
+        self._a = a
+        self._b = b
+        self._cache = cache
+        self._differ_class = differ_class
+        self._key = cache.key(a, b, differ_class)
+        self._opcodes = None
+
+    def get_opcodes(self):
+        if self._opcodes is None:
+            self._opcodes = self._cache.get_opcodes(self._key)
+            if self._opcodes is None:
+                self._opcodes = list(self._differ_class(self._a, self._b).get_opcodes())
+                self._cache.set(self._key, get_opcode_counts(self._opcodes), self._opcodes)
+        return self._opcodes
+
+    def get_opcode_counts(self):
+        if self._opcodes is not None:
+            return get_opcode_counts(self._opcodes)
+
+        counts = self._cache.get_counts(self._key)
+        if counts is None:
+            differ = self._differ_class(self._a, self._b)
+            if hasattr(differ, 'get_opcode_counts'):
+                counts = differ.get_opcode_counts()
+            else:
+                counts = get_opcode_counts(differ.get_opcodes())
+            self._cache.set(self._key, counts)
+        return counts
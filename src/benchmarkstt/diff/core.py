@@ -3,7 +3,7 @@ Core Diff algorithms
 """
 
 from difflib import SequenceMatcher
-from benchmarkstt.diff import Differ
+from benchmarkstt.diff import Differ, OpcodeCounts
 
 
 class RatcliffObershelp(Differ):
@@ -37,3 +37,37 @@ class RatcliffObershelp(Differ):
 
     def get_opcodes(self):
         return self.matcher.get_opcodes()
+
+    def iter_opcodes(self):
+        # same as SequenceMatcher.get_opcodes, without building the list
+        i = j = 0
+        for ai, bj, size in self.matcher.get_matching_blocks():
+            if i < ai:
+                if j < bj:
+                    yield 'replace', i, ai, j, bj
+                else:
+                    yield 'delete', i, ai, j, bj
+            elif j < bj:
+                yield 'insert', i, ai, j, bj
+            i = ai + size
+            j = bj + size
+            # the last matching block is a dummy of size 0
+            if size:
+                yield 'equal', ai, i, bj, j
+
+    def get_opcode_counts(self):
+        equal = replace = insert = delete = 0
+        i = j = 0
+        for ai, bj, size in self.matcher.get_matching_blocks():
+            deleted = ai - i
+            inserted = bj - j
+            if deleted < inserted:
+                replace += deleted
+                insert += inserted - deleted
+            else:
+                replace += inserted
+                delete += deleted - inserted
+            equal += size
+            i = ai + size
+            j = bj + size
+        return OpcodeCounts(equal, replace, insert, delete)
@@ -1,20 +1,36 @@
 import logging
 from benchmarkstt.helpers import make_printable
 import difflib
-from markupsafe import escape
 from benchmarkstt.schema import Schema
 from io import StringIO
 from collections import OrderedDict
+from itertools import chain
 
 logger = logging.getLogger(__name__)
 
 
+def _identity(txt):
+    return txt
+
+
 class Dialect:
+    """
+    A diff dialect renders opcodes by formatting each chunk using
+    `equal_format`, `delete_format`, `insert_format` and `replace_format`,
+    these are either format strings (with one '%s', or two for
+    `replace_format`) or methods returning the formatted text.
+
+    If `replace_format` is None, a replace is rendered as a delete followed
+    by an insert. Skipped parts ('skip' opcodes, see
+    :py:mod:`benchmarkstt.diff.opcodes`) are rendered as `skip_format`.
+    """
+
     preprocessor = None
     delete_format = '%s'
     insert_format = '%s'
     equal_format = '%s'
     replace_format = None
+    skip_format = ' \u2026'
 
     def __init__(self):
         self._stream = StringIO()
@@ -33,6 +49,75 @@ class Dialect:
     def output(self):
         return self._stream.getvalue()
 
+    @staticmethod
+    def _formatter(formatting):
+        if type(formatting) is not str:
+            return formatting
+        if formatting == '%s':
+            return _identity
+        return formatting.__mod__
+
+    def formatters(self):
+        """
+        :return: tuple of functions formatting an equal, delete, insert and
+            replace chunk
+        """
+        equal, delete, insert, replace = (self.equal_format, self.delete_format,
+                                          self.insert_format, self.replace_format)
+        if replace is None:
+            if type(delete) is str and type(insert) is str:
+                replace = delete + insert
+            else:
+                delete_, insert_ = self._formatter(delete), self._formatter(insert)
+
+                def replace(deleted, inserted):
+                    return delete_(deleted) + insert_(inserted)
+
+        if type(replace) is str:
+            template = replace
+
+            def replace(deleted, inserted):
+                return template % (deleted, inserted)
+
+        return self._formatter(equal), self._formatter(delete), self._formatter(insert), replace
+
+    def get_preprocessor(self, preprocessor=None):
+        dialect_preprocessor = self.preprocessor or _identity
+        if preprocessor is None:
+            return dialect_preprocessor
+
+        def _pre(txt):
+            return dialect_preprocessor(preprocessor(txt))
+        return _pre
+
+    def render(self, a, b, opcodes, preprocessor=None):
+        """
+        Renders the diff of `a` and `b` (strings or sequences of tokens)
+        described by `opcodes`, see :py:meth:`difflib.SequenceMatcher.get_opcodes`
+
+        :param preprocessor: Converts a slice of `a` or `b` to text, e.g. joins tokens
+        """
+        equal, delete, insert, replace = self.formatters()
+        pre = self.get_preprocessor(preprocessor)
+
+        parts = []
+        append = parts.append
+        for tag, alo, ahi, blo, bhi in opcodes:
+            if tag == 'equal':
+                append(equal(pre(a[alo:ahi])))
+            elif tag == 'delete':
+                append(delete(pre(a[alo:ahi])))
+            elif tag == 'insert':
+                append(insert(pre(b[blo:bhi])))
+            elif tag == 'skip':
+                append(self.skip_format)
+            else:
+                append(replace(pre(a[alo:ahi]), pre(b[blo:bhi])))
+
+        with self:
+            self._stream.write(''.join(parts))
+        return self.output()
+
 
 class ANSIDiffDialect(Dialect):
     def __init__(self, show_color_key=None):
@@ -64,20 +149,25 @@ class UTF8Dialect(Dialect):
     def preprocessor(txt):
         return make_printable(txt)
 
-    def delete_format(self, txt):
-        self._stream.writelines(c + '\u0338' for c in txt)
+    @staticmethod
+    def delete_format(txt):
+        # adds the combining character after each character
+        return txt.replace('', '\u0338')[1:]
 
-    def insert_format(self, txt):
-        self._stream.writelines(c + '\u0359' for c in txt)
+    @staticmethod
+    def insert_format(txt):
+        return txt.replace('', '\u0359')[1:]
 
 
 class HTMLDiffDialect(Dialect):
     @staticmethod
     def preprocessor(txt):
+        from markupsafe import escape
         return escape(txt)
 
     delete_format = '<span class="delete">%s</span>'
     insert_format = '<span class="insert">%s</span>'
+    skip_format = '<span class="skip"> \u2026</span>'
 
 
 class RestructuredTextDialect(ANSIDiffDialect):
@@ -90,71 +180,70 @@ class RestructuredTextDialect(ANSIDiffDialect):
 
 
 class ListDialect(Dialect):
+    """
+    Renders the diff as a list of items (one per word) with the keys 'type',
+    'reference' and 'hypothesis'.
+
+    Slices of sequences of tokens are used as is, slices of text are
+    preprocessed and split on white space. Skipped parts are represented by
+    an item of type 'skip'.
+    """
+
     @staticmethod
     def preprocessor(txt):
         return txt
 
-    def delete_format(self, txt):
-        return self._format('delete', txt)
-
-    def insert_format(self, txt):
-        return self._format('insert', txt)
-
-    def equal_format(self, txt):
-        return self._format('equal', txt)
-
-    def replace_format(self, a, b):
-        return self._format('replace', a, b)
-
-    def _format(self, kind, txt, txt2=None):
-        txt = txt.split()
-        if txt2 is None:
-            txt2 = txt
-        else:
-            txt2 = txt2.split()
-
-        oor = len(txt2)
-        for idx, word in enumerate(txt):
-            ref = word if kind != 'insert' else None
-            if idx >= oor:
-                kind = 'delete'
-            hyp = txt2[idx] if kind != 'delete' else None
-            result = OrderedDict((('type', kind), ('reference', ref), ('hypothesis', hyp)))
-            self._output.append(result)
+    @staticmethod
+    def _item(kind, ref, hyp):
+        return OrderedDict((('type', kind), ('reference', ref), ('hypothesis', hyp)))
+
+    def chunks(self, a, b, opcodes, preprocessor=None):
+        """
+        :return: Generator of lists of items, one list per opcode
+        """
+        pre = self.get_preprocessor(preprocessor)
+        item = self._item
+
+        def words(seq):
+            if isinstance(seq, str):
+                return pre(seq).split()
+            return seq
+
+        for tag, alo, ahi, blo, bhi in opcodes:
+            if tag == 'equal':
+                yield [item('equal', word, word) for word in words(a[alo:ahi])]
+            elif tag == 'delete':
+                yield [item('delete', word, None) for word in words(a[alo:ahi])]
+            elif tag == 'insert':
+                yield [item('insert', None, word) for word in words(b[blo:bhi])]
+            elif tag == 'skip':
+                yield [item('skip', None, None)]
+            else:
+                a_ = words(a[alo:ahi])
+                b_ = words(b[blo:bhi])
+                common = min(len(a_), len(b_))
+                chunk = [item('replace', ref, hyp) for ref, hyp in zip(a_, b_)]
+                chunk.extend(item('delete', word, None) for word in a_[common:])
+                chunk.extend(item('insert', None, word) for word in b_[common:])
+                yield chunk
 
-        if idx < oor:
-            for word_ in txt2[idx+1:]:
-                result = OrderedDict((('type', 'insert'), ('reference', None), ('hypothesis', word_)))
-                self._output.append(result)
+    def render(self, a, b, opcodes, preprocessor=None):
+        return list(chain.from_iterable(self.chunks(a, b, opcodes, preprocessor)))
 
-    def __enter__(self):
-        self._output = []
-        return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
+class IterDialect(ListDialect):
+    """
+    Same items as :py:class:`ListDialect`, but produced lazily (one diff
+    chunk at a time) instead of building the complete list in memory.
+    """
 
-    def output(self):
-        return self._output
+    def render(self, a, b, opcodes, preprocessor=None):
+        return chain.from_iterable(self.chunks(a, b, opcodes, preprocessor))
 
 
 class JSONDiffDialect(ListDialect):
-    def __init__(self):
-        self._line = None
-
-    def __enter__(self):
-        super().__enter__()
-        self._stream = StringIO()
-        self._line = 0
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        super().__exit__(exc_type, exc_val, exc_tb)
-        self._line = None
-        self._stream.write(Schema.dumps(super().output()))
-
-    def output(self):
-        return self._stream.getvalue()
+    def render(self, a, b, opcodes, preprocessor=None):
+        return Schema.dumps(super().render(a, b, opcodes, preprocessor))
 
 
 class DiffFormatter:
@@ -164,6 +253,7 @@ class DiffFormatter:
         "text": UTF8Dialect,
         "json": JSONDiffDialect,
         "list": ListDialect,
+        "iter": IterDialect,
         "rst": RestructuredTextDialect,
     }
 
@@ -176,51 +266,9 @@ class DiffFormatter:
         self._dialect = self.diff_dialects[dialect](*args, **kwargs)
 
     def diff(self, a, b, opcodes=None, preprocessor=None):
-        formats = dict(insert=None, delete=None, equal=None, replace=None)
-
-        dialect = self._dialect
-        with dialect as stream:
-            def format_string(formatting):
-                def _(*args):
-                    dialect.stream.write(formatting % args)
-
-                return _
-
-            # dialect = self._dialect
-            for f in formats.keys():
-                formatter = getattr(dialect, f + '_format')
-                if type(formatter) is str:
-                    formats[f] = format_string(formatter)
-                else:
-                    formats[f] = formatter
-
-            if formats['replace'] is None:
-                def _(deleted, inserted):
-                    formats['delete'](deleted)
-                    formats['insert'](inserted)
-                formats['replace'] = _
-
-            if preprocessor is not None:
-                def _pre(txt):
-                    return dialect.preprocessor(preprocessor(txt))
-            else:
-                _pre = dialect.preprocessor
-
-            if opcodes is None:
-                opcodes = difflib.SequenceMatcher(None, a, b).get_opcodes()
-
-            for tag, alo, ahi, blo, bhi in opcodes:
-                a_ = _pre(a[alo:ahi])
-
-                if tag in ('equal', 'delete'):
-                    formats[tag](_pre(a[alo:ahi]))
-                else:
-                    b_ = _pre(b[blo:bhi])
-                    if tag == 'insert':
-                        formats[tag](b_)
-                    else:
-                        formats[tag](a_, b_)
-        return dialect.output()
+        if opcodes is None:
+            opcodes = difflib.SequenceMatcher(None, a, b).get_opcodes()
+        return self._dialect.render(a, b, opcodes, preprocessor)
 
     @classmethod
     def has_dialect(cls, dialect):
@@ -0,0 +1,256 @@
+"""
+Incremental re-alignment, for when successive hypotheses for the same
+reference only differ in a few places (e.g. successive builds of a model).
+
+The last full alignment is stored per reference and source of the
+hypothesis (e.g. the system or file it came from), so scoring several systems
+against the same reference doesn't overwrite each other's alignment. For a
+new hypothesis, the unchanged regions are found by splitting both hypotheses
+in content-defined chunks (a chunk ends after a word whose hash matches a
+pattern, so an edit only changes the chunks it touches) and matching the
+chunks. Matching words in the unchanged regions are kept as is, only the
+words in between are re-aligned.
+
+Since the unchanged parts aren't reconsidered, the result may differ from
+aligning from scratch. It's therefore only re-used if at least
+`min_unchanged` of the hypothesis is unchanged, otherwise (and the first time)
+the hypothesis is aligned from scratch. Re-aligned results are logged as a
+warning, and marked by :py:attr:`IncrementalDiffer.exact`. Only full
+alignments are stored, so the approximations never accumulate.
+"""
+
+from benchmarkstt.diff import Differ, get_opcode_counts, factory
+from benchmarkstt.diff.cache import differ_name
+from benchmarkstt.diff.core import RatcliffObershelp
+from difflib import SequenceMatcher
+from hashlib import sha1
+import json
+import logging
+import os
+import tempfile
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+class AlignmentStore:
+    """
+    Stores the last full alignment per reference (and hypothesis source), as
+    json files in `directory`.
+
+    :param directory: Directory to store the alignments in, created if needed
+    """
+
+    version = 2
+
+    def __init__(self, directory):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(reference, differ_class, source=None):
+        """
+        :param source: Identifies where the hypothesis comes from (e.g. its
+            file or system), None if unknown
+        """
+        digest = sha1()
+        digest.update(differ_name(differ_class).encode('UTF-8'))
+        digest.update(b'\0')
+        digest.update(('' if source is None else str(source)).encode('UTF-8'))
+        for word in reference:
+            digest.update(b'\0')
+            digest.update(word.encode('UTF-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._directory, '%s.json' % (key,))
+
+    def load(self, key):
+        """
+        :return: tuple of the hypothesis and its opcodes, or None if not available
+        """
+        try:
+            with open(self._path(key), encoding='UTF-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning('Ignored corrupt stored alignment %s', key)
+            return None
+
+        if data.get('version') != self.version:
+            return None
+        return data['hypothesis'], [tuple(opcode) for opcode in data['opcodes']]
+
+    def save(self, key, hypothesis, opcodes):
+        data = dict(version=self.version, hypothesis=list(hypothesis), opcodes=list(opcodes))
+        # write to a temporary file first, so an interrupted run never leaves a partial file
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def chunks(words, mask=0xf, max_length=64):
+    """
+    Content-defined chunks: a chunk ends after a word for which
+    ``crc32(word) & mask == 0``, or when it reaches `max_length` words.
+
+    :return: list of (start, end) positions
+    """
+    result = []
+    start = 0
+    for idx, word in enumerate(words):
+        if zlib.crc32(word.encode('UTF-8')) & mask == 0 or idx + 1 - start >= max_length:
+            result.append((start, idx + 1))
+            start = idx + 1
+    if start < len(words):
+        result.append((start, len(words)))
+    return result
+
+
+def unchanged_regions(old, new):
+    """
+    :return: list of (start, end, shift) tuples, `old[start:end]` equals
+        `new[start + shift:end + shift]`
+    """
+    old_chunks = chunks(old)
+    new_chunks = chunks(new)
+    old_keys = [tuple(old[start:end]) for start, end in old_chunks]
+    new_keys = [tuple(new[start:end]) for start, end in new_chunks]
+
+    regions = []
+    for i, j, size in SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_matching_blocks():
+        if size:
+            start = old_chunks[i][0]
+            regions.append((start, old_chunks[i + size - 1][1], new_chunks[j][0] - start))
+    return regions
+
+
+def _anchors(opcodes, regions):
+    """
+    The equal parts of `opcodes` that lie within the unchanged regions, as
+    matching blocks (i, j, size) of the reference and the new hypothesis.
+    """
+    idx = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != 'equal':
+            continue
+        while idx < len(regions) and regions[idx][1] <= j1:
+            idx += 1
+        pos = idx
+        while pos < len(regions) and regions[pos][0] < j2:
+            start, end, shift = regions[pos]
+            lo = max(j1, start)
+            hi = min(j2, end)
+            yield i1 + lo - j1, lo + shift, hi - lo
+            pos += 1
+
+
+def realign(a, b, old_b, old_opcodes, differ_class=None, regions=None):
+    """
+    Aligns `a` and `b`, re-using the alignment `old_opcodes` of `a` and `old_b`.
+
+    :param regions: The unchanged regions of `old_b` and `b`, see :py:func:`unchanged_regions`
+    :return: list of opcodes
+    """
+    if differ_class is None:
+        differ_class = RatcliffObershelp
+    if regions is None:
+        regions = unchanged_regions(old_b, b)
+
+    result = []
+
+    def add(tag, i1, i2, j1, j2):
+        if result and result[-1][0] == tag:
+            result[-1] = (tag, result[-1][1], i2, result[-1][3], j2)
+        else:
+            result.append((tag, i1, i2, j1, j2))
+
+    def align_gap(i1, i2, j1, j2):
+        if i1 < i2 and j1 < j2:
+            for tag, ai1, ai2, bj1, bj2 in differ_class(a[i1:i2], b[j1:j2]).get_opcodes():
+                add(tag, i1 + ai1, i1 + ai2, j1 + bj1, j1 + bj2)
+        elif i1 < i2:
+            add('delete', i1, i2, j1, j2)
+        elif j1 < j2:
+            add('insert', i1, i2, j1, j2)
+
+    i = j = 0
+    for ai, bj, size in _anchors(old_opcodes, regions):
+        align_gap(i, ai, j, bj)
+        add('equal', ai, ai + size, bj, bj + size)
+        i = ai + size
+        j = bj + size
+    align_gap(i, len(a), j, len(b))
+    return result
+
+
+class IncrementalDiffer(Differ):
+    """
+    Re-uses the previous alignment (stored in `store`) of the same reference
+    and hypothesis source to only align the changed parts of the hypothesis.
+    The result may differ from a full alignment, see :py:attr:`exact`.
+
+    Use with e.g. ``functools.partial(IncrementalDiffer, store=AlignmentStore(directory))``
+
+    :param AlignmentStore store:
+    :param differ_class: Differ used for the (re-)alignment, default RatcliffObershelp
+    :param source: Identifies where the hypothesis comes from (e.g. its file or system)
+    :param float min_unchanged: Minimum part of the hypothesis that must be
+        unchanged to re-use the previous alignment, otherwise it's aligned from
+        scratch
+    """
+
+    #: Whether the alignment is a full alignment (the same as aligning from
+    #: scratch), False if the previous alignment was re-used
+    exact = True
+
+    def __init__(self, a, b, store=None, differ_class=None, source=None, min_unchanged=.75):
+        if differ_class is None:
+            differ_class = RatcliffObershelp
+        elif type(differ_class) is str:
+            differ_class = factory[differ_class]
+
+        self._a = list(a)
+        self._b = list(b)
+        self._store = store
+        self._differ_class = differ_class
+        self._source = source
+        self._min_unchanged = min_unchanged
+        self._opcodes = None
+
+    def _align(self):
+        a, b = self._a, self._b
+        key = self._store.key(a, self._differ_class, self._source)
+        previous = self._store.load(key)
+
+        if previous is None:
+            logger.info('No previous alignment, aligning from scratch')
+        elif previous[0] == b:
+            return previous[1]
+        else:
+            regions = unchanged_regions(previous[0], b)
+            if sum(end - start for start, end, _ in regions) >= self._min_unchanged * len(b):
+                self.exact = False
+                logger.warning('Re-used the previous alignment for the unchanged parts of the hypothesis, the result '
+                               'may differ from a full alignment')
+                # not stored, the next hypothesis is re-aligned using the full alignment
+                return realign(a, b, previous[0], previous[1], self._differ_class, regions)
+            logger.info('Hypothesis changed too much, aligning from scratch')
+
+        opcodes = list(self._differ_class(a, b).get_opcodes())
+        self._store.save(key, b, opcodes)
+        return opcodes
+
+    def get_opcodes(self):
+        if self._opcodes is None:
+            self._opcodes = self._align()
+        return self._opcodes
+
+    def get_opcode_counts(self):
+        return get_opcode_counts(self.get_opcodes())
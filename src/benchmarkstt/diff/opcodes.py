@@ -0,0 +1,88 @@
+"""
+Helpers to select parts of a list of opcodes (see :py:meth:`benchmarkstt.diff.Differ.get_opcodes`),
+so only those parts of a diff need to be rendered.
+
+Skipped parts can be represented by a 'skip' opcode, `('skip', i1, i2, j1, j2)`,
+meaning `a[i1:i2]` and `b[j1:j2]` were left out.
+"""
+
+from bisect import bisect_left
+
+
+def window(opcodes, offset=None, limit=None):
+    """
+    Only keep the opcodes for the reference words `offset` up to `offset + limit`,
+    opcodes overlapping the boundaries are clipped.
+
+    Insertions belong to the window containing the reference word following
+    them (trailing insertions to the last window).
+
+    :param list opcodes:
+    :param int offset: Index of the first reference word
+    :param int limit: Maximum number of reference words
+    :rtype: list
+    """
+    if not opcodes:
+        return []
+
+    offset = 0 if offset is None else offset
+    total = opcodes[-1][2]
+    end = total if limit is None else offset + limit
+
+    # index of the first opcode that may overlap the window
+    ends = [opcode[2] for opcode in opcodes]
+    idx = bisect_left(ends, offset)
+
+    result = []
+    for tag, alo, ahi, blo, bhi in opcodes[idx:]:
+        if alo > end or (alo == end and (tag != 'insert' or end < total)):
+            break
+
+        if tag == 'insert':
+            if alo >= offset:
+                result.append((tag, alo, ahi, blo, bhi))
+            continue
+
+        lo = max(alo, offset)
+        hi = min(ahi, end)
+        if lo >= hi:
+            continue
+
+        # hypothesis words are paired to reference words by position, any
+        # remaining hypothesis words go with the last reference word
+        blo_ = min(blo + lo - alo, bhi)
+        bhi_ = bhi if hi == ahi else min(blo + hi - alo, bhi)
+        if tag == 'replace' and blo_ == bhi_:
+            tag = 'delete'
+        result.append((tag, lo, hi, blo_, bhi_))
+    return result
+
+
+def with_context(opcodes, context=0):
+    """
+    Only keep the differences, with `context` equal words surrounding them,
+    everything in between is replaced by a 'skip' opcode.
+
+    :param list opcodes:
+    :param int context: Number of equal words to keep before and after each difference
+    :rtype: list
+    """
+    last = len(opcodes) - 1
+    result = []
+    for idx, (tag, alo, ahi, blo, bhi) in enumerate(opcodes):
+        if tag != 'equal':
+            result.append((tag, alo, ahi, blo, bhi))
+            continue
+
+        keep_before = context if idx > 0 else 0
+        keep_after = context if idx < last else 0
+        if ahi - alo <= keep_before + keep_after:
+            result.append((tag, alo, ahi, blo, bhi))
+            continue
+
+        if keep_before:
+            result.append((tag, alo, alo + keep_before, blo, blo + keep_before))
+        result.append(('skip', alo + keep_before, ahi - keep_after, blo + keep_before, bhi - keep_after))
+        if keep_after:
+            result.append((tag, ahi - keep_after, ahi, bhi - keep_after, bhi))
+    return result
@@ -3,10 +3,8 @@ import inspect
 import re
 import ast
 from collections import namedtuple
+from functools import lru_cache
 import logging
-from docutils.core import publish_string
-from docutils.writers import html5_polyglot
-import docutils
 
 
 logger = logging.getLogger(__name__)
@@ -135,36 +133,52 @@ def parse(func):
     return result
 
 
-class HTML5Writer(html5_polyglot.Writer):
-    def apply_template(self):
-        subs = self.interpolation_dict()
-        return subs['body']
+@lru_cache(maxsize=None)
+def writers():
+    """
+    Returns the docutils writers, docutils is only imported when first needed
+    as it is by far the most expensive import on start-up.
 
+    :return: tuple(HTML5Writer, TextWriter)
+    """
+    import docutils.nodes
+    import docutils.writers
+    from docutils.writers import html5_polyglot
 
-class TextWriter(docutils.writers.Writer):
-    class TextVisitor(docutils.nodes.SparseNodeVisitor):
-        _text = ''
+    class HTML5Writer(html5_polyglot.Writer):
+        def apply_template(self):
+            subs = self.interpolation_dict()
+            return subs['body']
 
-        def visit_Text(self, node):
-            self._text += node.astext()
+    class TextWriter(docutils.writers.Writer):
+        class TextVisitor(docutils.nodes.SparseNodeVisitor):
+            _text = ''
 
-        def visit_paragraph(self, node):
-            self._text += '\n\n'
+            def visit_Text(self, node):
+                self._text += node.astext()
 
-        def text(self):
-            return self._text
+            def visit_paragraph(self, node):
+                self._text += '\n\n'
 
-    def translate(self):
-        visitor = self.TextVisitor(self.document)
-        self.document.walkabout(visitor)
-        self.output = visitor.text()
+            def text(self):
+                return self._text
+
+        def translate(self):
+            visitor = self.TextVisitor(self.document)
+            self.document.walkabout(visitor)
+            self.output = visitor.text()
+
+    return HTML5Writer, TextWriter
 
 
 def process_rst(text, writer=None):
+    from docutils.core import publish_string
+
+    html5_writer, text_writer = writers()
     if writer is None or writer == 'html':
-        writer = HTML5Writer()
+        writer = html5_writer()
     elif writer == 'text':
-        writer = TextWriter()
+        writer = text_writer()
     elif type(writer) is str:
         raise ValueError("Unknown writer %s", str)
     settings = {'output_encoding': 'unicode', 'table_style': 'table'}
@@ -3,6 +3,11 @@ Some helper methods that can be re-used across submodules
 """
 
 
+_printable = {codepoint: 0x2400 | codepoint for codepoint in range(0x00, 0x20)}
+_printable.update({codepoint: 0x2400 | codepoint for codepoint in range(0x7f, 0xa0)})
+_printable[ord(' ')] = '·'
+
+
 def make_printable(char):
     """
     Return printable representation of ascii/utf-8 control characters
@@ -10,13 +15,4 @@ def make_printable(char):
     :param char:
     :return str:
     """
-    if not len(char):
-        return ''
-    if len(char) > 1:
-        return ''.join(list(map(make_printable, char)))
-
-    codepoint = ord(char)
-    if 0x00 <= codepoint <= 0x1f or 0x7f <= codepoint <= 0x9f:
-        return chr(0x2400 | codepoint)
-
-    return char if char != ' ' else '·'
+    return char.translate(_printable)
@@ -3,6 +3,10 @@ Default input formats
 
 """
 
+import codecs
+import io
+import mmap
+import os
 import benchmarkstt.segmentation.core as segmenters
 from benchmarkstt import input, settings
 
@@ -31,6 +35,9 @@ class File(input.Input):
         "txt": PlainText,
     }
 
+    # amount of bytes decoded at once when the text doesn't need to be normalized as a whole
+    chunk_size = 1 << 20
+
     @classmethod
     def available_types(cls):
         return {cls_config.name: ' '.join([cls.__doc__.strip(),
@@ -51,8 +58,10 @@ class File(input.Input):
 
             input_type = self._extension_to_class[extension]
 
-        encoding = settings.default_encoding
-        with open(file, encoding=encoding):
+        self._encoding = settings.default_encoding
+        codecs.lookup(self._encoding)
+
+        with open(file, 'rb'):
             """Just checks that file is readable..."""
 
         self._file = file
@@ -62,9 +71,37 @@ class File(input.Input):
 
         self._input_class = input_type
 
+    def _decode(self, chunk_size=None):
+        """
+        Memory-maps the file and decodes it in slices of `chunk_size` bytes
+        (or all at once if None), translating newlines the same way a file
+        opened in text mode would. The mapping is closed once all slices are
+        decoded (or the generator is closed).
+        """
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(self._encoding)(), True)
+        with open(self._file, 'rb') as f:
+            length = os.fstat(f.fileno()).st_size
+            if not length:
+                yield decoder.decode(b'', True)
+                return
+
+            if chunk_size is None:
+                chunk_size = length
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as buffer:
+                    for start in range(0, length, chunk_size):
+                        # released explicitly, the mapping can't be closed while a slice is referenced (e.g. by
+                        # the traceback of a decoding error)
+                        with buffer[start:start + chunk_size] as chunk:
+                            text = decoder.decode(chunk, start + chunk_size >= length)
+                        yield text
+
     def __iter__(self):
-        encoding = settings.default_encoding
-        with open(self._file, encoding=encoding) as f:
-            text = f.read()
+        if self._normalizer is None and issubclass(self._input_class, PlainText):
+            # no normalization needed, so segmentation can consume the decoded slices as they come
+            text = self._decode(self.chunk_size)
+        else:
+            text = ''.join(self._decode())
 
         return iter(self._input_class(text, normalizer=self._normalizer))
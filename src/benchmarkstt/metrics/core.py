@@ -1,18 +1,15 @@
 from benchmarkstt.schema import Schema
 import logging
 import json
-from benchmarkstt.diff import Differ
+from benchmarkstt.diff import Differ, OpcodeCounts, get_opcode_counts, factory as differ_factory
 from benchmarkstt.diff.core import RatcliffObershelp
 from benchmarkstt.diff.formatter import format_diff
+from benchmarkstt.diff.opcodes import window, with_context
 from benchmarkstt.metrics import Metric
-from collections import namedtuple
 import editdistance
 
 logger = logging.getLogger(__name__)
 
-OpcodeCounts = namedtuple('OpcodeCounts',
-                          ('equal', 'replace', 'insert', 'delete'))
-
 
 def traversible(schema, key=None):
     if key is None:
@@ -20,54 +17,63 @@ def traversible(schema, key=None):
     return [word[key] for word in schema]
 
 
-def get_opcode_counts(opcodes) -> OpcodeCounts:
-    counts = OpcodeCounts(0, 0, 0, 0)._asdict()
-    for tag, alo, ahi, blo, bhi in opcodes:
-        if tag == 'equal':
-            counts[tag] += ahi - alo
-        elif tag == 'insert':
-            counts[tag] += bhi - blo
-        elif tag == 'delete':
-            counts[tag] += ahi - alo
-        elif tag == 'replace':
-            ca = ahi - alo
-            cb = bhi - blo
-            if ca < cb:
-                counts['insert'] += cb - ca
-                counts['replace'] += ca
-            elif ca > cb:
-                counts['delete'] += ca - cb
-                counts['replace'] += cb
-            else:
-                counts[tag] += ahi - alo
-    return OpcodeCounts(counts['equal'], counts['replace'], counts['insert'], counts['delete'])
-
-
 def get_differ(a, b, differ_class: Differ):
     if differ_class is None:
         # differ_class = HuntMcIlroy
         differ_class = RatcliffObershelp
+    elif type(differ_class) is str:
+        # e.g. given as a command line argument
+        differ_class = differ_factory[differ_class]
     return differ_class(traversible(a), traversible(b))
 
 
+def opcode_counts(differ) -> OpcodeCounts:
+    # ducktyped differs may only implement get_opcodes
+    if hasattr(differ, 'get_opcode_counts'):
+        return differ.get_opcode_counts()
+    return get_opcode_counts(differ.get_opcodes())
+
+
 class WordDiffs(Metric):
     """
     Present differences on a per-word basis
 
+    For huge documents, only a window of the differences can be presented
+    (`offset` and `limit`), and/or only the differences surrounded by
+    `context` unchanged words.
+
     :param dialect: Presentation format. Default is 'ansi'.
     :example dialect: 'html'
     :param differ_class: For future use.
+    :param offset: Index of the first reference word to present. Default is 0.
+    :example offset: 1000
+    :param limit: Maximum number of reference words to present. Default is all.
+    :example limit: 500
+    :param context: Only present differences, with this number of unchanged
+        words before and after each difference. Default is to present all words.
+    :example context: 3
     """
 
-    def __init__(self, dialect=None, differ_class: Differ = None):
+    def __init__(self, dialect=None, differ_class: Differ = None, offset=None, limit=None, context=None):
         self._differ_class = differ_class
         self._dialect = dialect
+        self._offset = None if offset is None else int(offset)
+        self._limit = None if limit is None else int(limit)
+        self._context = None if context is None else int(context)
 
     def compare(self, ref: Schema, hyp: Schema):
         differ = get_differ(ref, hyp, differ_class=self._differ_class)
         a = traversible(ref)
         b = traversible(hyp)
-        return format_diff(a, b, differ.get_opcodes(),
+        if self._offset is None and self._limit is None and self._context is None:
+            opcodes = differ.iter_opcodes() if hasattr(differ, 'iter_opcodes') else differ.get_opcodes()
+        else:
+            opcodes = differ.get_opcodes()
+            if self._offset is not None or self._limit is not None:
+                opcodes = window(opcodes, self._offset, self._limit)
+            if self._context is not None:
+                opcodes = with_context(opcodes, self._context)
+        return format_diff(a, b, opcodes,
                            dialect=self._dialect,
                            preprocessor=lambda x: ' %s' % (' '.join(x),))
 
@@ -133,7 +139,7 @@ class WER(Metric):
 
         diffs = get_differ(ref, hyp, differ_class=self._differ_class)
 
-        counts = get_opcode_counts(diffs.get_opcodes())
+        counts = opcode_counts(diffs)
 
         changes = counts.replace * self.SUB_PENALTY + \
             counts.delete * self.DEL_PENALTY + \
@@ -215,7 +221,7 @@ class DiffCounts(Metric):
         if self._mode == self.MODE_LEVENSHTEIN:
             raise NotImplementedError('diffcounts is not implemented for Levenshtein distance')
         diffs = get_differ(ref, hyp, differ_class=self._differ_class)
-        return get_opcode_counts(diffs.get_opcodes())
+        return opcode_counts(diffs)
 
 
 class BEER(Metric):
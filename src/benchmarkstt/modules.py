@@ -1,4 +1,5 @@
 import sys
+import socket
 import logging
 from importlib import import_module
 
@@ -10,6 +11,10 @@ if sys.version_info >= (3, 6):
     # only supported in python >= 3.6
     _modules.append('api')
 
+if hasattr(socket, 'AF_UNIX'):
+    # only supported on platforms with unix domain sockets
+    _modules.append('serve-local')
+
 
 class HiddenModuleError(Exception):
     pass
@@ -43,7 +48,7 @@ class Modules:
         return [key for key, value in iter(self)]
 
     def _import(self, key):
-        name = 'benchmarkstt.%s.entrypoints.%s' % (self._submodule, key)
+        name = 'benchmarkstt.%s.entrypoints.%s' % (self._submodule, key.replace('-', '_'))
         module = import_module(name)
 
         if hasattr(module, 'hidden'):
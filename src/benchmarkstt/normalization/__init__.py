@@ -3,10 +3,13 @@ Responsible for normalization of text.
 """
 
 import os
+import re
 from abc import ABC, abstractmethod
-from benchmarkstt.normalization.logger import log
+from collections import OrderedDict
+from threading import Lock
+from benchmarkstt.normalization.logger import log, normalization_logger
 from benchmarkstt.factory import CoreFactory
-from benchmarkstt import settings
+from benchmarkstt import settings, config
 from csvlike import csv
 
 
@@ -15,6 +18,16 @@ class _NormalizerNoLogs(ABC):
     Abstract base class for normalization, without providing logging.
     """
 
+    #: Whether normalizing each word and each run of whitespace separately
+    #: gives the same result as normalizing the whole text, runs of whitespace
+    #: remaining whitespace. Normalizers may also implement this as a property.
+    token_local = False
+
+    #: Whether normalizing each line separately gives the same result as
+    #: normalizing the whole text, i.e. the text can be normalized in chunks of
+    #: lines. Normalizers may also implement this as a property.
+    line_local = False
+
     @abstractmethod
     def normalize(self, text: str) -> str:
         """
@@ -53,6 +66,17 @@ class NormalizerWithFileSupport(Normalizer):
     being wrapped in a core.File wrapper.
     """
 
+    @classmethod
+    def aggregate(cls, normalizers, title=None):
+        """
+        Combines the normalizers loaded from a file, subclasses may return an
+        optimized equivalent of applying them one by one.
+        """
+        aggregate = NormalizationAggregate(title=title)
+        for normalizer in normalizers:
+            aggregate.add(normalizer)
+        return aggregate
+
     @abstractmethod
     def _normalize(self, text: str) -> str:
         """
@@ -64,19 +88,76 @@ class NormalizerWithFileSupport(Normalizer):
 class NormalizationAggregate(Normalizer):
     """
     Combining normalizers
+
+    If all normalizers are token local (see :py:attr:`token_local`), each
+    distinct word is only normalized once, the results are kept in a memo of
+    the :py:attr:`memo_size` most recently used words.
     """
 
+    #: Maximum number of words (and runs of whitespace) to keep normalized
+    memo_size = 1 << 16
+
+    _tokens = re.compile(r'(\s+)')
+    _mixed = re.compile(r'\s\S|\S\s')
+
     def __init__(self, title=None):
         """
         :meta public:
         """
         self._normalizers = []
         self._title = type(self).__name__ if title is None else title
+        self._memo = OrderedDict()
+        self._lock = Lock()
 
     def add(self, normalizer):
         """Adds a normalizer to the composite "stack"
         """
         self._normalizers.append(normalizer)
+        self._memo.clear()
+
+    @property
+    def token_local(self):
+        return all(normalizer.token_local for normalizer in self._normalizers)
+
+    @property
+    def line_local(self):
+        return all(normalizer.line_local for normalizer in self._normalizers)
+
+    def _apply(self, text):
+        for normalizer in self._normalizers:
+            text = normalizer.normalize(text)
+        return text
+
+    def _normalize_tokens(self, text):
+        """
+        Normalizes each distinct word (or run of whitespace) once, None if
+        a run of whitespace didn't remain whitespace.
+        """
+        tokens = self._tokens.split(text)
+        normalized = dict.fromkeys(tokens)
+        memo = self._memo
+        missing = []
+        with self._lock:
+            for token in normalized:
+                if token in memo:
+                    memo.move_to_end(token)
+                    normalized[token] = memo[token]
+                else:
+                    missing.append(token)
+
+        for token in missing:
+            normalized[token] = self._apply(token)
+
+        with self._lock:
+            for token in missing:
+                memo[token] = normalized[token]
+            while len(memo) > self.memo_size:
+                memo.popitem(last=False)
+
+        for token, result in normalized.items():
+            if token.isspace() and (result == '' or not result.isspace()):
+                return None
+        return ''.join([normalized[token] for token in tokens])
 
     def _normalize(self, text: str) -> str:
         """
@@ -86,9 +167,24 @@ class NormalizationAggregate(Normalizer):
         if not self._normalizers:
             return text
 
-        for normalizer in self._normalizers:
-            text = normalizer.normalize(text)
-        return text
+        # logs should show the changes in the whole text
+        if self._mixed.search(text) is not None and not normalization_logger.active and self.token_local:
+            result = self._normalize_tokens(text)
+            if result is not None:
+                return result
+
+        return self._apply(text)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_memo']
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._memo = OrderedDict()
+        self._lock = Lock()
 
     def __repr__(self):
         return self._title
@@ -120,14 +216,36 @@ class File(Normalizer):
         if path is not None:
             file = os.path.join(path, file)
 
+        # the rules are only read and built again if the file changed
+        realpath = os.path.realpath(file)
+        self._files = {realpath: config.file_version(realpath)}
+        key = ('file', normalizer, realpath, encoding, title)
+        self._normalizer = config.cache.get(key)
+        if self._normalizer is not None:
+            return
+
+        normalizers = []
         with open(file, encoding=encoding) as f:
-            self._normalizer = NormalizationAggregate(title=title)
             for line in csv.reader(f):
                 try:
-                    self._normalizer.add(normalizer(*line))
+                    normalizers.append(normalizer(*line))
                 except TypeError as e:
                     raise ValueError("%s:%d %r(%r) %r" % (file, line.lineno, normalizer, line, e))
 
+        if hasattr(normalizer, 'aggregate'):
+            self._normalizer = normalizer.aggregate(normalizers, title)
+        else:
+            self._normalizer = NormalizerWithFileSupport.aggregate(normalizers, title)
+        config.cache.set(key, self._normalizer, self._files)
+
+    @property
+    def token_local(self):
+        return self._normalizer.token_local
+
+    @property
+    def line_local(self):
+        return self._normalizer.line_local
+
     def _normalize(self, text: str) -> str:
         return self._normalizer.normalize(text)
 
@@ -0,0 +1,614 @@
+"""
+Combining rules from large rule files into fewer passes over the text.
+
+Consecutive :py:class:`benchmarkstt.normalization.core.Regex` rules that provably
+don't interact are combined into a single alternation, applied in one pass with
+the replacement dispatched per matched alternative. The result is the same as
+applying the rules one after the other:
+
+- every rule matches at least one character, and only characters from a known
+  set (without anchors other than word boundaries, lookarounds or
+  backreferences, a match only depends on its surroundings by word boundaries),
+- the character sets of the rules in a batch are disjoint, so at any position
+  at most one of them can match,
+- a rule never outputs characters matched by a later rule of the same batch,
+  and always outputs at least one character (so it can't join the text around
+  it into a new match of a later rule),
+- if a later rule uses word boundaries, the rule only replaces word characters
+  by word characters, or other characters by other characters.
+
+Rules that only replace whole words (``\\bword\\b``) can be combined regardless
+of their character sets, as long as a rule doesn't output words replaced by a
+later rule of the same batch.
+
+Similarly, consecutive :py:class:`benchmarkstt.normalization.core.ReplaceWords`
+rules replacing single words are applied in a single pass, looking up each
+word in a table of replacements (including the case of the first letter).
+
+Set ``BENCHMARKSTT_VERIFY_BATCHING=1`` to also apply the rules one by one and
+compare the results (see :py:meth:`Optimized.verify`).
+"""
+
+from benchmarkstt import settings
+from benchmarkstt.normalization import Normalizer, NormalizationAggregate
+from benchmarkstt.normalization.logger import normalization_logger
+from string import ascii_letters
+import logging
+import re
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # pragma: no cover, python < 3.11
+    import sre_parse
+    import sre_constants
+
+logger = logging.getLogger(__name__)
+
+# ranges larger than this are considered to match anything
+MAX_RANGE = 4096
+
+_flag_letters = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'), (re.ASCII, 'a'))
+_default_flags = re.compile('').flags
+_leading_flags = re.compile(r'^(?:\(\?[aiLmsux]+\))+')
+_global_flags = re.compile(r'\(\?[aiLmsux]+\)')
+_template_token = re.compile(r'\\(?:g<([^>]*)>|([0-7]{3})|(0[0-7]{0,2})|([1-9][0-9]?)|(.))', re.DOTALL)
+_template_escapes = {'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v', '\\': '\\'}
+
+_categories = {
+    sre_constants.CATEGORY_DIGIT: 'digit',
+    sre_constants.CATEGORY_SPACE: 'space',
+    sre_constants.CATEGORY_WORD: 'word',
+}
+_category_patterns = {'digit': re.compile(r'\d'), 'space': re.compile(r'\s'), 'word': re.compile(r'\w')}
+_disjoint_categories = {('digit', 'space'), ('space', 'digit'), ('word', 'space'), ('space', 'word')}
+
+_case_variants = None
+
+
+class Unsupported(Exception):
+    """
+    Raised when a pattern can't be combined with other patterns
+    """
+
+
+def _case_closure(char):
+    """
+    All characters matching `char` case-insensitively (or more).
+    """
+    global _case_variants
+    if _case_variants is None:
+        # there are no cased characters beyond the supplementary multilingual plane
+        _case_variants = {}
+        for code in range(0x20000):
+            c = chr(code)
+            for variant in (c.lower(), c.upper()):
+                if variant != c:
+                    _case_variants.setdefault(variant, []).append(c)
+
+    result = set()
+    todo = [char]
+    while todo:
+        c = todo.pop()
+        if c in result:
+            continue
+        result.add(c)
+        todo.extend(v for v in (c.lower(), c.upper()) if len(v) == 1)
+        todo.extend(_case_variants.get(c, ()))
+    return result
+
+
+class CharSet:
+    """
+    (Superset of the) characters a pattern matches or a replacement outputs.
+
+    :param chars: Individual characters
+    :param categories: Character classes: 'digit', 'space' or 'word'
+    :param bool everything: Possibly any character
+    """
+
+    def __init__(self, chars=None, categories=None, everything=False):
+        self.chars = set() if chars is None else set(chars)
+        self.categories = set() if categories is None else set(categories)
+        self.everything = everything
+
+    def update(self, other):
+        self.chars.update(other.chars)
+        self.categories.update(other.categories)
+        self.everything = self.everything or other.everything
+
+    def isdisjoint(self, other):
+        if self.everything or other.everything:
+            return False
+        if not self.chars.isdisjoint(other.chars):
+            return False
+        for category in self.categories:
+            if any(_category_patterns[category].match(c) for c in other.chars):
+                return False
+            if any((category, o) not in _disjoint_categories for o in other.categories):
+                return False
+        for category in other.categories:
+            if any(_category_patterns[category].match(c) for c in self.chars):
+                return False
+        return True
+
+    def __repr__(self):
+        if self.everything:
+            return 'CharSet(everything)'
+        return 'CharSet(%r, %r)' % (''.join(sorted(self.chars)), sorted(self.categories))
+
+
+def _charset(items, flags, result, context):
+    """
+    Adds the characters matched by the parsed (sub)pattern `items` to `result`,
+    and 'word' to `context` if it depends on word boundaries.
+    """
+    def add_char(code):
+        if flags & re.IGNORECASE:
+            result.chars.update(_case_closure(chr(code)))
+        else:
+            result.chars.add(chr(code))
+
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            add_char(av)
+        elif op in (sre_constants.NOT_LITERAL, sre_constants.ANY):
+            result.everything = True
+        elif op == sre_constants.IN:
+            for in_op, in_av in av:
+                if in_op == sre_constants.LITERAL:
+                    add_char(in_av)
+                elif in_op == sre_constants.RANGE and in_av[1] - in_av[0] < MAX_RANGE:
+                    for code in range(in_av[0], in_av[1] + 1):
+                        add_char(code)
+                elif in_op == sre_constants.CATEGORY and in_av in _categories:
+                    result.categories.add(_categories[in_av])
+                else:
+                    # negations, large ranges, negated categories
+                    result.everything = True
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                _charset(branch, flags, result, context)
+        elif op == sre_constants.SUBPATTERN:
+            if len(av) == 4:
+                add_flags, del_flags = av[1:3]
+                if add_flags & (re.LOCALE | re.ASCII):
+                    raise Unsupported('locale or ascii dependent')
+                _charset(av[3], (flags | add_flags) & ~del_flags, result, context)
+            else:
+                _charset(av[1], flags, result, context)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) or \
+                op == getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+            _charset(av[2], flags, result, context)
+        elif op == getattr(sre_constants, 'ATOMIC_GROUP', None):
+            _charset(av, flags, result, context)
+        elif op == sre_constants.AT and av in (sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY):
+            if flags & re.ASCII:
+                raise Unsupported('ascii word boundary')
+            context.add('word')
+        else:
+            # other anchors, lookarounds, backreferences, conditionals
+            raise Unsupported(str(op))
+    return result
+
+
+_word = CharSet(categories=['word'])
+
+
+def _is_word(charset):
+    """
+    Whether all characters in `charset` are word characters
+    """
+    return not charset.everything and charset.categories <= {'word', 'digit'} and \
+        all(_category_patterns['word'].match(c) for c in charset.chars)
+
+
+def parse_template(template, pattern):
+    """
+    Parses a replacement template into a list of literal strings and group
+    numbers (of `pattern`)
+    """
+    tokens = []
+    literal = []
+    pos = 0
+    for match in _template_token.finditer(template):
+        literal.append(template[pos:match.start()])
+        pos = match.end()
+        name, octal, zero, number, char = match.groups()
+        if octal is not None or zero is not None:
+            literal.append(chr(int(octal or zero, 8)))
+            continue
+        if char is not None:
+            if char not in _template_escapes and char in ascii_letters:
+                raise Unsupported('bad escape %r' % (match.group(0),))
+            literal.append(_template_escapes.get(char, '\\' + char))
+            continue
+        if name is not None:
+            group = int(name) if name.isdigit() else pattern.groupindex.get(name)
+        else:
+            group = int(number)
+        if group is None or group > pattern.groups:
+            raise Unsupported('invalid group reference %r' % (match.group(0),))
+        if literal:
+            tokens.append(''.join(literal))
+            literal = []
+        tokens.append(group)
+    literal.append(template[pos:])
+    tokens.append(''.join(literal))
+    return [token for token in tokens if token != '']
+
+
+class Rule:
+    """
+    A search/replace rule analyzed for batching.
+
+    :param pattern: Compiled regular expression
+    :param replacement: Replacement template
+    """
+
+    def __init__(self, pattern, replacement):
+        self.pattern = pattern
+        self.tokens = parse_template(replacement, pattern)
+        flags = pattern.flags & ~_default_flags
+        letters = [letter for flag, letter in _flag_letters if flags & flag]
+        if flags & ~sum(flag for flag, _ in _flag_letters):
+            raise Unsupported('unsupported flags')
+
+        source = _leading_flags.sub('', pattern.pattern)
+        if _global_flags.search(source):
+            raise Unsupported('global flags not at the start')
+        if flags & re.VERBOSE:
+            # a trailing comment shouldn't swallow the closing parenthesis
+            source += '\n'
+        self.source = '(?%s:%s)' % (''.join(letters), source) if letters else source
+
+        parsed = sre_parse.parse(pattern.pattern)
+        if parsed.getwidth()[0] < 1:
+            raise Unsupported('may match the empty string')
+        self.context = set()
+        self.matches = _charset(parsed, pattern.flags, CharSet(), self.context)
+
+        # matches a whole word (a maximal run of word characters), and nothing else
+        boundary = (sre_constants.AT, sre_constants.AT_BOUNDARY)
+        self.whole_word = False
+        self.word = None
+        if len(parsed) > 2 and tuple(parsed[0]) == boundary and tuple(parsed[-1]) == boundary:
+            context = set()
+            self.whole_word = _is_word(_charset(parsed[1:-1], pattern.flags, CharSet(), context)) and not context
+            if self.whole_word and not flags & re.IGNORECASE and \
+                    all(op == sre_constants.LITERAL for op, _ in parsed[1:-1]):
+                self.word = ''.join(chr(av) for _, av in parsed[1:-1])
+
+        literals = ''.join(token for token in self.tokens if type(token) is str)
+        self.literal = literals if all(type(token) is str for token in self.tokens) else None
+        self.outputs = CharSet(literals)
+        if self.literal is None:
+            self.outputs.update(self.matches)
+        # output is never empty
+        self.nonempty = literals != ''
+
+        # word characters are only replaced by word characters, and others by others
+        changed = CharSet()
+        changed.update(self.matches)
+        changed.update(self.outputs)
+        self.preserves_words = _is_word(changed) or changed.isdisjoint(_word)
+
+    def conflicts(self, later):
+        """
+        Whether applying this rule can affect the matches of the (later) rule `later`
+        """
+        if self.whole_word and later.whole_word:
+            # both only replace whole words, this rule's replacement may contain words `later` replaces
+            if self.literal is not None:
+                return later.pattern.search(self.literal) is not None
+            return not self.outputs.isdisjoint(later.matches)
+
+        if later.context and not self.preserves_words:
+            return True
+
+        return not (self.nonempty and
+                    self.matches.isdisjoint(later.matches) and
+                    self.outputs.isdisjoint(later.matches))
+
+    def expand(self, match, offset):
+        return ''.join(token if type(token) is str else (match.group(offset + token) or '')
+                       for token in self.tokens)
+
+
+def trie_pattern(words):
+    """
+    A pattern matching any of `words`, as a trie so matching doesn't have to
+    try each word separately.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+    return _trie_source(trie)
+
+
+def _trie_source(node):
+    alternatives = [re.escape(char) + _trie_source(node[char]) for char in sorted(node) if char != '']
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1 and '' not in node:
+        return alternatives[0]
+    return '(?:%s)%s' % ('|'.join(alternatives), '?' if '' in node else '')
+
+
+class RegexBatch(Normalizer):
+    """
+    Applies a batch of non-interacting regex rules in a single pass.
+
+    Consecutive rules replacing a literal whole word are combined into a
+    single alternative matching any of these words.
+
+    :param list rules: The :py:class:`benchmarkstt.normalization.core.Regex` normalizers
+    :param list analyzed: Their :py:class:`Rule`
+    """
+
+    def __init__(self, rules, analyzed):
+        self._rules = rules
+        self._replacements = [None]
+        parts = []
+        words = {}
+
+        def add_words():
+            if words:
+                parts.append(r'(\b%s\b)' % (trie_pattern(words),))
+                self._replacements.append(dict(words))
+                words.clear()
+
+        for rule in analyzed:
+            if rule.word is not None:
+                # no groups, the replacement can only refer to the whole match
+                words.setdefault(rule.word, ''.join(token if type(token) is str else rule.word
+                                                    for token in rule.tokens))
+                continue
+            add_words()
+            parts.append('(%s)' % (rule.source,))
+            if rule.literal is not None:
+                replacement = rule.literal
+            else:
+                replacement = (rule, len(self._replacements))
+            self._replacements.append(replacement)
+            self._replacements.extend([None] * rule.pattern.groups)
+        add_words()
+        self._pattern = re.compile('|'.join(parts))
+
+    def _replace(self, match):
+        replacement = self._replacements[match.lastindex]
+        if type(replacement) is str:
+            return replacement
+        if type(replacement) is dict:
+            return replacement[match.group()]
+        rule, offset = replacement
+        return rule.expand(match, offset)
+
+    def _normalize(self, text: str) -> str:
+        if normalization_logger.active:
+            # keep the logs of each separate rule
+            for rule in self._rules:
+                text = rule.normalize(text)
+            return text
+        return self._pattern.sub(self._replace, text)
+
+    @property
+    def line_local(self):
+        return all(rule.line_local for rule in self._rules)
+
+    def __repr__(self):
+        return 'RegexBatch(%d)' % (len(self._rules),)
+
+
+def analyze(rule):
+    """
+    :return: the :py:class:`Rule` of a Regex normalizer, or None if it can't be batched
+    """
+    try:
+        return Rule(rule._pattern, rule._substitution)
+    except (Unsupported, re.error) as e:
+        logger.debug('Not batching %r: %s', rule._pattern.pattern, e)
+        return None
+
+
+def regex_batches(rules):
+    """
+    Groups consecutive regex rules that don't interact.
+
+    :param list rules: :py:class:`benchmarkstt.normalization.core.Regex` normalizers
+    :return: list of normalizers, a single rule or a :py:class:`RegexBatch`
+    """
+    result = []
+    batch = []
+    analyzed = []
+    names = set()
+    # literal replacements of whole words, separated by a non-word character
+    word_outputs = []
+
+    def flush():
+        if len(batch) == 1:
+            result.append(batch[0])
+        elif batch:
+            result.append(RegexBatch(list(batch), list(analyzed)))
+        del batch[:]
+        del analyzed[:]
+        del word_outputs[:]
+        names.clear()
+
+    def conflicts(info):
+        if not info.whole_word:
+            return any(earlier.conflicts(info) for earlier in analyzed)
+        # only search all outputs of earlier whole word rules at once
+        if info.pattern.search(' '.join(word_outputs)):
+            return True
+        return any(earlier.conflicts(info) for earlier in analyzed
+                   if not (earlier.whole_word and earlier.literal is not None))
+
+    for rule in rules:
+        info = analyze(rule)
+        if info is None:
+            flush()
+            result.append(rule)
+            continue
+
+        group_names = set(info.pattern.groupindex)
+        if not names.isdisjoint(group_names) or conflicts(info):
+            flush()
+        batch.append(rule)
+        analyzed.append(info)
+        names.update(group_names)
+        if info.whole_word and info.literal is not None:
+            word_outputs.append(info.literal)
+    flush()
+    return result
+
+
+_word_run = re.compile(r'(\w+)')
+
+
+def word_replacements(rule):
+    """
+    :return: dict of the words replaced by a
+        :py:class:`benchmarkstt.normalization.core.ReplaceWords` normalizer and
+        their replacements, or None if it doesn't replace single words
+    """
+    search = rule._search
+    if not _word_run.fullmatch(search):
+        return None
+
+    result = {}
+    for char in set(search[0].upper()) | set(search[0].lower()):
+        word = char + search[1:]
+        if not _word_run.fullmatch(word):
+            return None
+        result[word] = rule._replacement(char.isupper())
+    return result
+
+
+class WordBatch(Normalizer):
+    """
+    Applies a batch of single word replacements in a single pass, by looking
+    up each word.
+
+    :param list rules: The :py:class:`benchmarkstt.normalization.core.ReplaceWords` normalizers
+    :param dict replacements: The replacement of each word
+    """
+
+    token_local = True
+    line_local = True
+
+    def __init__(self, rules, replacements):
+        self._rules = rules
+        self._replacements = replacements
+
+    def _normalize(self, text: str) -> str:
+        if normalization_logger.active:
+            # keep the logs of each separate rule
+            for rule in self._rules:
+                text = rule.normalize(text)
+            return text
+
+        parts = _word_run.split(text)
+        words = parts[1::2]
+        parts[1::2] = map(self._replacements.get, words, words)
+        return ''.join(parts)
+
+    def __repr__(self):
+        return 'WordBatch(%d)' % (len(self._rules),)
+
+
+def word_batches(rules):
+    """
+    Groups consecutive word replacements, as long as a replacement doesn't
+    contain words replaced by a later rule of the same group.
+
+    :param list rules: :py:class:`benchmarkstt.normalization.core.ReplaceWords` normalizers
+    :return: list of normalizers, a single rule or a :py:class:`WordBatch`
+    """
+    result = []
+    batch = []
+    replacements = {}
+    # words in the replacements of the batch
+    outputs = set()
+
+    def flush():
+        if len(batch) == 1:
+            result.append(batch[0])
+        elif batch:
+            result.append(WordBatch(list(batch), dict(replacements)))
+        del batch[:]
+        replacements.clear()
+        outputs.clear()
+
+    for rule in rules:
+        words = word_replacements(rule)
+        if words is None:
+            flush()
+            result.append(rule)
+            continue
+
+        if not outputs.isdisjoint(words):
+            flush()
+        batch.append(rule)
+        for word, replacement in words.items():
+            # a word replaced before isn't seen by this rule
+            replacements.setdefault(word, replacement)
+            outputs.update(_word_run.findall(replacement))
+    flush()
+    return result
+
+
+class Optimized(NormalizationAggregate):
+    """
+    Applies `normalizers`, an optimized equivalent of applying `rules` one by one.
+
+    :param list rules: The original normalizers
+    :param list normalizers: The optimized normalizers
+    :param title:
+    :param bool verify: Also apply the original rules, and log a warning if
+        the results differ. Defaults to the ``BENCHMARKSTT_VERIFY_BATCHING``
+        environment variable.
+    """
+
+    def __init__(self, rules, normalizers, title=None, verify=None):
+        super().__init__(title)
+        self._rules = rules
+        for normalizer in normalizers:
+            self.add(normalizer)
+        self._verify = settings.verify_batching if verify is None else verify
+
+    def naive(self, text: str) -> str:
+        """
+        Applies the original rules one by one
+        """
+        for rule in self._rules:
+            text = rule.normalize(text)
+        return text
+
+    def verify(self, text: str) -> str:
+        """
+        :return: the differences between the original and optimized results
+            for `text`, an empty string if they're the same
+        """
+        return self._differences(self.naive(text), super()._normalize(text))
+
+    @staticmethod
+    def _differences(expected, result):
+        from benchmarkstt.diff.formatter import DiffFormatter
+
+        if result == expected:
+            return ''
+        return DiffFormatter('text').diff(expected, result)
+
+    def _normalize(self, text: str) -> str:
+        if not self._verify:
+            return super()._normalize(text)
+
+        expected = self.naive(text)
+        differences = self._differences(expected, super()._normalize(text))
+        if differences:
+            logger.warning('Optimized rules of %s differ from applying the rules one by one: %s',
+                           self._title, differences)
+        return expected
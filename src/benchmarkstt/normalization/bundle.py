@@ -0,0 +1,184 @@
+"""
+Compiled normalizer bundles: normalizers built from (many) config and rule
+files, stored in a single file that loads without parsing or analyzing any
+of the rules again.
+
+A bundle holds the normalizers it was compiled from (the recipe), the built
+normalizer and the content hashes of the files it was built from. If any of
+these files changed when loading the bundle, it's rebuilt from the recipe
+(and rewritten). Files that don't exist (e.g. when only the bundle was
+deployed) are not checked.
+
+Bundles are only used from the command line (``--bundle file``) and by
+normalizers preloaded by the api (``BENCHMARKSTT_PRELOAD_NORMALIZERS``), they
+are not available in the normalizer factory, so neither api calls nor config
+files can load them.
+
+.. warning:: Bundles are pickles, only load bundles from a trusted source.
+"""
+
+from benchmarkstt import config
+from benchmarkstt.normalization import factory, NormalizationAggregate, Normalizer
+from hashlib import sha256
+import inspect
+import logging
+import os
+import pickle
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+#: Version of the bundle format, bundles of another version are rebuilt
+VERSION = 1
+
+
+def _digest(path):
+    result = sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            result.update(block)
+    return result.hexdigest()
+
+
+def _absolute(name, args):
+    # file arguments are relative to the current directory, which may differ
+    # when the bundle is rebuilt
+    try:
+        arguments = inspect.signature(Bundle if name == 'bundle' else factory[name]).bind_partial(*args).arguments
+    except TypeError:
+        return list(args)
+    if type(arguments.get('file')) is str:
+        arguments['file'] = os.path.abspath(arguments['file'])
+    return list(arguments.values())
+
+
+def sources(normalizer):
+    """
+    :return: The (real paths of the) files `normalizer` was built from
+    """
+    result = set(getattr(normalizer, '_files', ()))
+    for child in getattr(normalizer, '_normalizers', ()):
+        result.update(sources(child))
+    return result
+
+
+def create(name, *args):
+    """
+    Creates normalizer `name` using the normalizer factory, or a
+    :py:class:`Bundle` if `name` is "bundle"
+    """
+    if name == 'bundle':
+        return Bundle(*args)
+    return factory.create(name, *args)
+
+
+def build(recipe):
+    """
+    :param recipe: List of normalizers, each a list of its name followed by
+        its arguments
+    :rtype: NormalizationAggregate
+    """
+    normalizer = NormalizationAggregate()
+    for item in recipe:
+        normalizer.add(create(*item))
+    return normalizer
+
+
+def _write(path, recipe, normalizer):
+    data = pickle.dumps(normalizer, pickle.HIGHEST_PROTOCOL)
+    bundle = dict(version=VERSION, recipe=recipe, hash=sha256(data).hexdigest(), normalizer=data,
+                  sources={source: _digest(source) for source in sorted(sources(normalizer))})
+
+    # write to a temporary file first, so a worker never loads a partial bundle
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(bundle, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def compile(recipe, path):
+    """
+    Builds the normalizers of `recipe` and writes them to bundle `path`
+
+    :param recipe: List of normalizers, each a list of its name followed by
+        its arguments
+    :param path: The bundle file
+    :rtype: NormalizationAggregate
+    """
+    recipe = [[item[0]] + _absolute(item[0], item[1:]) for item in recipe]
+    normalizer = build(recipe)
+    _write(path, recipe, normalizer)
+    return normalizer
+
+
+def load(path):
+    """
+    Loads bundle `path`, rebuilding it if one of its files changed
+
+    :rtype: NormalizationAggregate
+    """
+    with open(path, 'rb') as f:
+        bundle = pickle.load(f)
+
+    if type(bundle) is not dict or 'recipe' not in bundle:
+        raise ValueError("%s is not a normalizer bundle" % (path,))
+
+    if bundle.get('version') != VERSION:
+        logger.info('Rebuilding bundle %s, it was compiled with another version', path)
+    else:
+        changed = [source for source, digest in bundle['sources'].items()
+                   if os.path.exists(source) and _digest(source) != digest]
+        if not changed:
+            if sha256(bundle['normalizer']).hexdigest() != bundle['hash']:
+                raise ValueError("Bundle %s is corrupt" % (path,))
+            return pickle.loads(bundle['normalizer'])
+        logger.info('Rebuilding bundle %s, changed: %s', path, ', '.join(changed))
+
+    normalizer = build(bundle['recipe'])
+    try:
+        _write(path, bundle['recipe'], normalizer)
+    except OSError as e:
+        logger.warning("Couldn't rewrite bundle %s: %s", path, e)
+    return normalizer
+
+
+class Bundle(Normalizer):
+    """
+    Use normalizers compiled to a bundle file, using
+    ``benchmarkstt-tools normalization [normalizers] --compile file``.
+    The bundle is rebuilt if one of the files it was compiled from changed.
+
+    Bundles are pickles, only load bundles from a trusted source.
+
+    :param file: The bundle file
+    """
+
+    def __init__(self, file):
+        realpath = os.path.realpath(file)
+        self._files = {realpath: config.file_version(realpath)}
+        key = ('bundle', realpath)
+        cached = config.cache.get(key)
+        if cached is not None:
+            self._normalizer, self._files = cached
+            return
+
+        self._normalizer = load(realpath)
+        for source in sources(self._normalizer):
+            if os.path.exists(source):
+                self._files[source] = config.file_version(source)
+        config.cache.set(key, (self._normalizer, self._files), self._files)
+
+    @property
+    def token_local(self):
+        return self._normalizer.token_local
+
+    @property
+    def line_local(self):
+        return self._normalizer.line_local
+
+    def _normalize(self, text: str) -> str:
+        return self._normalizer.normalize(text)
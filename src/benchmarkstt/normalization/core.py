@@ -5,7 +5,6 @@ Some basic/simple normalization classes
 
 import re
 import os
-from unidecode import unidecode
 from benchmarkstt import normalization
 from benchmarkstt import config, settings
 from contextlib import contextmanager
@@ -35,6 +34,14 @@ class Replace(normalization.NormalizerWithFileSupport):
         self._search = search
         self._replace = replace
 
+    @property
+    def token_local(self):
+        return self._search != '' and not any(c.isspace() for c in self._search)
+
+    @property
+    def line_local(self):
+        return self._search != '' and '\n' not in self._search
+
     def _normalize(self, text: str) -> str:
         return text.replace(self._search, self._replace)
 
@@ -64,17 +71,32 @@ class ReplaceWords(normalization.NormalizerWithFileSupport):
         ]))
         regex = r'(?<!\w)[%s%s]%s(?!\w)' % args
         self._pattern = re.compile(regex)
+        self._search = search
         self._replace = replace
+        self.token_local = not any(c.isspace() for c in search)
+        self.line_local = '\n' not in search
 
-    def _replacement_callback(self, matches):
+    def _replacement(self, upper):
         if len(self._replace) == 0:
             return ''
 
-        if matches.group(0)[0].isupper():
+        if upper:
             return ''.join([self._replace[0].upper(), self._replace[1:]])
 
         return ''.join([self._replace[0].lower(), self._replace[1:]])
 
+    def _replacement_callback(self, matches):
+        return self._replacement(matches.group(0)[0].isupper())
+
+    @classmethod
+    def aggregate(cls, normalizers, title=None):
+        """
+        Replacements of single words are applied in a single pass, see
+        :py:mod:`benchmarkstt.normalization.batching`
+        """
+        from benchmarkstt.normalization.batching import Optimized, word_batches
+        return Optimized(normalizers, word_batches(normalizers), title)
+
     def _normalize(self, text: str) -> str:
         return self._pattern.sub(self._replacement_callback, text)
 
@@ -118,6 +140,28 @@ class Regex(normalization.NormalizerWithFileSupport):
     def __init__(self, search: str, replace: str):
         self._pattern = re.compile(search)
         self._substitution = replace
+        self._line_local = None
+
+    @property
+    def line_local(self):
+        """
+        Only if the pattern never matches a line break, nor an empty string,
+        and doesn't depend on its surroundings (other than word boundaries)
+        """
+        if self._line_local is None:
+            from benchmarkstt.normalization.batching import CharSet, analyze
+            rule = analyze(self)
+            self._line_local = rule is not None and rule.matches.isdisjoint(CharSet('\n'))
+        return self._line_local
+
+    @classmethod
+    def aggregate(cls, normalizers, title=None):
+        """
+        Rules that don't interact are applied in a single pass, see
+        :py:mod:`benchmarkstt.normalization.batching`
+        """
+        from benchmarkstt.normalization.batching import Optimized, regex_batches
+        return Optimized(normalizers, regex_batches(normalizers), title)
 
     def _normalize(self, text: str) -> str:
         return self._pattern.sub(self._substitution, text)
@@ -132,10 +176,47 @@ class Lowercase(normalization.Normalizer):
     :example return: "easy, mungo, easy... mungo..."
     """
 
+    token_local = True
+    line_local = True
+
     def _normalize(self, text: str) -> str:
         return text.lower()
 
 
+def _isascii(text):
+    try:
+        return text.isascii()
+    except AttributeError:  # python < 3.7
+        try:
+            text.encode('ascii')
+        except UnicodeEncodeError:
+            return False
+        return True
+
+
+class _Transliterations(dict):
+    """
+    Translation table (for str.translate) of characters to their unidecoded
+    form, characters not yet in the table are unidecoded when encountered.
+    """
+
+    # latin-1 supplement up to latin extended-b, general punctuation
+    common = (range(0x80, 0x250), range(0x2000, 0x2070))
+
+    def __init__(self):
+        from unidecode import unidecode
+        super().__init__()
+        for block in self.common:
+            for code in block:
+                self[code] = unidecode(chr(code))
+
+    def __missing__(self, code):
+        from unidecode import unidecode
+        # unidecode transliterates each character on its own
+        self[code] = result = unidecode(chr(code))
+        return result
+
+
 class Unidecode(normalization.Normalizer):
     """
     Unidecode characters to ASCII form, see `Python's Unidecode package
@@ -145,8 +226,17 @@ class Unidecode(normalization.Normalizer):
     :example return: "Wenn ist das Nunstuck git und Slotermeyer?"
     """
 
+    token_local = True
+    line_local = True
+    _transliterations = None
+
     def _normalize(self, text: str) -> str:
-        return unidecode(text)
+        if _isascii(text):
+            return text
+
+        if Unidecode._transliterations is None:
+            Unidecode._transliterations = _Transliterations()
+        return text.translate(Unidecode._transliterations)
 
 
 class ConfigSectionNotFoundError(ValueError):
@@ -217,13 +307,23 @@ class Config(normalization.Normalizer):
         elif section is self.MAIN_SECTION:
             section = None
 
+        self._files = {}
+        key = None
         if type(file) in file_types:
             # next filenames are relative from path of the config file...
-            path = os.path.dirname(os.path.realpath(file))
+            realpath = os.path.realpath(file)
+            path = os.path.dirname(realpath)
             title = file
 
-            with open(file, encoding=encoding) as f:
-                reader = config.reader(f)
+            # the normalizers are only built again if one of the files changed
+            key = ('config', realpath, encoding, section, title)
+            cached = config.cache.get(key)
+            if cached is not None:
+                self._normalizer, self._files = cached
+                return
+
+            self._files[realpath] = config.file_version(realpath)
+            reader = config.read(realpath, encoding)
         else:
             path = None
             title = ''
@@ -248,6 +348,18 @@ class Config(normalization.Normalizer):
             except ImportError:
                 raise ValueError("Unknown normalizer %s on line %d: %s" %
                                  (repr(line[0]), line.lineno, repr(' '.join(line))))
+            self._files.update(getattr(normalizer, '_files', {}))
+
+        if key is not None:
+            config.cache.set(key, (self._normalizer, self._files), self._files)
+
+    @property
+    def token_local(self):
+        return self._normalizer.token_local
+
+    @property
+    def line_local(self):
+        return self._normalizer.line_local
 
     def _normalize(self, text: str) -> str:
         return self._normalizer.normalize(text)
@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 from benchmarkstt.diff.formatter import DiffFormatter
 from collections import namedtuple
 from collections import OrderedDict
@@ -9,11 +10,49 @@ NormalizedLogItem = namedtuple('NormalizedLogItem', ['stack', 'original', 'norma
 
 class Logger:
     def __init__(self):
-        self.title = None
+        self._local = threading.local()
         self.logger = logging.getLogger('benchmarkstt.normalize')
         self.logger.setLevel(logging.INFO)
         self.logger.propagate = False
-        self.stack = []
+        self._handlers = []
+
+    @property
+    def stack(self):
+        """
+        The normalizers currently normalizing (per thread)
+        """
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    @property
+    def title(self):
+        """
+        Title of the text currently being normalized (per thread)
+        """
+        return getattr(self._local, 'title', None)
+
+    @title.setter
+    def title(self, title):
+        self._local.title = title
+
+    def add_handler(self, handler):
+        self._handlers.append(handler)
+        self.logger.addHandler(handler)
+
+    def remove_handler(self, handler):
+        self._handlers.remove(handler)
+        self.logger.removeHandler(handler)
+
+    @property
+    def active(self):
+        """
+        Whether normalization logs are being handled (by handlers added
+        with :py:meth:`add_handler`)
+        """
+        return bool(self._handlers)
 
 
 normalization_logger = Logger()
@@ -57,6 +96,8 @@ class DiffLoggingTextFormatterDialect(DiffLoggingFormatterDialect):
 
 class DiffLoggingDictFormatterDialect(DiffLoggingFormatterDialect):
     def format(self, title, stack, diff):
+        if title is None:
+            title = normalization_logger.title
         return OrderedDict(title=title, stack=stack, diff=diff)
 
 
@@ -109,15 +150,14 @@ def log(func):
     """
 
     def _(cls, text):
-        normalization_logger.stack.append(repr(cls))
-
-        result = func(cls, text)
-        logger_ = normalization_logger.logger
-
-        if text != result:
-            logger_.info(NormalizedLogItem(list(normalization_logger.stack), text, result))
-
-        normalization_logger.stack.pop()
+        stack = normalization_logger.stack
+        stack.append(repr(cls))
+        try:
+            result = func(cls, text)
+            if text != result:
+                normalization_logger.logger.info(NormalizedLogItem(list(stack), text, result))
+        finally:
+            stack.pop()
         return result
     return _
 
@@ -130,7 +170,7 @@ class LogCapturer:
     def __enter__(self):
         self.handler = ListHandler()
         self.handler.setFormatter(DiffLoggingFormatter(*self.formatter_args[0], **self.formatter_args[1]))
-        normalization_logger.logger.addHandler(self.handler)
+        normalization_logger.add_handler(self.handler)
         return self
 
     @property
@@ -139,5 +179,5 @@ class LogCapturer:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.handler.flush()
-        normalization_logger.logger.removeHandler(self.handler)
+        normalization_logger.remove_handler(self.handler)
         self.handler = None
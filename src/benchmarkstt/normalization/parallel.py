@@ -0,0 +1,110 @@
+"""
+Normalizing in parallel, using a pool of processes.
+
+A large text is split in chunks of lines that are normalized separately. This
+is only possible for normalizers that are line local (see
+:py:attr:`benchmarkstt.normalization.Normalizer.line_local`), the result is
+then the same as normalizing the whole text at once.
+
+Many files are each normalized as a whole by one of the processes, only the
+files being processed are open at any time.
+"""
+
+from multiprocessing import Pool
+import os
+import tempfile
+
+_normalizer = None
+
+
+def _init(normalizer):
+    global _normalizer
+    _normalizer = normalizer
+
+
+def _normalize(chunk):
+    return _normalizer.normalize(chunk)
+
+
+def _normalize_file(args):
+    input_file, output_file, encoding = args
+    normalize_file(_normalizer, input_file, output_file, encoding)
+    return output_file
+
+
+def _umask():
+    # the umask can only be read by setting it
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_atomic(path, parts, encoding=None):
+    """
+    Writes the strings in `parts` to a temporary file that is then renamed to
+    `path`, so an interrupted run never leaves a partially written file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        # mkstemp only allows the owner access, use the permissions open() would
+        os.chmod(tmp, 0o666 & ~_umask())
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.writelines(parts)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def normalize_file(normalizer, input_file, output_file, encoding=None):
+    with open(input_file, encoding=encoding) as f:
+        text = f.read()
+    write_atomic(output_file, (normalizer.normalize(text),), encoding)
+
+
+def chunks(text, size):
+    """
+    Splits `text` in chunks of at least `size` characters (unless it's the
+    last chunk), each ending with a line break.
+    """
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start + size - 1)
+        end = len(text) if end == -1 else end + 1
+        yield text[start:end]
+        start = end
+
+
+def normalize(normalizer, text, jobs=None, chunk_size=1 << 20):
+    """
+    Normalizes `text` using `jobs` processes (defaults to the number of CPUs).
+
+    :param normalizer: A line local normalizer
+    :param str text:
+    :param int jobs: Number of processes
+    :param int chunk_size: Minimum number of characters to normalize at once
+    :return: Iterator of the normalized chunks, in order
+    """
+    if not normalizer.line_local:
+        raise ValueError("Normalizer %r is not line local, it can't be applied in parallel" % (normalizer,))
+
+    with Pool(jobs, _init, (normalizer,)) as pool:
+        for result in pool.imap(_normalize, chunks(text, chunk_size)):
+            yield result
+
+
+def normalize_files(normalizer, files, jobs=None, encoding=None):
+    """
+    Normalizes each input file to its output file using `jobs` processes
+    (defaults to the number of CPUs).
+
+    :param normalizer:
+    :param files: Iterable of (input file, output file) tuples
+    :param int jobs: Number of processes
+    :param str encoding:
+    :return: Iterator of the output files, in the order they're written
+    """
+    with Pool(jobs, _init, (normalizer,)) as pool:
+        tasks = ((input_file, output_file, encoding) for input_file, output_file in files)
+        for output_file in pool.imap_unordered(_normalize_file, tasks):
+            yield output_file
@@ -0,0 +1,75 @@
+"""
+Normalizing a stream of text while it's being read, e.g. as a filter in a
+pipeline.
+
+The stream is read in blocks of complete lines, as soon as they're available.
+This is only possible for normalizers that are line local (see
+:py:attr:`benchmarkstt.normalization.Normalizer.line_local`), the result is
+then the same as normalizing the whole stream at once.
+"""
+
+import codecs
+import io
+
+
+def _reader(file, size):
+    # the returned function returns None at the end of the file, the decoded
+    # text of a read can be empty before that (e.g. a partial character)
+    buffer = getattr(file, 'buffer', None)
+    if buffer is None or not hasattr(buffer, 'read1'):
+        return lambda: file.read(size) or None
+
+    # decode the bytes that are available, the same way file.read() would
+    decoder = codecs.getincrementaldecoder(file.encoding)(file.errors)
+    decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+
+    def read():
+        data = buffer.read1(size)
+        if not data:
+            text = decoder.decode(b'', final=True)
+            return text or None
+        return decoder.decode(data)
+    return read
+
+
+def line_blocks(file, size=1 << 16):
+    """
+    Reads text `file` in blocks of complete lines, without waiting for more
+    than is available. Only a line longer than `size` is read in more than one
+    call.
+
+    :param file: Text file (e.g. sys.stdin)
+    :param int size: Maximum number of bytes to read at once
+    :return: Iterator of the blocks, each ending with a line break, except
+        (possibly) the last one
+    """
+    read = _reader(file, size)
+    rest = ''
+    while True:
+        text = read()
+        if text is None:
+            break
+        end = text.rfind('\n') + 1
+        if end == 0:
+            rest += text
+            continue
+        yield rest + text[:end]
+        rest = text[end:]
+    if rest:
+        yield rest
+
+
+def normalize(normalizer, file, size=1 << 16):
+    """
+    Normalizes text `file` while reading it.
+
+    :param normalizer: A line local normalizer
+    :param file: Text file (e.g. sys.stdin)
+    :param int size: Maximum number of bytes to read at once
+    :return: Iterator of the normalized blocks
+    """
+    if not normalizer.line_local:
+        raise ValueError("Normalizer %r is not line local, it can't be applied to a stream" % (normalizer,))
+
+    for block in line_blocks(file, size):
+        yield normalizer.normalize(block)
@@ -4,6 +4,7 @@ Responsible for dealing with output formats
 """
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from collections.abc import Iterator
 from benchmarkstt.factory import CoreFactory
 
 
@@ -33,6 +34,8 @@ class SimpleTextBase(Output):
     def print(result):
         if hasattr(result, '_asdict'):
             result = result._asdict()
+        elif isinstance(result, Iterator):
+            result = list(result)
 
         if type(result) is float:
             print("%.6f" % (result,))
@@ -0,0 +1,104 @@
+"""
+Helpers for binary, columnar output formats.
+
+All results are represented as one long table with the columns:
+
+- title: name of the metric
+- key: for metrics with multiple values (e.g. diffcounts), the name of the value
+- value: numeric value of the metric
+- type, reference, hypothesis: per-word alignment (results of the 'list' or 'iter' diff dialects)
+
+Columns that don't apply to a row are empty (null, NaN or '').
+"""
+
+from array import array
+from collections.abc import Mapping
+from itertools import islice
+from numbers import Number
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+columns = ('title', 'key', 'value', 'type', 'reference', 'hypothesis')
+
+
+def _flatten(mapping, prefix=''):
+    for k, v in mapping.items():
+        k = '%s%s' % (prefix, k)
+        if hasattr(v, '_asdict'):
+            v = v._asdict()
+        if isinstance(v, Mapping):
+            yield from _flatten(v, k + '.')
+        else:
+            yield k, v
+
+
+def rows(title, result):
+    """
+    Converts a result to rows of the long table.
+
+    :return: Generator of tuples, with a value for each of the columns
+    """
+    if hasattr(result, '_asdict'):
+        result = result._asdict()
+
+    if isinstance(result, Number) and not isinstance(result, bool):
+        yield title, None, float(result), None, None, None
+    elif isinstance(result, Mapping):
+        for key, value in _flatten(result):
+            if not isinstance(value, Number) or isinstance(value, bool):
+                logger.warning('Skipped non-numeric value for %s: %s = %r', title, key, value)
+                continue
+            yield title, key, float(value), None, None, None
+    elif isinstance(result, str) or not hasattr(result, '__iter__'):
+        logger.warning("Result for %s can't be represented as a table, for diffs use dialect 'list' or 'iter'",
+                       title)
+    else:
+        for item in result:
+            yield title, None, None, item['type'], item['reference'], item['hypothesis']
+
+
+def batches(title, result, batch_size=None):
+    """
+    Converts a result to columns, in batches of at most `batch_size` rows.
+
+    :return: Generator of lists of columns
+    """
+    items = rows(title, result)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield [list(column) for column in zip(*batch)]
+        if batch_size is None:
+            return
+
+
+def _npy_header(descr, length):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (descr, length)
+    # magic string, version, header length, header (terminated by a newline), aligned to 64 bytes
+    padding = 63 - (10 + len(header)) % 64
+    header = header + ' ' * padding + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+
+def npy_float64(values):
+    """
+    Encodes a column of numbers as a NumPy .npy float64 array, None as NaN
+    """
+    nan = float('nan')
+    data = array('d', (nan if value is None else value for value in values))
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return _npy_header('<f8', len(data)) + data.tobytes()
+
+
+def npy_unicode(values):
+    """
+    Encodes a column of strings as a NumPy .npy fixed width unicode array, None as ''
+    """
+    values = ['' if value is None else value for value in values]
+    width = max(map(len, values), default=0) or 1
+    data = ''.join(value.ljust(width, '\0') for value in values).encode('utf-32-le')
+    return _npy_header('<U%d' % (width,), len(values)) + data
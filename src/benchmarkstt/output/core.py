@@ -1,5 +1,8 @@
-from collections import OrderedDict
+from collections.abc import Iterator
+import sys
+import zipfile
 from benchmarkstt import output
+from benchmarkstt.output import columnar
 from benchmarkstt.schema import Schema
 from benchmarkstt.output import SimpleTextBase
 
@@ -21,28 +24,207 @@ class MarkDown(SimpleTextBase):
         print()
 
 
+class BufferedWriter:
+    """
+    Collects written text and only passes it on to the stream once
+    `buffer_size` characters have been collected, or when flushed.
+    """
+
+    def __init__(self, stream=None, buffer_size=None):
+        self._stream = sys.stdout if stream is None else stream
+        self._buffer_size = buffer_size
+        self._buffer = []
+        self._length = 0
+
+    def write(self, txt):
+        self._buffer.append(txt)
+        self._length += len(txt)
+        if self._buffer_size is not None and self._length >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._stream.write(''.join(self._buffer))
+            self._buffer = []
+            self._length = 0
+        self._stream.flush()
+
+
+def encode(result):
+    """
+    Encodes `result` as JSON, iterators (e.g. results of the 'iter' diff
+    dialect) are encoded lazily as an array, one item at a time.
+
+    :return: Generator of JSON encoded parts
+    """
+    if isinstance(result, tuple) and hasattr(result, '_asdict'):
+        result = result._asdict()
+
+    if not isinstance(result, Iterator):
+        yield Schema.dumps(result)
+        return
+
+    yield '['
+    separator = ''
+    for item in result:
+        yield separator
+        yield Schema.dumps(item)
+        separator = ', '
+    yield ']'
+
+
 class Json(output.Output):
-    def __init__(self):
+    """
+    :param buffer_size: Number of characters to collect before writing them
+        to stdout
+    """
+
+    diff_dialect = 'iter'
+
+    def __init__(self, buffer_size=1 << 16):
+        self._buffer_size = buffer_size
         self._line = None
+        self._writer = None
 
     def __enter__(self):
         if self._line is not None:
             raise ValueError("Already open")
-        print('[')
+        self._writer = BufferedWriter(buffer_size=self._buffer_size)
+        self._writer.write('[\n')
         self._line = 0
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._line = None
-        print('\n]')
+        self._writer.write('\n]\n')
+        self._writer.flush()
 
     def result(self, title, result):
+        write = self._writer.write
         if self._line != 0:
-            print(',')
+            write(',\n')
         self._line += 1
-        print('\t', end='')
 
-        if isinstance(result, tuple) and hasattr(result, '_asdict'):
-            result = result._asdict()
+        write('\t{"title": %s, "result": ' % (Schema.dumps(title),))
+        for part in encode(result):
+            write(part)
+        write('}')
+        self._writer.flush()
+
+
+class JsonLines(output.Output):
+    """
+    JSON Lines (https://jsonlines.org), every result is written (and flushed)
+    as a separate line, so it can be consumed before all results are known.
+
+    :param buffer_size: Number of characters to collect before writing them
+        to stdout
+    """
+
+    diff_dialect = 'iter'
+
+    def __init__(self, buffer_size=1 << 16):
+        self._buffer_size = buffer_size
+        self._writer = None
+
+    def __enter__(self):
+        if self._writer is not None:
+            raise ValueError("Already open")
+        self._writer = BufferedWriter(buffer_size=self._buffer_size)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._writer.flush()
+        self._writer = None
+
+    def result(self, title, result):
+        write = self._writer.write
+        write('{"title": %s, "result": ' % (Schema.dumps(title),))
+        for part in encode(result):
+            write(part)
+        write('}\n')
+        self._writer.flush()
+
+
+def _binary_stdout():
+    if not hasattr(sys.stdout, 'buffer'):
+        raise ValueError("Binary output formats need to write to a binary stdout")
+    return sys.stdout.buffer
+
+
+class Npz(output.Output):
+    """
+    NumPy .npz archive (uncompressed), containing an array for each column
+    (see :py:mod:`benchmarkstt.output.columnar`). Doesn't need NumPy to be
+    installed.
+
+    Load using ``numpy.load(file)``.
+    """
+
+    diff_dialect = 'iter'
+
+    def __init__(self):
+        self._columns = None
+
+    def __enter__(self):
+        if self._columns is not None:
+            raise ValueError("Already open")
+        self._columns = [[] for _ in columnar.columns]
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        cols, self._columns = self._columns, None
+        if exc_type is not None:
+            return
+
+        # zipfile supports non-seekable streams (e.g. a pipe)
+        with zipfile.ZipFile(_binary_stdout(), 'w', zipfile.ZIP_STORED) as archive:
+            for name, values in zip(columnar.columns, cols):
+                encode = columnar.npy_float64 if name == 'value' else columnar.npy_unicode
+                archive.writestr('%s.npy' % (name,), encode(values))
+
+    def result(self, title, result):
+        for batch in columnar.batches(title, result):
+            for column, values in zip(self._columns, batch):
+                column.extend(values)
+
+
+class Arrow(output.Output):
+    """
+    Apache Arrow IPC stream (see :py:mod:`benchmarkstt.output.columnar` for
+    the columns). Requires pyarrow (``pip install benchmarkstt[arrow]``).
+
+    Load using e.g. ``pyarrow.ipc.open_stream(file).read_all()``.
+
+    :param batch_size: Maximum number of rows per record batch
+    """
+
+    diff_dialect = 'iter'
+
+    def __init__(self, batch_size=1 << 16):
+        self._batch_size = batch_size
+        self._writer = None
+
+    def __enter__(self):
+        if self._writer is not None:
+            raise ValueError("Already open")
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Output format 'arrow' requires pyarrow: pip install benchmarkstt[arrow]") from e
+
+        self._schema = pa.schema([(name, pa.float64() if name == 'value' else pa.string())
+                                  for name in columnar.columns])
+        self._writer = pa.ipc.new_stream(_binary_stdout(), self._schema)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._writer.close()
+        self._writer = None
+
+    def result(self, title, result):
+        import pyarrow as pa
 
-        print(Schema.dumps(OrderedDict((('title', title), ('result', result)))), end='')
+        for batch in columnar.batches(title, result, self._batch_size):
+            arrays = [pa.array(values, type=field.type) for field, values in zip(self._schema, batch)]
+            self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
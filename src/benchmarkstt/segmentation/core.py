@@ -12,16 +12,27 @@ class Simple(Segmenter):
     Simplest case, split into words by white space
     """
 
+    #: Number of characters at the end of a chunk (without word breaks) searched
+    #: again for a word break that continues in the next chunk
+    overlap = 64
+
     def __init__(self, text: str, pattern=r'[\n\t\s]+', normalizer=None):
         self._text = text
         self._re = re.compile('(%s)' % (pattern,))
         self._normalizer = normalizer
         if self._normalizer is not None:
+            if type(text) is not str:
+                text = ''.join(text)
             self._text = self._normalizer.normalize(text)
 
     def __iter__(self):
-        start_match = self._re.match(self._text)
-        iterable = self._re.split(self._text)
+        if type(self._text) is str:
+            return self._segment(self._text)
+        return self._segment_chunks(self._text)
+
+    def _segment(self, text):
+        start_match = self._re.match(text)
+        iterable = self._re.split(text)
         if iterable[0] == '':
             iterable.pop(0)
 
@@ -39,3 +50,49 @@ class Simple(Segmenter):
             if raw != '':
                 yield Item({"item": iterable[pos], "type": "word", "@raw": raw})
             pos += 2
+
+    def _segment_chunks(self, chunks):
+        """
+        Segments text that is given as an iterable of chunks, without ever
+        joining the complete text.
+
+        Only the part up to the last complete word break is segmented (split
+        once), the trailing word (and the word break following it) may still
+        continue in the next chunk and is carried over. Word breaks are only
+        searched for in the new chunk (and the end of the carried text, where
+        a word break may continue), so long stretches without any word break
+        aren't searched again for every chunk.
+        """
+        text = ''
+        # the last (at most) two word breaks found in text, as (start, end)
+        found = []
+        for chunk in chunks:
+            if found:
+                # the last word break may continue in this chunk
+                scan = found.pop()[0]
+            else:
+                scan = max(0, len(text) - self.overlap)
+            text += chunk
+            for match in self._re.finditer(text, scan):
+                found = found[-1:] + [match.span()]
+
+            if not found:
+                continue
+            if found[-1][1] < len(text):
+                start, cut = found[-1]
+            elif len(found) > 1:
+                # the text ends in a word break, it may continue, as may the word before it
+                start, cut = found[-2]
+            else:
+                continue
+
+            # a leading word break always belongs to the first word
+            if start == 0:
+                continue
+
+            yield from self._segment(text[:cut])
+            text = text[cut:]
+            found = [(start - cut, end - cut) for start, end in found if start >= cut]
+
+        if text != '':
+            yield from self._segment(text)
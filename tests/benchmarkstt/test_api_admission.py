@@ -0,0 +1,102 @@
+from benchmarkstt.api.admission import Admission, TokenBucket, cost
+from benchmarkstt.api.jsonrpc import get_methods
+from benchmarkstt.cli.entrypoints.api import create_app
+from unittest import mock
+import json
+import pytest
+
+
+def error(excinfo):
+    return json.loads(str(excinfo.value))
+
+
+def test_cost():
+    assert cost('metrics.cer', dict(ref='abc d', hyp='ab')) == 10
+    assert cost('benchmark.cer', dict(ref='abc d', hyp='ab')) == 10
+    assert cost('metrics.wer', dict(ref='a b c', hyp='a b')) == 6
+    assert cost('metrics.beer', dict(ref='a b c', hyp='a b')) == 5
+    assert cost('metrics.external', dict(ref='a b c', hyp='a b')) == 6
+    assert cost('normalization.lowercase', dict(text='abc')) == 3
+    assert cost('resources.register', dict(kind='entities', content='{}')) == 2
+    assert cost('jobs.submit', dict(method='metrics.cer', params=dict(ref='ab', hyp='ab'))) == 4
+    assert cost('jobs.submit', dict(method='metrics.cer')) == 0
+    assert cost('version', {}) == 0
+    assert cost('metrics.cer', dict(ref=None, hyp='ab')) == 0
+
+
+def test_check():
+    admission = Admission(max_cost=10, max_job_cost=100)
+    assert admission.check('metrics.cer', dict(ref='abc d', hyp='ab')) == 10
+
+    with pytest.raises(AssertionError) as excinfo:
+        admission.check('metrics.cer', dict(ref='abc d', hyp='abc'))
+    assert error(excinfo) == {
+        "message": "Request too expensive: estimated cost 15, at most 10 allowed, use jobs.submit",
+        "cost": 15,
+        "max_cost": 10,
+    }
+
+    assert admission.check('jobs.submit', dict(method='metrics.cer', params=dict(ref='abc d', hyp='abc'))) == 15
+    with pytest.raises(AssertionError) as excinfo:
+        admission.check('jobs.submit', dict(method='metrics.cer', params=dict(ref='a' * 11, hyp='a' * 10)))
+    assert error(excinfo)['field'] == 'params'
+
+    with pytest.raises(AssertionError) as excinfo:
+        admission.check('metrics.cer', dict(ref='a' * 11, hyp='a' * 10))
+    assert 'jobs.submit' not in error(excinfo)['message']
+
+    assert Admission().check('metrics.cer', dict(ref='a' * 11, hyp='a' * 10)) == 110
+
+
+def test_methods():
+    methods = get_methods(Admission(max_cost=10))
+    assert methods.items['metrics.cer'](ref='abc', hyp='abc') == 0
+    # positional arguments
+    assert methods.items['metrics.cer']('abc', 'abc') == 0
+    with pytest.raises(AssertionError):
+        methods.items['metrics.cer'](ref='abcd', hyp='abcd')
+
+    docs = methods.items['help']()
+    assert 'Cost: quadratic in the number of characters (characters of ref * characters of hyp), at most 10' \
+        in docs['metrics.cer']
+    assert 'Cost: linear in the number of words, at most 10' in docs['metrics.beer']
+    assert 'Cost' not in docs['version']
+    assert methods.items['limits']()['max_cost'] == 10
+
+    methods = get_methods(Admission())
+    assert methods.items['metrics.cer'](ref='abcd', hyp='abcd') == 0
+    assert 'Cost' not in methods.items['help']()['metrics.cer']
+
+
+def test_token_bucket():
+    with mock.patch('time.monotonic', return_value=0):
+        bucket = TokenBucket(2, 3)
+        assert [bucket.take() for _ in range(4)] == [0, 0, 0, .5]
+    with mock.patch('time.monotonic', return_value=.25):
+        assert bucket.take() == .25
+    with mock.patch('time.monotonic', return_value=10):
+        assert [bucket.take() for _ in range(4)] == [0, 0, 0, .5]
+
+
+def test_allow():
+    admission = Admission(rate=1, burst=2, max_clients=2)
+    assert [admission.allow('a') for _ in range(2)] == [0, 0]
+    assert admission.allow('a') > 0
+    assert admission.allow('b') == 0
+    # the least recently seen client is forgotten
+    admission.allow('c')
+    assert admission.allow('a') == 0
+
+    assert Admission().allow('a') == 0
+    assert Admission.retry_after(.1) == '1'
+    assert Admission.retry_after(2.5) == '3'
+
+
+def test_rate_limited_app():
+    with mock.patch('benchmarkstt.api.admission.admission', Admission(rate=.001, burst=1)):
+        client = create_app().test_client()
+        request = dict(jsonrpc='2.0', method='version', id=1)
+        assert client.post('/api', json=request).status_code == 200
+        response = client.post('/api', json=request)
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) > 900
@@ -0,0 +1,112 @@
+from benchmarkstt.api import compression
+from io import BytesIO
+from unittest import mock
+import gzip
+import json
+import pytest
+import sys
+
+zstandard = compression._zstandard()
+only_gzip = mock.patch('benchmarkstt.api.compression._zstandard', return_value=None)
+
+
+def test_read():
+    data = b'{"some": "json"}' * 100
+    assert compression.read(BytesIO(data)) == data
+    assert compression.read(BytesIO(data), 'identity', len(data)) == data
+    assert compression.read(BytesIO(gzip.compress(data)), 'GZIP') == data
+    assert compression.read(BytesIO(gzip.compress(gzip.compress(data))), 'gzip, x-gzip') == data
+
+    with pytest.raises(compression.RequestTooLargeError):
+        compression.read(BytesIO(data), None, len(data) - 1)
+    # only as much as allowed is decompressed
+    with pytest.raises(compression.RequestTooLargeError):
+        compression.read(BytesIO(gzip.compress(b'\0' * (50 << 20))), 'gzip', 1 << 20)
+    with pytest.raises(compression.CorruptRequestError):
+        compression.read(BytesIO(b'not gzipped'), 'gzip')
+    with pytest.raises(compression.UnsupportedEncodingError):
+        compression.read(BytesIO(data), 'br')
+
+
+@pytest.mark.skipif(zstandard is None, reason="requires zstandard")
+def test_zstd():
+    data = b'{"some": "json"}' * 100
+    assert compression.read(BytesIO(zstandard.ZstdCompressor().compress(data)), 'zstd') == data
+    assert compression.read(BytesIO(compression.compress(data, 'zstd')), 'zstd') == data
+
+    with pytest.raises(compression.CorruptRequestError):
+        compression.read(BytesIO(b'not zstd compressed'), 'zstd')
+    with pytest.raises(compression.CorruptRequestError):
+        compression.read(BytesIO(compression.compress(data, 'zstd')[:-8] + b'\0' * 8), 'zstd')
+
+
+@pytest.mark.skipif(zstandard is None or sys.version_info < (3, 6), reason="requires zstandard and python3.6 or higher")
+def test_flask_zstd():
+    from benchmarkstt.cli.entrypoints.api import create_app
+    client = create_app().test_client()
+    request = json.dumps(dict(jsonrpc='2.0', id=1, method='version')).encode()
+
+    response = client.post('/api', data=compression.compress(request, 'zstd'), headers={'Content-Encoding': 'zstd'})
+    assert response.status_code == 200
+    assert client.post('/api', data=request, headers={'Content-Encoding': 'zstd'}).status_code == 400
+
+
+@only_gzip
+def test_zstd_missing(_):
+    with pytest.raises(compression.UnsupportedEncodingError):
+        compression.read(BytesIO(b''), 'zstd')
+    assert compression.negotiate('zstd') is None
+
+
+@only_gzip
+@pytest.mark.parametrize('accept_encoding,expected', [
+    (None, None),
+    ('', None),
+    ('gzip', 'gzip'),
+    ('deflate, GZIP;q=0.5', 'gzip'),
+    ('*', 'gzip'),
+    ('gzip;q=0, *', None),
+    ('br, identity', None),
+    ('gzip;q=invalid', None),
+])
+def test_negotiate(_, accept_encoding, expected):
+    assert compression.negotiate(accept_encoding) == expected
+
+
+@pytest.mark.skipif(zstandard is None, reason="requires zstandard")
+def test_negotiate_zstd():
+    assert compression.negotiate('gzip, zstd') == 'zstd'
+    assert compression.negotiate('gzip, zstd;q=0.5') == 'gzip'
+
+
+@only_gzip
+def test_response(_):
+    data = b'x' * compression.MIN_SIZE
+    assert compression.response(data[:-1], 'gzip') == (data[:-1], {'Vary': 'Accept-Encoding'})
+    assert compression.response(data, None) == (data, {'Vary': 'Accept-Encoding'})
+    compressed, headers = compression.response(data, 'gzip')
+    assert headers == {'Vary': 'Accept-Encoding', 'Content-Encoding': 'gzip'}
+    assert gzip.decompress(compressed) == data
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="requires python3.6 or higher")
+@only_gzip
+def test_flask(_):
+    from benchmarkstt.cli.entrypoints.api import create_app
+    client = create_app().test_client()
+    request = json.dumps(dict(jsonrpc='2.0', id=1, method='help')).encode()
+
+    response = client.post('/api', data=gzip.compress(request),
+                           headers={'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'version' in json.loads(gzip.decompress(response.data))['result']
+
+    response = client.post('/api', data=request)
+    assert 'Content-Encoding' not in response.headers
+    assert 'version' in json.loads(response.data)['result']
+
+    assert client.post('/api', data=request, headers={'Content-Encoding': 'br'}).status_code == 415
+    assert client.post('/api', data=request, headers={'Content-Encoding': 'gzip'}).status_code == 400
+    with mock.patch.dict('os.environ', {'BENCHMARKSTT_MAX_REQUEST_SIZE': '10'}):
+        assert client.post('/api', data=request).status_code == 413
@@ -0,0 +1,189 @@
+from benchmarkstt.api.jobs import Jobs, JobStore, JobNotFoundError, _run
+from benchmarkstt.api.jsonrpc import get_methods
+from tempfile import TemporaryDirectory
+from unittest import mock
+import json
+import os
+import pytest
+import time
+
+
+@pytest.fixture
+def tmpdir():
+    with TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+@pytest.fixture
+def jobs(tmpdir):
+    jobs = Jobs(JobStore(tmpdir), get_methods(), 1)
+    yield jobs
+    jobs.shutdown()
+
+
+def wait(jobs, id_):
+    for _ in range(600):
+        status = jobs.status(id_)['status']
+        if status not in ('queued', 'running'):
+            return status
+        time.sleep(.05)
+    raise TimeoutError(id_)
+
+
+def error(excinfo):
+    return json.loads(str(excinfo.value))
+
+
+def test_jobs(jobs):
+    id_ = jobs.submit('metrics.wer', dict(ref='a b c', hyp='a c d'))
+    assert wait(jobs, id_) == 'done'
+    assert jobs.result(id_) == pytest.approx(2 / 3)
+
+    status = jobs.status(id_)
+    assert status['method'] == 'metrics.wer'
+    assert status['submitted'] <= status['started'] <= status['finished']
+    assert 'result' not in status
+
+    # finished jobs can't be cancelled
+    assert jobs.cancel(id_)['status'] == 'done'
+
+    id_ = jobs.submit('version')
+    assert wait(jobs, id_) == 'done'
+    assert type(jobs.result(id_)) is str
+
+
+def test_failed_job(jobs):
+    id_ = jobs.submit('metrics.wer', dict(ref='a'))
+    assert wait(jobs, id_) == 'failed'
+    with pytest.raises(AssertionError) as excinfo:
+        jobs.result(id_)
+    assert error(excinfo)['status'] == 'failed'
+
+
+def test_cancel(jobs, tmpdir):
+    store = JobStore(tmpdir)
+    id_ = '%032x' % (1,)
+    store.save(dict(id=id_, method='version', status='queued'))
+    assert jobs.cancel(id_)['status'] == 'cancelled'
+
+    # a cancelled job isn't run
+    _run(tmpdir, id_, 'version', {})
+    assert jobs.status(id_)['status'] == 'cancelled'
+    with pytest.raises(AssertionError) as excinfo:
+        jobs.result(id_)
+    assert error(excinfo) == dict(message='Job not finished', field='id', status='cancelled')
+
+    # nor is the result of a job cancelled while running kept
+    id_ = '%032x' % (2,)
+    store.save(dict(id=id_, method='version', status='queued'))
+
+    def cancel():
+        jobs.cancel(id_)
+        return 'result'
+
+    with mock.patch('benchmarkstt.api.jobs._methods', mock.Mock(items={'version': cancel})):
+        _run(tmpdir, id_, 'version', {})
+    assert jobs.status(id_)['status'] == 'cancelled'
+
+
+def test_cancelled_while_saving(jobs, tmpdir):
+    store = JobStore(tmpdir)
+    id_ = '%032x' % (1,)
+    store.save(dict(id=id_, method='version', status='running'))
+    # cancelled by another process, before it saved the job's status
+    store.cancel(id_)
+    assert jobs.status(id_)['status'] == 'cancelled'
+    assert store.update(id_, status='running')['status'] == 'cancelled'
+    with open(os.path.join(tmpdir, id_ + '.json')) as f:
+        assert json.load(f)['status'] == 'cancelled'
+
+    id_ = '%032x' % (2,)
+    store.save(dict(id=id_, method='version', status='queued'))
+    with mock.patch('benchmarkstt.api.jobs._methods', mock.Mock(items={'version': lambda: store.cancel(id_)})):
+        _run(tmpdir, id_, 'version', {})
+    job = store.load(id_)
+    assert job['status'] == 'cancelled'
+    assert 'result' not in job
+
+
+def test_max_queued(tmpdir):
+    jobs = Jobs(JobStore(tmpdir), get_methods(), 1, max_queued=2)
+    # the jobs never run
+    with mock.patch.object(jobs, '_executor_'):
+        ids = [jobs.submit('version') for _ in range(2)]
+        with pytest.raises(AssertionError) as excinfo:
+            jobs.submit('version')
+        assert error(excinfo) == dict(message='Too many jobs queued, try again later', max_queued=2)
+
+        jobs.cancel(ids[0])
+        jobs._futures.pop(ids[0])
+        jobs.submit('version')
+    assert len(os.listdir(tmpdir)) == 4
+
+
+def test_removed_job(tmpdir):
+    store = JobStore(tmpdir)
+    id_ = '%032x' % (1,)
+    _run(tmpdir, id_, 'version', {})
+    assert not os.path.exists(os.path.join(tmpdir, id_ + '.json'))
+
+    store.save(dict(id=id_, method='version', status='queued'))
+    with mock.patch('benchmarkstt.api.jobs._methods', mock.Mock(items={'version': lambda: store._remove(id_)})):
+        _run(tmpdir, id_, 'version', {})
+    assert not os.path.exists(os.path.join(tmpdir, id_ + '.json'))
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason="requires unix permissions")
+def test_private_directory(tmpdir):
+    directory = os.path.join(tmpdir, 'jobs')
+    with mock.patch('benchmarkstt.api.jobs.default_directory', return_value=directory):
+        store = JobStore()
+        store.save(dict(id='%032x' % (1,), status='queued'))
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+
+        os.chmod(directory, 0o777)
+        with pytest.raises(PermissionError):
+            JobStore().load('%032x' % (1,))
+    # unless configured explicitly
+    assert JobStore(directory).load('%032x' % (1,))['status'] == 'queued'
+
+
+def test_invalid(jobs):
+    with pytest.raises(AssertionError) as excinfo:
+        jobs.submit('nonexistent')
+    assert error(excinfo)['field'] == 'method'
+
+    for method, params in (('jobs.status', dict(id='0' * 32)), ('limits', {}),
+                           ('resources.register', dict(kind='entities', content='{}'))):
+        with pytest.raises(AssertionError) as excinfo:
+            jobs.submit(method, params)
+        assert error(excinfo) == dict(message="Method can't be run as a job", field='method')
+
+    with pytest.raises(AssertionError) as excinfo:
+        jobs.submit('version', ['a'])
+    assert error(excinfo)['field'] == 'params'
+
+    for id_ in ('0' * 32, '../' + '0' * 29, None):
+        with pytest.raises(AssertionError) as excinfo:
+            jobs.status(id_)
+        assert error(excinfo) == dict(message='Job not found', field='id')
+
+
+def test_store_cleanup(tmpdir):
+    store = JobStore(tmpdir, max_age=60, max_count=4)
+    now = time.time()
+    for idx, (status, age) in enumerate((('done', 100), ('running', 50), ('failed', 40), ('done', 30), ('done', 20),
+                                         ('running', 100), ('queued', 100))):
+        id_ = '%032x' % (idx,)
+        store.save(dict(id=id_, status=status))
+        os.utime(os.path.join(tmpdir, id_ + '.json'), (now - age, now - age))
+
+    store.cancel('%032x' % (0,))
+    store.cleanup()
+
+    # the first is expired, the oldest finished one is removed as there are too many, jobs that didn't finish
+    # are never removed
+    assert sorted(os.listdir(tmpdir)) == ['%032x.json' % (idx,) for idx in (1, 4, 5, 6)]
+    with pytest.raises(JobNotFoundError):
+        store.load('%032x' % (0,))
+    assert store.load('%032x' % (1,))['status'] == 'running'
@@ -0,0 +1,154 @@
+from benchmarkstt.api.resources import Resources, ResourceNotFoundError, parse_spec
+from benchmarkstt.api.entrypoints.benchmark import callback as benchmark_api
+from benchmarkstt.api.entrypoints.metrics import callback as metrics_api
+from benchmarkstt.metrics.core import BEER, WER
+from benchmarkstt.normalization import bundle
+from tempfile import TemporaryDirectory
+from unittest import mock
+import json
+import os
+import pytest
+import sys
+
+
+@pytest.fixture
+def tmpdir():
+    with TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+@pytest.fixture
+def resources(tmpdir):
+    resources = Resources()
+    with open(os.path.join(tmpdir, 'lower.conf'), 'w') as f:
+        f.write('[normalization]\nlowercase\n')
+    with open(os.path.join(tmpdir, 'entities.json'), 'w') as f:
+        json.dump({'darkness': 1, 'old friend': 3}, f)
+    bundle.compile([['config', os.path.join(tmpdir, 'lower.conf')], ['unidecode']],
+                   os.path.join(tmpdir, 'lower.bundle'))
+
+    resources.preload('lower=%s, bundled = %s' % (os.path.join(tmpdir, 'lower.conf'),
+                                                  os.path.join(tmpdir, 'lower.bundle')),
+                      'entities=%s' % (os.path.join(tmpdir, 'entities.json'),))
+    with mock.patch('benchmarkstt.api.entrypoints.benchmark.resources', resources), \
+            mock.patch('benchmarkstt.api.entrypoints.metrics.resources', resources):
+        yield resources
+
+
+def test_parse_spec():
+    assert parse_spec('a=x.conf, b = y=z.bundle,') == [('a', 'x.conf'), ('b', 'y=z.bundle')]
+    assert parse_spec('') == []
+    assert parse_spec(None) == []
+    with pytest.raises(ValueError):
+        parse_spec('a')
+
+
+def test_resources(resources):
+    assert resources.list() == {'lower': dict(kind='normalizer', name='lower'),
+                                'bundled': dict(kind='normalizer', name='bundled'),
+                                'entities': dict(kind='entities', name='entities')}
+    assert resources.normalizer('lower').normalize('\xc0A') == '\xe0a'
+    assert resources.normalizer('bundled').normalize('\xc0A') == 'aa'
+    assert resources.entities('entities') == (('darkness', 'old friend'), (1, 3))
+    with pytest.raises(ResourceNotFoundError):
+        resources.normalizer('entities')
+
+    metric = resources.metric(BEER, entities_file='entities')
+    assert metric.get_entities() == ['darkness', 'old friend']
+    assert metric.get_weight() == [.25, .75]
+    assert resources.metric(BEER, entities_file='doesntexist').get_entities() is None
+
+
+def test_benchmark(resources):
+    ref = 'Hello darkness my OLD friend'
+    hyp = 'Hello darkness my old foe'
+    assert benchmark_api(WER, ref, hyp, normalizer='lower') == {'wer': 0.2}
+    assert benchmark_api(WER, ref, hyp) == {'wer': 0.4}
+    with pytest.raises(AssertionError) as exc:
+        benchmark_api(WER, ref, hyp, normalizer='doesntexist')
+    assert 'Unknown normalizer' in str(exc.value)
+
+    result = benchmark_api(BEER, ref, hyp, normalizer='lower', entities_file='entities')
+    assert result['beer']['old friend'] == {'beer': 1.0, 'occurrence_ref': 1}
+    assert metrics_api(BEER, ref, hyp, entities_file='entities')['darkness'] == {'beer': 0.0, 'occurrence_ref': 1}
+
+
+def test_register(tmpdir):
+    resources = Resources(os.path.join(tmpdir, 'resources'))
+    id_ = resources.register('normalizer', '[normalization]\nlowercase\n', 'lower')
+    assert len(id_) == 64
+    assert resources.register('normalizer', '[normalization]\nlowercase\n') == id_
+    assert resources.normalizer(id_).normalize('A') == 'a'
+    entities_id = resources.register('entities', '{"a": 1}')
+    assert resources.entities(entities_id) == (('a',), (1,))
+
+    # shared through the directory
+    other = Resources(os.path.join(tmpdir, 'resources'))
+    assert other.list() == {id_: dict(kind='normalizer', name=None), entities_id: dict(kind='entities', name=None)}
+    assert other.normalizer(id_).normalize('A') == 'a'
+    assert other.has_entities(entities_id)
+    with pytest.raises(ResourceNotFoundError):
+        other.normalizer(entities_id)
+    with pytest.raises(ResourceNotFoundError):
+        other.normalizer('../resources/' + id_)
+    assert not Resources().has_entities(entities_id)
+
+
+def test_register_max_count(tmpdir):
+    def register(resources, text):
+        return resources.register('entities', json.dumps({text: 1}))
+
+    resources = Resources(max_count=2)
+    a, b = register(resources, 'a'), register(resources, 'b')
+    resources.entities(a)
+    c = register(resources, 'c')
+    # the least recently used is removed
+    assert sorted(resources.list()) == sorted([a, c])
+    with pytest.raises(ResourceNotFoundError):
+        resources.entities(b)
+
+    directory = os.path.join(tmpdir, 'resources')
+    resources = Resources(directory, max_count=2)
+    a, b = register(resources, 'a'), register(resources, 'b')
+    os.utime(os.path.join(directory, a + '.json'), (1, 1))
+    os.utime(os.path.join(directory, b + '.json'), (0, 0))
+    c = register(resources, 'c')
+    assert sorted(os.listdir(directory)) == sorted(id_ + extension for id_ in (a, c)
+                                                   for extension in ('.json', '.pickle'))
+
+    other = Resources(directory, max_count=2)
+    assert other.entities(a) == (('a',), (1,))
+    # loading it marks it as used
+    assert os.path.getmtime(os.path.join(directory, a + '.json')) > 1
+    assert not other.has_entities(b)
+
+
+@pytest.mark.parametrize('kind,content', [
+    ('normalizer', '[other]\nlowercase\n'),
+    ('normalizer', '[normalization]\ndoesntexist\n'),
+    ('normalizer', '[normalization]\nregex "a\n'),
+    ('entities', '["a"]'),
+    ('entities', '{'),
+    ('other', ''),
+])
+def test_register_errors(kind, content):
+    with pytest.raises(AssertionError) as exc:
+        Resources().register(kind, content)
+    assert json.loads(str(exc.value))['field'] in ('kind', 'content')
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="requires python3.6 or higher")
+def test_jsonrpc(tmpdir):
+    from benchmarkstt.cli.entrypoints.api import create_app
+
+    def call(method, **params):
+        request = dict(jsonrpc='2.0', id=1, method=method, params=params)
+        return json.loads(client.post('/api', data=json.dumps(request)).data)['result']
+
+    resources = Resources()
+    with mock.patch('benchmarkstt.api.resources.resources', resources), \
+            mock.patch('benchmarkstt.api.entrypoints.benchmark.resources', resources):
+        client = create_app().test_client()
+        id_ = call('resources.register', kind='normalizer', content='[normalization]\nlowercase\n', name='lower')
+        assert call('resources.list') == {id_: dict(kind='normalizer', name='lower')}
+        assert call('benchmark.wer', ref='A b', hyp='a B', normalizer=id_) == {'wer': 0.0}
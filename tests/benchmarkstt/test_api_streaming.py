@@ -0,0 +1,95 @@
+from benchmarkstt.api.admission import Admission
+from benchmarkstt.api.jsonrpc import get_methods
+from benchmarkstt.api.streaming import events, format_event
+from benchmarkstt.cli.entrypoints.api import create_app
+from benchmarkstt.normalization.logger import normalization_logger
+import json
+import pytest
+import threading
+import time
+
+config = '[normalization]\nlowercase\n'
+
+
+@pytest.fixture(scope='module')
+def methods():
+    return get_methods(Admission())
+
+
+def test_benchmark(methods):
+    result = list(events(methods, 'benchmark.worddiffs',
+                         dict(ref='Hello DARKNESS my friend', hyp='hello darkness old friend', config=config,
+                              dialect='list', return_logs=True), chunk_size=3))
+
+    assert [event for event, _ in result] == ['log'] * 3 + ['diff', 'diff', 'result']
+    assert result[0][1]['title'] == 'Reference'
+    assert result[0][1]['stack'] == ['Config', '[normalization]', 'Lowercase']
+    assert [item['type'] for item in result[3][1] + result[4][1]] == ['equal', 'equal', 'replace', 'equal']
+    assert result[-1] == ('result', {'worddiffs': None})
+
+
+def test_normalization(methods):
+    assert list(events(methods, 'normalization.lowercase', dict(text='A b'))) == [
+        ('log', dict(title=None, stack=['Lowercase'],
+                     diff='<span class="delete">A</span><span class="insert">a</span> b')),
+        ('result', dict(text='a b')),
+    ]
+    assert list(events(methods, 'normalization.lowercase', dict(text='a b'))) == [('result', dict(text='a b'))]
+
+
+def test_errors(methods):
+    def error(*args):
+        result = list(events(methods, *args))
+        assert len(result) == 1 and result[0][0] == 'error'
+        return result[0][1]
+
+    assert error('nonexistent')['code'] == -32601
+    assert error('benchmark.wer', ['a', 'b'])['code'] == -32602
+    assert error('benchmark.wer', dict(ref='a'))['code'] == -32602
+    assert json.loads(error('benchmark.wer', dict(ref='a', hyp='b', normalizer='x'))['data'])['field'] == 'normalizer'
+    assert error('metrics.worddiffs', dict(ref='a', hyp='b', dialect='x'))['code'] == -32000
+
+
+def test_backpressure(methods):
+    text = '\n'.join('Line %d' % (idx,) for idx in range(10))
+    stream = events(methods, 'benchmark.wer', dict(ref=text, hyp=text, config=config), queue_size=1)
+    assert next(stream)[0] == 'log'
+    time.sleep(.1)
+    threads = [thread for thread in threading.enumerate() if thread.name == 'benchmarkstt-stream']
+    # the normalization waits for the client
+    assert len(threads) == 1
+
+    stream.close()
+    threads[0].join(2)
+    assert not threads[0].is_alive()
+    assert not normalization_logger.active
+
+
+def test_other_threads_not_streamed(methods):
+    stream = events(methods, 'normalization.lowercase', dict(text='A'), queue_size=1)
+    assert next(stream)[0] == 'log'
+
+    other = threading.Thread(target=lambda: methods.items['normalization.lowercase'](text='B'))
+    other.start()
+    other.join()
+    assert list(stream) == [('result', dict(text='a'))]
+
+
+def test_app():
+    client = create_app().test_client()
+    response = client.post('/api/stream', json=dict(jsonrpc='2.0', method='normalization.lowercase',
+                                                    params=dict(text='A'), id=1))
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    data = response.get_data(as_text=True)
+    assert data.startswith('event: log\ndata: {')
+    assert data.endswith(format_event('result', dict(text='a')))
+
+    assert client.post('/api/stream', data='[]').status_code == 400
+    assert client.post('/api/stream', data='{').status_code == 400
+
+
+def test_explorer():
+    response = create_app(with_explorer=True).test_client().get('/api')
+    assert response.status_code == 200
+    assert b'streamJSONRPC' in response.data
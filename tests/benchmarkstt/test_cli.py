@@ -6,6 +6,8 @@ from tempfile import TemporaryDirectory
 import os
 from io import StringIO
 import shlex
+import subprocess
+import sys
 from benchmarkstt.normalization import Normalizer as NormalizationBase
 from benchmarkstt.normalization import factory as normalization_factory
 from benchmarkstt.diff.formatter import ANSIDiffDialect
@@ -213,3 +215,17 @@ def commandline_tester(prog_name, app, argv, result, capsys):
                     assert captured.err == result[1]
                 else:
                     assert captured.out == result
+
+
+def test_lazy_imports():
+    # heavy dependencies should only be imported when the functionality that needs them is used
+    heavy = ('docutils', 'flask', 'jsonrpcserver', 'markupsafe', 'unidecode', 'werkzeug')
+    code = '\n'.join([
+        'import sys',
+        'from benchmarkstt.cli import main, tools',
+        'main.argparser()',
+        'tools.argparser()',
+        'print(" ".join(sorted(set(m.split(".")[0] for m in sys.modules) & set(%r))))' % (heavy,),
+    ])
+    output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+    assert output.strip() == ''
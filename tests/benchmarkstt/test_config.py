@@ -0,0 +1,92 @@
+from benchmarkstt import config
+from benchmarkstt.normalization import File
+from benchmarkstt.normalization.core import Config, Regex
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+import os
+import pytest
+
+
+@pytest.fixture
+def tmpdir():
+    config.cache.clear()
+    with TemporaryDirectory() as tmpdir:
+        yield tmpdir
+    config.cache.clear()
+
+
+def write(path, text):
+    with open(path, 'w', encoding='UTF-8') as f:
+        f.write(text)
+    # make sure a change is noticed, even on file systems with a coarse mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+def test_section_config_reader():
+    reader = config.reader(StringIO('[first]\nlowercase\n\n# comment\n[second]\nregex a b\nreplace "a b" c\n'))
+    assert reader[None] == []
+    assert reader['first'] == [['lowercase']]
+    assert reader['second'] == [['regex', 'a', 'b'], ['replace', 'a b', 'c']]
+    assert 'third' not in reader
+
+    reader = config.reader(StringIO('lowercase\nunidecode\n[section]\nlowercase'))
+    assert reader[None] == [['lowercase'], ['unidecode']]
+    assert reader['section'] == [['lowercase']]
+
+    reader = config.reader(StringIO(''))
+    assert reader[None] == []
+    assert list(reader) == []
+
+
+def test_file_cache(tmpdir):
+    cache = config.FileCache(2)
+    paths = [os.path.join(tmpdir, str(idx)) for idx in range(3)]
+    for path in paths:
+        write(path, 'text')
+    for idx, path in enumerate(paths):
+        cache.set(idx, 'value %d' % (idx,), {path: config.file_version(path)})
+    # least recently used was evicted
+    assert cache.get(0) is None
+    assert cache.get(1) == 'value 1'
+
+    write(paths[1], 'changed')
+    assert cache.get(1) is None
+    os.unlink(paths[2])
+    assert cache.get(2) is None
+
+    cache = config.FileCache(0)
+    cache.set(0, 'value', {})
+    assert cache.get(0) is None
+
+
+def test_config_cache(tmpdir):
+    write(os.path.join(tmpdir, 'rules.regex'), 'a,b\n')
+    nested = os.path.join(tmpdir, 'nested.conf')
+    write(nested, '[one]\nlowercase\n[two]\nregex rules.regex\n')
+    main = os.path.join(tmpdir, 'main.conf')
+    write(main, '[normalization]\nconfig "%s" one\nconfig "%s" two\n' % (nested, nested))
+
+    with mock.patch('benchmarkstt.config.reader', wraps=config.reader) as reader, \
+            mock.patch.object(Regex, 'aggregate', wraps=Regex.aggregate) as aggregate:
+        assert Config(main).normalize('A a') == 'b b'
+        # nested.conf was parsed once
+        assert reader.call_count == 2
+        assert aggregate.call_count == 1
+
+        assert Config(main).normalize('A a') == 'b b'
+        assert reader.call_count == 2
+        assert aggregate.call_count == 1
+
+        # a change of a nested file is noticed
+        write(os.path.join(tmpdir, 'rules.regex'), 'a,c\n')
+        assert Config(main).normalize('A a') == 'c c'
+        assert reader.call_count == 2
+        assert aggregate.call_count == 2
+        assert File(Regex, 'rules.regex', path=tmpdir).normalize('a') == 'c'
+        assert aggregate.call_count == 2
+
+        write(nested, '[one]\nuppercase\n[two]\nlowercase\n')
+        with pytest.raises(ValueError):
+            Config(main)
@@ -0,0 +1,79 @@
+from io import BytesIO
+import pytest
+import os
+import zipfile
+import socket
+import threading
+from tempfile import TemporaryDirectory
+from benchmarkstt.cli import daemon
+from benchmarkstt.cli.main import run as main
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='requires unix domain sockets')
+
+
+@pytest.fixture
+def server():
+    with TemporaryDirectory(dir='/tmp') as tmpdir:
+        path = os.path.join(tmpdir, 'test.sock')
+        srv = daemon.create_server(path)
+        thread = threading.Thread(target=srv.serve_forever)
+        thread.start()
+        try:
+            yield path
+        finally:
+            srv.shutdown()
+            thread.join()
+            srv.server_close()
+        assert not os.path.exists(path)
+
+
+def test_forward(server, capsys):
+    code = daemon.forward(server, ['-r', 'a b c', '-h', 'a B c', '-rt', 'argument', '-ht', 'argument',
+                                   '--wer', '-o', 'json'])
+    assert code == 0
+    out, err = capsys.readouterr()
+    assert out == '[\n\t{"title": "wer", "result": 0.3333333333333333}\n]\n'
+    assert err == ''
+
+
+def test_forward_relative_paths(server, capsys, monkeypatch):
+    monkeypatch.chdir('resources/test/_data')
+    code = daemon.forward(server, ['-r', 'candide.txt', '-h', 'candide.txt', '--wer'])
+    assert code == 0
+    assert capsys.readouterr()[0] == 'wer\n===\n\n0.000000\n\n'
+
+
+def test_forward_binary(server, capsysbinary):
+    code = daemon.forward(server, ['-r', 'a b c', '-h', 'a B c', '-rt', 'argument', '-ht', 'argument',
+                                   '--wer', '-o', 'npz'])
+    assert code == 0
+    out, err = capsysbinary.readouterr()
+    with zipfile.ZipFile(BytesIO(out)) as archive:
+        assert 'value.npy' in archive.namelist()
+    assert err == b''
+
+
+def test_forward_errors(server, capsys):
+    assert daemon.forward(server, ['-r', 'a']) == 2
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert 'the following arguments are required: -h/--hypothesis' in err
+
+
+def test_already_listening(server):
+    with pytest.raises(daemon.DaemonError):
+        daemon.create_server(server)
+
+
+def test_no_daemon(capsys, monkeypatch):
+    with TemporaryDirectory(dir='/tmp') as tmpdir:
+        path = os.path.join(tmpdir, 'test.sock')
+        assert daemon.forward(path, ['--version']) is None
+
+        # falls back to running locally
+        monkeypatch.setenv('BENCHMARKSTT_SOCKET', path)
+        monkeypatch.setattr('sys.argv', ['benchmarkstt', '--version'])
+        with pytest.raises(SystemExit) as exc:
+            main()
+        assert exc.value.code == 0
+        assert capsys.readouterr()[0].startswith('benchmarkstt: ')
@@ -1,4 +1,5 @@
 from benchmarkstt import diff
+from benchmarkstt.diff import opcodes
 import pytest
 
 differs = [differ.cls for differ in diff.factory]
@@ -31,3 +32,69 @@ def test_one_delete(differ):
     assert list(sm.get_opcodes()) == [('equal', 0, 40, 0, 40),
                                       ('delete', 40, 41, 40, 40),
                                       ('equal', 41, 81, 40, 80)]
+
+
+window_opcodes = [('insert', 0, 0, 0, 1),
+                  ('equal', 0, 4, 1, 5),
+                  ('replace', 4, 7, 5, 7),
+                  ('delete', 7, 8, 7, 7),
+                  ('equal', 8, 10, 7, 9),
+                  ('insert', 10, 10, 9, 11)]
+
+
+@pytest.mark.parametrize('offset,limit,expected', [
+    [None, None, window_opcodes],
+    [0, 2, [('insert', 0, 0, 0, 1), ('equal', 0, 2, 1, 3)]],
+    [2, 3, [('equal', 2, 4, 3, 5), ('replace', 4, 5, 5, 6)]],
+    [5, 2, [('replace', 5, 7, 6, 7)]],
+    [6, 4, [('delete', 6, 7, 7, 7), ('delete', 7, 8, 7, 7), ('equal', 8, 10, 7, 9), ('insert', 10, 10, 9, 11)]],
+    [9, None, [('equal', 9, 10, 8, 9), ('insert', 10, 10, 9, 11)]],
+    [10, 5, [('insert', 10, 10, 9, 11)]],
+    [3, 0, []],
+])
+def test_window(offset, limit, expected):
+    assert opcodes.window(window_opcodes, offset, limit) == expected
+
+
+def test_window_pages():
+    # paging through all opcodes covers every reference and hypothesis word exactly once
+    pages = [opcodes.window(window_opcodes, offset, 3) for offset in range(0, 10, 3)]
+    flattened = [opcode for page in pages for opcode in page]
+    assert sum(ahi - alo for _, alo, ahi, _, _ in flattened) == 10
+    assert sum(bhi - blo for _, _, _, blo, bhi in flattened) == 11
+
+
+@pytest.mark.parametrize('context,expected', [
+    [0, [('insert', 0, 0, 0, 1), ('skip', 0, 4, 1, 5), ('replace', 4, 7, 5, 7), ('delete', 7, 8, 7, 7),
+         ('skip', 8, 10, 7, 9), ('insert', 10, 10, 9, 11)]],
+    [1, [('insert', 0, 0, 0, 1), ('equal', 0, 1, 1, 2), ('skip', 1, 3, 2, 4), ('equal', 3, 4, 4, 5),
+         ('replace', 4, 7, 5, 7), ('delete', 7, 8, 7, 7), ('equal', 8, 10, 7, 9), ('insert', 10, 10, 9, 11)]],
+    [2, window_opcodes],
+])
+def test_with_context(context, expected):
+    assert opcodes.with_context(window_opcodes, context) == expected
+
+
+def test_with_context_edges():
+    assert opcodes.with_context([('equal', 0, 5, 0, 5)], 2) == [('skip', 0, 5, 0, 5)]
+    assert opcodes.with_context([('equal', 0, 5, 0, 5), ('delete', 5, 6, 5, 5), ('equal', 6, 10, 5, 9)], 1) == [
+        ('skip', 0, 4, 0, 4), ('equal', 4, 5, 4, 5), ('delete', 5, 6, 5, 5), ('equal', 6, 7, 5, 6),
+        ('skip', 7, 10, 6, 9)]
+
+
+@differs_decorator
+@pytest.mark.parametrize('a,b', [
+    ['', ''],
+    ['', 'abc'],
+    ['abc', ''],
+    ['abcdef', 'abcdef'],
+    ['a b c d e f', 'a b d e kfmod fgdjn idf giudfg diuf dufg idgiudgd'],
+    ['HELLO CRUEL WORLD OF MINE'.split(), 'GOODBYE WORLD OF MINE'.split()],
+    ['x' + 'b' * 100 + 'yy', 'b' * 50 + 'zzz' + 'b' * 50],
+])
+def test_iter_opcodes_and_counts(differ, a, b):
+    sm = differ(a, b)
+    opcodes = sm.iter_opcodes()
+    assert not isinstance(opcodes, list)
+    assert list(opcodes) == list(differ(a, b).get_opcodes())
+    assert sm.get_opcode_counts() == diff.get_opcode_counts(differ(a, b).get_opcodes())
@@ -0,0 +1,176 @@
+from benchmarkstt.diff import get_opcode_counts
+from benchmarkstt.diff.core import RatcliffObershelp
+from benchmarkstt.diff.cache import AlignmentCache, CachedDiffer, differ_name, pack_opcodes, unpack_opcodes
+from benchmarkstt.diff.incremental import IncrementalDiffer
+from functools import partial
+from multiprocessing import Pool
+from tempfile import TemporaryDirectory
+from unittest import mock
+import itertools
+import os
+import pickle
+import pytest
+import zlib
+
+a = 'a b c d e f'.split()
+b = 'a b d e kfmod fgdjn idf giudfg diuf dufg idgiudgd'.split()
+
+
+@pytest.fixture
+def cache():
+    with TemporaryDirectory() as tmpdir:
+        cache = AlignmentCache(os.path.join(tmpdir, 'cache.db'))
+        yield cache
+        cache.close()
+
+
+def counting_differ():
+    return mock.MagicMock(wraps=RatcliffObershelp, __module__='test', __qualname__='CountingDiffer')
+
+
+def test_pack_opcodes():
+    opcodes = RatcliffObershelp(a, b).get_opcodes()
+    assert unpack_opcodes(pack_opcodes(opcodes)) == opcodes
+    assert unpack_opcodes(pack_opcodes([])) == []
+
+    # fixed little-endian layout, regardless of the machine
+    packed = pack_opcodes([('replace', 1, 2, 3, 258)])
+    assert packed[:1] == b'\x01'
+    assert zlib.decompress(packed[1:]) == bytes([1, 0, 0, 0, 1, 0, 0, 0, 2, 0, 0, 0, 3, 0, 0, 0, 2, 1, 0, 0])
+    # another (or no) format version
+    assert unpack_opcodes(zlib.compress(b'\0' * 20)) is None
+
+
+def test_other_format(cache):
+    key = cache.key(a, b)
+    cache.set(key, get_opcode_counts([]), [])
+    cache.connection.execute('UPDATE alignments SET opcodes = ?', (zlib.compress(b'\0' * 20),))
+    assert cache.get_opcodes(key) is None
+
+
+def test_differ_name():
+    assert differ_name(None) == 'benchmarkstt.diff.core.RatcliffObershelp'
+    assert differ_name('ratcliffobershelp') == 'benchmarkstt.diff.core.RatcliffObershelp'
+    assert differ_name(partial(IncrementalDiffer, store=None)) == \
+        'benchmarkstt.diff.incremental.IncrementalDiffer'
+    assert differ_name(partial(IncrementalDiffer, differ_class=None)) == \
+        'benchmarkstt.diff.incremental.IncrementalDiffer(benchmarkstt.diff.core.RatcliffObershelp)'
+
+
+def test_cached_differ(cache):
+    differ_class = counting_differ()
+    expected = RatcliffObershelp(a, b).get_opcodes()
+
+    assert CachedDiffer(a, b, cache, differ_class).get_opcodes() == expected
+    assert differ_class.call_count == 1
+    assert CachedDiffer(a, b, cache, differ_class).get_opcodes() == expected
+    assert CachedDiffer(a, b, cache, differ_class).get_opcode_counts() == get_opcode_counts(expected)
+    assert differ_class.call_count == 1
+
+    # different differ configuration
+    assert CachedDiffer(a, b, cache).get_opcodes() == expected
+
+
+def test_cached_counts(cache):
+    differ_class = counting_differ()
+    expected = RatcliffObershelp(a, b).get_opcodes()
+
+    # only counts are known
+    assert CachedDiffer(a, b, cache, differ_class).get_opcode_counts() == get_opcode_counts(expected)
+    assert CachedDiffer(a, b, cache, differ_class).get_opcode_counts() == get_opcode_counts(expected)
+    assert differ_class.call_count == 1
+    assert cache.get_opcodes(cache.key(a, b, differ_class)) is None
+
+    assert CachedDiffer(a, b, cache, differ_class).get_opcodes() == expected
+    assert CachedDiffer(a, b, cache, differ_class).get_opcodes() == expected
+    assert differ_class.call_count == 2
+
+
+# each step a while later, so the access times are updated
+@mock.patch('time.time', side_effect=itertools.count(0, 100))
+def test_eviction(_, cache):
+    keys = []
+    for idx in range(10):
+        hyp = b + [str(idx)]
+        differ = CachedDiffer(a, hyp, cache)
+        differ.get_opcodes()
+        keys.append(differ._key)
+    size = cache.connection.execute('SELECT size FROM alignments').fetchone()[0]
+
+    # most recently used
+    assert cache.get_opcodes(keys[0]) is not None
+    cache.evict(size * 5)
+    remaining = [key for key in keys if cache.get_counts(key) is not None]
+    assert remaining == [keys[0]] + keys[6:]
+
+
+@mock.patch('time.time', side_effect=itertools.count())
+def test_eviction_counts_only(_, cache):
+    keys = []
+    for idx in range(10):
+        differ = CachedDiffer(a, b + [str(idx)], cache)
+        differ.get_opcode_counts()
+        keys.append(differ._key)
+
+    sizes = [row[0] for row in cache.connection.execute('SELECT size FROM alignments')]
+    assert all(size > 0 for size in sizes)
+    assert cache.size() == sum(sizes)
+
+    cache.evict(sizes[0] * 3)
+    assert [key for key in keys if cache.get_counts(key) is not None] == keys[7:]
+    assert cache.size() == sizes[0] * 3
+
+
+def test_size(cache):
+    assert cache.size() == 0
+    CachedDiffer(a, b, cache).get_opcode_counts()
+    counts_only = cache.size()
+    # replacing an alignment only counts its new size
+    CachedDiffer(a, b, cache).get_opcodes()
+    assert cache.size() > counts_only
+    assert cache.size() == cache.connection.execute('SELECT SUM(size) FROM alignments').fetchone()[0]
+
+    limited = AlignmentCache(cache._path, max_size=1)
+    CachedDiffer(a, b + ['x'], limited).get_opcode_counts()
+    assert limited.size() == 0
+    limited.close()
+
+
+def _cached_counts(args):
+    path, idx = args
+    return CachedDiffer(a, b + [str(idx % 5)], AlignmentCache(path)).get_opcode_counts()
+
+
+def test_concurrent_writers():
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'cache.db')
+        with Pool(4) as pool:
+            results = pool.map(_cached_counts, [(path, idx) for idx in range(40)])
+        assert results == [RatcliffObershelp(a, b + [str(idx % 5)]).get_opcode_counts() for idx in range(40)]
+        cache = AlignmentCache(path)
+        assert cache.connection.execute('SELECT COUNT(*) FROM alignments').fetchone()[0] == 5
+        cache.close()
+
+
+def test_pickle(cache):
+    CachedDiffer(a, b, cache).get_opcodes()
+    restored = pickle.loads(pickle.dumps(cache))
+    assert restored.get_opcodes(cache.key(a, b)) == RatcliffObershelp(a, b).get_opcodes()
+    restored.close()
+
+
+def test_access_time(cache):
+    key = cache.key(a, b)
+    with mock.patch('time.time', return_value=1000):
+        cache.set(key, get_opcode_counts([]), [])
+
+    def accessed():
+        return cache.connection.execute('SELECT accessed FROM alignments').fetchone()[0]
+
+    # only updated if it was accessed a while ago
+    with mock.patch('time.time', return_value=1030):
+        assert cache.get_opcodes(key) == []
+    assert accessed() == 1000
+    with mock.patch('time.time', return_value=1100):
+        assert cache.get_counts(key) == get_opcode_counts([])
+    assert accessed() == 1100
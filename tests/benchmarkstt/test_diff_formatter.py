@@ -52,3 +52,34 @@ def test_dialect_exceptions():
 
 def test_default_dialect():
     assert formatter.DiffFormatter().diff(a, b) == formatter.format_diff(a, b)
+
+
+def test_iter_dialect():
+    gotten = formatter.format_diff(a, b, dialect='iter')
+    assert not isinstance(gotten, list)
+    assert list(gotten) == formatter.format_diff(a, b, dialect='list')
+
+
+@pytest.mark.parametrize('dialect,expected', [
+    ['text', '·a' '·\u0338b\u0338·\u0338c\u0338' '·\u0359x\u0359' '·e' '·\u0359f\u0359'],
+    ['ansi', ansi_color_key + '·a\033[31m·b·c\033[0m\033[32m·x\033[0m·e\033[32m·f\033[0m'],
+    ['list', [
+        OrderedDict([('type', 'equal'), ('reference', 'a'), ('hypothesis', 'a')]),
+        OrderedDict([('type', 'replace'), ('reference', 'b'), ('hypothesis', 'x')]),
+        OrderedDict([('type', 'delete'), ('reference', 'c'), ('hypothesis', None)]),
+        OrderedDict([('type', 'equal'), ('reference', 'e'), ('hypothesis', 'e')]),
+        OrderedDict([('type', 'insert'), ('reference', None), ('hypothesis', 'f')]),
+    ]],
+])
+def test_format_tokens(dialect, expected):
+    ref = ['a', 'b', 'c', 'e']
+    hyp = ['a', 'x', 'e', 'f']
+    opcodes = [('equal', 0, 1, 0, 1), ('replace', 1, 3, 1, 2), ('equal', 3, 4, 2, 3), ('insert', 4, 4, 3, 4)]
+    gotten = formatter.format_diff(ref, hyp, opcodes, dialect=dialect,
+                                   preprocessor=lambda x: ' %s' % (' '.join(x),))
+    assert gotten == expected
+
+
+def test_formatter_reuse():
+    diff_formatter = formatter.DiffFormatter('ansi')
+    assert diff_formatter.diff(a, b) == diff_formatter.diff(a, b) == formatter.format_diff(a, b, dialect='ansi')
@@ -0,0 +1,177 @@
+from benchmarkstt.diff import get_opcode_counts
+from benchmarkstt.diff.core import RatcliffObershelp
+from benchmarkstt.diff.incremental import AlignmentStore, IncrementalDiffer, chunks, realign, unchanged_regions
+from benchmarkstt.cli.main import run as main
+from tempfile import TemporaryDirectory
+from unittest import mock
+import os
+import random
+import pytest
+
+vocabulary = ['w%d' % (i,) for i in range(300)]
+
+
+def random_words(rnd, length):
+    return [rnd.choice(vocabulary) for _ in range(length)]
+
+
+def edit(rnd, words, count):
+    words = list(words)
+    for _ in range(count):
+        idx = rnd.randrange(len(words))
+        action = rnd.choice('sid')
+        if action == 's':
+            words[idx] = rnd.choice(vocabulary)
+        elif action == 'i':
+            words.insert(idx, rnd.choice(vocabulary))
+        else:
+            del words[idx]
+    return words
+
+
+def assert_valid(a, b, opcodes):
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+        elif tag == 'insert':
+            assert i1 == i2 and j1 < j2
+        elif tag == 'delete':
+            assert i1 < i2 and j1 == j2
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+
+
+def test_chunks():
+    words = random_words(random.Random(1), 1000)
+    result = chunks(words)
+    assert result[0][0] == 0 and result[-1][1] == 1000
+    assert all(prev[1] == cur[0] for prev, cur in zip(result, result[1:]))
+    assert max(end - start for start, end in result) <= 64
+    assert chunks([]) == []
+
+
+def test_unchanged_regions():
+    rnd = random.Random(2)
+    old = random_words(rnd, 2000)
+    new = edit(rnd, old, 5)
+    regions = unchanged_regions(old, new)
+    assert sum(end - start for start, end, _ in regions) > 1500
+    for start, end, shift in regions:
+        assert old[start:end] == new[start + shift:end + shift]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_realign(seed):
+    rnd = random.Random(seed)
+    a = random_words(rnd, 2000)
+    old_b = edit(rnd, a, 200)
+    old_opcodes = RatcliffObershelp(a, old_b).get_opcodes()
+
+    # localized changes: same result as aligning from scratch
+    b = edit(rnd, old_b, 3)
+    opcodes = realign(a, b, old_b, old_opcodes)
+    assert_valid(a, b, opcodes)
+    assert get_opcode_counts(opcodes) == get_opcode_counts(RatcliffObershelp(a, b).get_opcodes())
+
+    # always a valid alignment
+    b = edit(rnd, old_b, 300)
+    assert_valid(a, b, realign(a, b, old_b, old_opcodes))
+
+
+def test_incremental_differ():
+    rnd = random.Random(42)
+    a = random_words(rnd, 500)
+    b = edit(rnd, a, 50)
+    with TemporaryDirectory() as tmpdir:
+        store = AlignmentStore(os.path.join(tmpdir, 'store'))
+        expected = RatcliffObershelp(a, b).get_opcodes()
+        differ = IncrementalDiffer(a, b, store)
+        assert differ.get_opcodes() == expected
+        assert differ.exact
+        assert len(os.listdir(os.path.join(tmpdir, 'store'))) == 1
+
+        # unchanged hypothesis: stored alignment is used as is
+        with mock.patch('benchmarkstt.diff.incremental.realign') as realign_:
+            assert IncrementalDiffer(a, b, store).get_opcodes() == expected
+            assert not realign_.called
+
+        b2 = edit(rnd, b, 2)
+        with mock.patch('benchmarkstt.diff.incremental.realign', wraps=realign) as realign_:
+            differ = IncrementalDiffer(a, b2, store, 'ratcliffobershelp')
+            counts = differ.get_opcode_counts()
+            assert realign_.called
+        assert not differ.exact
+        assert counts == RatcliffObershelp(a, b2).get_opcode_counts()
+        # only full alignments are stored
+        assert store.load(store.key(a, RatcliffObershelp))[0] == b
+
+        # changed too much: aligned from scratch
+        b3 = edit(rnd, b, 100)
+        with mock.patch('benchmarkstt.diff.incremental.realign') as realign_:
+            differ = IncrementalDiffer(a, b3, store)
+            assert differ.get_opcodes() == RatcliffObershelp(a, b3).get_opcodes()
+            assert not realign_.called
+        assert differ.exact
+        assert store.load(store.key(a, RatcliffObershelp))[0] == b3
+
+
+def test_sources():
+    rnd = random.Random(43)
+    a = random_words(rnd, 500)
+    b, c = edit(rnd, a, 50), edit(rnd, a, 50)
+    with TemporaryDirectory() as tmpdir:
+        store = AlignmentStore(tmpdir)
+        IncrementalDiffer(a, b, store, source='system b').get_opcodes()
+        IncrementalDiffer(a, c, store, source='system c').get_opcodes()
+        assert len(os.listdir(tmpdir)) == 2
+
+        # each system's alignment is re-used
+        with mock.patch('benchmarkstt.diff.incremental.realign') as realign_:
+            assert IncrementalDiffer(a, b, store, source='system b').exact
+            assert IncrementalDiffer(a, c, store, source='system c').get_opcodes() == \
+                RatcliffObershelp(a, c).get_opcodes()
+            assert not realign_.called
+
+
+def test_cli(capsys):
+    with TemporaryDirectory() as tmpdir:
+        argv = ['benchmarkstt', '-r', 'a b c d', '-h', 'a b x d', '-rt', 'argument', '-ht', 'argument',
+                '--wer', '--diffcounts', '-o', 'json', '--incremental', tmpdir]
+        for _ in range(2):
+            with mock.patch('sys.argv', argv):
+                with pytest.raises(SystemExit):
+                    main()
+            assert capsys.readouterr().out == '[\n\t{"title": "wer", "result": 0.25},\n' \
+                                              '\t{"title": "diffcounts", "result": ' \
+                                              '{"equal": 3, "replace": 1, "insert": 0, "delete": 0}}\n]\n'
+        assert len(os.listdir(tmpdir)) == 1
+
+
+def test_cli_alignment_cache(capsys):
+    rnd = random.Random(44)
+    ref = random_words(rnd, 500)
+    hyp = edit(rnd, ref, 20)
+    hyp2 = edit(rnd, hyp, 2)
+
+    def run(hyp, *args):
+        argv = ['benchmarkstt', '-r', ' '.join(ref), '-h', ' '.join(hyp), '-rt', 'argument', '-ht', 'argument',
+                '--diffcounts', '-o', 'json'] + list(args)
+        with mock.patch('sys.argv', argv):
+            with pytest.raises(SystemExit):
+                main()
+        return capsys.readouterr().out
+
+    def wrong(a, b, *args, **kwargs):
+        # a valid, but not the full, alignment
+        return [('replace', 0, len(a), 0, len(b))]
+
+    with TemporaryDirectory() as tmpdir:
+        cache = ['--alignment-cache', os.path.join(tmpdir, 'cache.db')]
+        run(hyp, '--incremental', os.path.join(tmpdir, 'store'), *cache)
+        expected = run(hyp2)
+        with mock.patch('benchmarkstt.diff.incremental.realign', wrong):
+            assert run(hyp2, '--incremental', os.path.join(tmpdir, 'store'), *cache) != expected
+        # the re-aligned (approximate) result wasn't cached
+        assert run(hyp2, '--incremental', os.path.join(tmpdir, 'other'), *cache) == expected
@@ -1,5 +1,6 @@
 from benchmarkstt.input.core import PlainText, File
 from benchmarkstt.schema import Item, Schema
+import mmap
 import pytest
 
 candide_file = './resources/test/_data/candide.txt'
@@ -118,3 +119,42 @@ def test_exceptions():
     with pytest.raises(ValueError) as e:
         File('unknownextension.thisisntknowm')
     assert 'thisisntknowm' in str(e)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_file_chunks(chunk_size, tmpdir, monkeypatch):
+    text = ' \r\nÉén  twee\r\ndrie\rvier één\n\n'
+    tmpfile = tmpdir.join('chunks.txt')
+    tmpfile.write_binary(text.encode('UTF-8'))
+
+    with open(str(tmpfile), encoding='UTF-8') as f:
+        expected = list(PlainText(f.read()))
+
+    monkeypatch.setattr(File, 'chunk_size', chunk_size)
+    assert list(File(str(tmpfile))) == expected
+    assert list(File(candide_file)) == candide_schema
+
+
+def test_empty_file(tmpdir):
+    tmpfile = tmpdir.join('empty.txt')
+    tmpfile.write('')
+    assert list(File(str(tmpfile))) == []
+
+
+def test_file_mapping_closed(monkeypatch):
+    mappings = []
+    mmap_ = mmap.mmap
+
+    def spy(*args, **kwargs):
+        mappings.append(mmap_(*args, **kwargs))
+        return mappings[-1]
+
+    monkeypatch.setattr(mmap, 'mmap', spy)
+    file = File(candide_file)
+    assert not mappings
+    assert list(file) == candide_schema
+    assert len(mappings) == 1 and mappings[0].closed
+
+    monkeypatch.setattr(File, 'chunk_size', 64)
+    assert list(File(candide_file)) == candide_schema
+    assert len(mappings) == 2 and mappings[1].closed
@@ -1,4 +1,6 @@
-from benchmarkstt.metrics.core import BEER, CER, DiffCounts, WER
+from benchmarkstt.metrics.core import BEER, CER, DiffCounts, WER, WordDiffs
+from benchmarkstt.diff.formatter import ANSIDiffDialect, DiffFormatter
+from unittest import mock
 from benchmarkstt.metrics.core import OpcodeCounts
 from benchmarkstt.input.core import PlainText
 import pytest
@@ -113,3 +115,18 @@ def test_cer(a, b, exp):
     cer_levenshtein, = exp
 
     assert CER(mode=CER.MODE_LEVENSHTEIN).compare(PlainText(a), PlainText(b)) == cer_levenshtein
+
+
+@pytest.mark.parametrize('kwargs,exp', [
+    [dict(), '·a·b\033[31m·c\033[0m\033[32m·x\033[0m·d·e·f·g\033[32m·h\033[0m'],
+    [dict(offset=1, limit=3), '·b\033[31m·c\033[0m\033[32m·x\033[0m·d'],
+    [dict(offset='4'), '·e·f·g\033[32m·h\033[0m'],
+    [dict(context=1), ' …·b\033[31m·c\033[0m\033[32m·x\033[0m·d …·g\033[32m·h\033[0m'],
+    [dict(offset=3, context='0'), ' …\033[32m·h\033[0m'],
+])
+def test_worddiffs_window(kwargs, exp):
+    ref = PlainText('a b c d e f g')
+    hyp = PlainText('a b x d e f g h')
+    dialect = ANSIDiffDialect(show_color_key=False)
+    with mock.patch.dict(DiffFormatter.diff_dialects, ansi=lambda: dialect):
+        assert WordDiffs('ansi', **kwargs).compare(ref, hyp) == exp
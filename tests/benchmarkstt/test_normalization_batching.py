@@ -0,0 +1,180 @@
+from benchmarkstt.normalization import File
+from benchmarkstt.normalization.core import Regex, ReplaceWords
+from benchmarkstt.normalization.batching import Optimized, RegexBatch, Rule, regex_batches, trie_pattern, \
+    parse_template, Unsupported, WordBatch, word_batches, word_replacements
+from benchmarkstt.normalization.logger import LogCapturer
+from tempfile import TemporaryDirectory
+from unittest import mock
+import logging
+import os
+import random
+import re
+import pytest
+
+
+def rules(*args):
+    return [Regex(search, replace) for search, replace in args]
+
+
+def structure(normalizers):
+    return [len(n._rules) if type(n) in (RegexBatch, WordBatch) else 1 for n in normalizers]
+
+
+def test_parse_template():
+    pattern = re.compile('(?P<first>a)(b)')
+    assert parse_template('x', pattern) == ['x']
+    assert parse_template(r'<\1\g<2>\g<first>\g<0>>', pattern) == ['<', 1, 2, 1, 0, '>']
+    assert parse_template(r'\n\\\-\101', pattern) == ['\n\\\\-A']
+    with pytest.raises(Unsupported):
+        parse_template(r'\3', pattern)
+    with pytest.raises(Unsupported):
+        parse_template(r'\d', pattern)
+
+
+@pytest.mark.parametrize('search,replace', [
+    ('a*', 'x'),
+    ('^a', 'x'),
+    ('a(?=b)', 'x'),
+    ('(a)\\1', 'x'),
+    ('(?a)\\ba', 'x'),
+])
+def test_unsupported(search, replace):
+    with pytest.raises(Unsupported):
+        Rule(re.compile(search), replace)
+
+
+def test_rule():
+    rule = Rule(re.compile('(?i)k'), 'x')
+    # kelvin sign
+    assert 'K' in rule.matches.chars
+    assert not rule.whole_word
+
+    rule = Rule(re.compile(r'\bcolou?r\b'), 'color')
+    assert rule.whole_word and rule.word is None and rule.context == {'word'}
+    assert Rule(re.compile(r'\bcolour\b'), 'color').word == 'colour'
+    assert Rule(re.compile(r'(?i)\bcolour\b'), 'color').word is None
+
+
+@pytest.mark.parametrize('args,expected', [
+    # disjoint characters
+    ((('a', 'b'), ('c', 'd'), ('e', 'f')), [3]),
+    # output matched by a later rule
+    ((('a', 'b'), ('b', 'c')), [1, 1]),
+    # matching the same characters
+    ((('ab', 'x'), ('bc', 'y')), [1, 1]),
+    # empty output may join text into a new match
+    ((('-', ''), ('ab', 'x')), [1, 1]),
+    # whole words
+    (((r'\bcolour\b', 'color'), (r'\bhonour\b', 'honor'), (r'\bcolou?r\b', 'hue')), [2, 1]),
+    (((r'\bdont\b', 'do not'), (r'\bnot\b', 'no')), [1, 1]),
+    # later rule depending on word boundaries, earlier replacing word by non-word characters
+    ((('x', '-'), (r'\by', 'z')), [1, 1]),
+    ((('x', 'w'), (r'\by', 'z')), [2]),
+])
+def test_regex_batches(args, expected):
+    assert structure(regex_batches(rules(*args))) == expected
+
+
+def test_batch():
+    normalizers = rules((r'\bcolour\b', 'color'), (r'\bneighbour\b', '<neighbor>'), (r'\s+', ' '),
+                        (r'(?i)\b(h)onour\b', '\\1onor'), ('!', '.'))
+    optimized = Optimized(normalizers, regex_batches(normalizers))
+    assert structure(optimized._normalizers) == [5]
+    text = 'Colour colour,  neighbour\tHonour!'
+    assert optimized.normalize(text) == 'Colour color, <neighbor> Honor.'
+    assert optimized.verify(text) == ''
+
+
+def test_trie_pattern():
+    words = ['word1', 'word10', 'word2', 'w', 'x.y']
+    pattern = re.compile(r'\b(?:%s)\b' % (trie_pattern(words),))
+    assert pattern.findall('word1 word10 word100 word2 w word x.y xzy') == ['word1', 'word10', 'word2', 'w', 'x.y']
+
+
+def test_file():
+    normalizer = File(Regex, './resources/test/normalizers/regex/en_US')
+    assert type(normalizer._normalizer) is Optimized
+    assert normalizer.normalize('This is an Ex-Parakeet') == 'This is an Ex Parrot'
+
+
+def test_random_rules():
+    rnd = random.Random(1)
+    patterns = ['a', 'b', 'ab', 'a+', '[xy]', r'\s+', r'\d', r'\ba\b', r'\bab\b', r'(?i)\b(b)\b', r'x\B', '-', '.']
+    replacements = ['', 'a', 'x', 'b a', '-', ' ', '\\g<0>\\g<0>', '1']
+    batches = 0
+    for _ in range(500):
+        normalizers = rules(*[(rnd.choice(patterns), rnd.choice(replacements)) for _ in range(rnd.randint(2, 6))])
+        optimized = Optimized(normalizers, regex_batches(normalizers))
+        batches += sum(type(n) is RegexBatch for n in optimized._normalizers)
+        for _ in range(5):
+            text = ''.join(rnd.choice('abxy1 -') for _ in range(rnd.randint(0, 20)))
+            assert optimized.verify(text) == ''
+    assert batches > 100
+
+
+def test_logs():
+    normalizers = rules(('a', 'b'), ('c', 'd'))
+    optimized = Optimized(normalizers, regex_batches(normalizers), 'title')
+    with LogCapturer(dialect='text', diff_formatter_dialect='dict') as logcap:
+        assert optimized.normalize('ac') == 'bd'
+        logs = logcap.logs
+    # still logged per rule
+    assert [log['stack'] for log in logs] == [['title', 'RegexBatch(2)', 'Regex'],
+                                              ['title', 'RegexBatch(2)', 'Regex'],
+                                              ['title', 'RegexBatch(2)'],
+                                              ['title']]
+
+
+def test_verify(caplog):
+    normalizers = rules(('a', 'b'), ('c', 'd'))
+    # purposely wrong
+    optimized = Optimized(normalizers, rules(('a', 'x')), 'title', verify=True)
+    assert optimized.verify('ac') != ''
+    caplog.set_level(logging.WARNING)
+    assert optimized.normalize('ac') == 'bd'
+    assert 'title' in caplog.text
+
+    with mock.patch.dict('os.environ', {'BENCHMARKSTT_VERIFY_BATCHING': '1'}):
+        assert Optimized(normalizers, rules(('a', 'x')))._verify is True
+    assert Optimized(normalizers, rules(('a', 'x')))._verify is False
+
+
+def test_word_replacements():
+    assert word_replacements(ReplaceWords('ni', 'ecky ecky')) == {'ni': 'ecky ecky', 'Ni': 'Ecky ecky'}
+    assert word_replacements(ReplaceWords('\xdf', 'ss')) == {'\xdf': 'ss', 'S': 'Ss'}
+    assert word_replacements(ReplaceWords('new york', 'NY')) is None
+    assert word_replacements(ReplaceWords('U.S.', 'US')) is None
+
+
+@pytest.mark.parametrize('args,expected', [
+    ((('a', 'b'), ('c', 'd'), ('e', 'f')), [3]),
+    # chained
+    ((('a', 'b'), ('b', 'c')), [1, 1]),
+    ((('dont', 'do not'), ('not', 'no'), ('e', 'f')), [1, 2]),
+    # not a single word
+    ((('a', 'b'), ('new york', 'NY'), ('c', 'd')), [1, 1, 1]),
+])
+def test_word_batches(args, expected):
+    assert structure(word_batches([ReplaceWords(*arg) for arg in args])) == expected
+
+
+def test_word_batch():
+    normalizers = [ReplaceWords(*arg) for arg in (('ni', 'ecky ecky'), ('knights', 'shrubbers'), ('say', ''),
+                                                  ('ni', 'nope'), ('new york', 'NY'))]
+    optimized = Optimized(normalizers, word_batches(normalizers))
+    assert structure(optimized._normalizers) == [4, 1]
+    assert optimized.token_local is False
+    text = 'Ni! We are the Knights Who Say "ni", nI, nini, New york!'
+    assert optimized.normalize(text) == 'Ecky ecky! We are the Shrubbers Who  "ecky ecky", nI, nini, NY!'
+    assert optimized.verify(text) == ''
+    assert optimized._normalizers[0].token_local
+
+
+def test_replacewords_file():
+    with TemporaryDirectory() as tmpdir:
+        file = os.path.join(tmpdir, 'rules')
+        with open(file, 'w') as f:
+            f.write('ni,ecky\nknights,shrubbers\n')
+        normalizer = File(ReplaceWords, file)
+    assert structure(normalizer._normalizer._normalizers) == [2]
+    assert normalizer.normalize('Ni! knights') == 'Ecky! shrubbers'
@@ -0,0 +1,159 @@
+from benchmarkstt import config
+from benchmarkstt.normalization import bundle, factory
+from benchmarkstt.normalization.bundle import Bundle
+from benchmarkstt.normalization.core import Config, Regex
+from benchmarkstt.api.admission import Admission
+from benchmarkstt.api.jsonrpc import get_methods
+from benchmarkstt.cli.tools import run as tools
+from tempfile import TemporaryDirectory
+from unittest import mock
+import os
+import pickle
+import pytest
+
+
+@pytest.fixture
+def tmpdir():
+    config.cache.clear()
+    with TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            yield tmpdir
+        finally:
+            os.chdir(cwd)
+    config.cache.clear()
+
+
+def write(path, text):
+    with open(path, 'w', encoding='UTF-8') as f:
+        f.write(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+def test_compile(tmpdir):
+    write('rules.regex', 'a,b\n')
+    write('main.conf', '[normalization]\nlowercase\nregex rules.regex\n')
+    normalizer = bundle.compile([['config', 'main.conf'], ['unidecode']], 'main.bundle')
+    assert normalizer.normalize('\xc0 A') == 'a b'
+
+    with open('main.bundle', 'rb') as f:
+        data = pickle.load(f)
+    assert data['recipe'] == [['config', os.path.join(tmpdir, 'main.conf')], ['unidecode']]
+    assert sorted(data['sources']) == [os.path.realpath('main.conf'), os.path.realpath('rules.regex')]
+
+    # nothing is built
+    config.cache.clear()
+    with mock.patch.object(Regex, 'aggregate') as aggregate:
+        assert bundle.load('main.bundle').normalize('\xc0 A') == 'a b'
+        assert not aggregate.called
+
+
+def test_rebuild(tmpdir):
+    write('rules.regex', 'a,b\n')
+    write('main.conf', '[normalization]\nregex rules.regex\n')
+    bundle.compile([['config', 'main.conf']], 'main.bundle')
+
+    write('rules.regex', 'a,c\n')
+    config.cache.clear()
+    assert bundle.load('main.bundle').normalize('a') == 'c'
+    # rewritten
+    with mock.patch.object(Regex, 'aggregate') as aggregate:
+        config.cache.clear()
+        assert bundle.load('main.bundle').normalize('a') == 'c'
+        assert not aggregate.called
+
+    # sources that are missing aren't checked
+    os.unlink('rules.regex')
+    assert bundle.load('main.bundle').normalize('a') == 'c'
+
+
+def test_invalid(tmpdir):
+    write('main.conf', '[normalization]\nlowercase\n')
+    bundle.compile([['config', 'main.conf']], 'main.bundle')
+    with open('main.bundle', 'rb') as f:
+        data = pickle.load(f)
+
+    data['hash'] = 'x'
+    with open('main.bundle', 'wb') as f:
+        pickle.dump(data, f)
+    with pytest.raises(ValueError):
+        bundle.load('main.bundle')
+
+    data['version'] = None
+    with open('main.bundle', 'wb') as f:
+        pickle.dump(data, f)
+    assert bundle.load('main.bundle').normalize('A') == 'a'
+
+    with open('main.bundle', 'wb') as f:
+        pickle.dump([], f)
+    with pytest.raises(ValueError):
+        bundle.load('main.bundle')
+
+
+def test_bundle_normalizer(tmpdir):
+    write('main.conf', '[normalization]\nlowercase\n')
+    bundle.compile([['config', 'main.conf']], 'main.bundle')
+    normalizer = bundle.create('bundle', 'main.bundle')
+    assert type(normalizer) is Bundle
+    assert normalizer.normalize('A') == 'a'
+    assert normalizer.line_local and normalizer.token_local
+
+    with mock.patch('benchmarkstt.normalization.bundle.load') as load:
+        Bundle('main.bundle')
+        assert not load.called
+        write('main.conf', '[normalization]\nunidecode\n')
+        Bundle('main.bundle')
+        assert load.called
+
+
+def test_not_in_factory(tmpdir):
+    write('main.conf', '[normalization]\nlowercase\n')
+    bundle.compile([['config', 'main.conf']], 'main.bundle')
+    write('bundled.conf', '[normalization]\nbundle main.bundle\n')
+
+    assert 'bundle' not in factory
+    with mock.patch('benchmarkstt.normalization.bundle.load') as load:
+        with pytest.raises(ValueError):
+            Config('bundled.conf').normalize('A')
+        assert not load.called
+
+
+def test_api(tmpdir):
+    write('main.conf', '[normalization]\nlowercase\n')
+    bundle.compile([['config', 'main.conf']], 'main.bundle')
+    methods = get_methods(Admission())
+    assert 'normalization.bundle' not in methods.items
+
+    with mock.patch('benchmarkstt.normalization.bundle.load') as load:
+        with pytest.raises(ValueError):
+            methods.items['benchmark.wer'](ref='A', hyp='a', config='[normalization]\nbundle %s\n' % (
+                os.path.join(tmpdir, 'main.bundle'),))
+        with pytest.raises(AssertionError):
+            methods.items['resources.register'](kind='normalizer', content='[normalization]\nbundle main.bundle\n')
+        assert not load.called
+
+
+def test_cli(tmpdir, capsys):
+    write('rules.regex', 'a,b\n')
+    write('main.conf', '[normalization]\nregex rules.regex\n')
+    argv = ['benchmarkstt-tools', 'normalization', '--lowercase', '--config', 'main.conf', '--compile', 'main.bundle']
+    with mock.patch('sys.argv', argv):
+        with pytest.raises(SystemExit) as err:
+            tools()
+    assert err.value.code == 0
+    assert capsys.readouterr().out == ''
+    assert Bundle('main.bundle').normalize('A') == 'b'
+
+    with mock.patch('sys.argv', argv + ['-i', 'main.conf']):
+        with pytest.raises(SystemExit) as err:
+            tools()
+    assert err.value.code == 2
+
+    with mock.patch('sys.argv', ['benchmarkstt-tools', 'normalization', '--bundle', 'main.bundle', '--unidecode',
+                                 '-i', 'rules.regex']):
+        with pytest.raises(SystemExit) as err:
+            tools()
+    assert err.value.code == 0
+    assert capsys.readouterr().out == 'b,b\n'
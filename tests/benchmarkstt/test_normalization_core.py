@@ -139,3 +139,10 @@ def test_base_with_file_notimplemented():
 def test_filefactory():
     with pytest.raises(NotImplementedError):
         FileFactory.__getitem__(None, 'whatever')
+
+
+def test_unidecode_transliterations():
+    from unidecode import unidecode
+    text = ''.join(chr(code) for code in range(0x20, 0x3000)) + '\U0001d582\U0001d58a'
+    assert core.Unidecode().normalize(text) == unidecode(text)
+    assert core.Unidecode().normalize('ascii only') == 'ascii only'
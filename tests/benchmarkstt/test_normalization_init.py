@@ -2,7 +2,10 @@ from benchmarkstt.normalization import core
 from benchmarkstt.normalization import NormalizationAggregate
 from benchmarkstt.normalization import factory
 from benchmarkstt.factory import ClassConfig
+from benchmarkstt.normalization.logger import normalization_logger
 from inspect import isgenerator
+from unittest import mock
+import pickle
 import pytest
 
 
@@ -42,3 +45,59 @@ def test_is_normalizer():
 
     assert factory.is_valid(NormalizationAggregate) is True
     assert NormalizationAggregate().normalize('NON-normalized') == 'NON-normalized'
+
+
+def test_token_local():
+    assert core.Lowercase().token_local
+    assert core.ReplaceWords('ni', 'ecky ecky').token_local
+    assert not core.ReplaceWords('ecky ecky', 'ni').token_local
+    assert not core.Replace(' ni', 'nope').token_local
+    assert not core.Regex('ni', 'nope').token_local
+
+    normalizer = NormalizationAggregate()
+    normalizer.add(core.Lowercase())
+    normalizer.add(core.Unidecode())
+    assert normalizer.token_local
+    normalizer.add(core.Regex('ni', 'nope'))
+    assert not normalizer.token_local
+
+
+@mock.patch.object(normalization_logger, '_handlers', [])
+def test_token_memo():
+    calls = []
+
+    class Counting(core.Lowercase):
+        def _normalize(self, text):
+            calls.append(text)
+            return super()._normalize(text)
+
+    normalizer = NormalizationAggregate()
+    normalizer.add(Counting())
+    normalizer.add(core.ReplaceWords('ni', 'ecky ecky'))
+    text = ' Ni!  We say Ni,\tni NI\n'
+    assert normalizer.normalize(text) == ' ecky ecky!  we say ecky ecky,\tecky ecky ecky ecky\n'
+    assert sorted(calls) == sorted(['', ' ', 'Ni!', '  ', 'We', 'say', 'Ni,', '\t', 'ni', 'NI', '\n'])
+
+    calls.clear()
+    assert normalizer.normalize('ni NI') == 'ecky ecky ecky ecky'
+    assert calls == []
+
+    normalizer.memo_size = 3
+    normalizer.normalize('a b c d')
+    assert len(normalizer._memo) == 3
+
+    normalizer = NormalizationAggregate()
+    normalizer.add(core.Lowercase())
+    assert normalizer.normalize(text) == ' ni!  we say ni,\tni ni\n'
+    restored = pickle.loads(pickle.dumps(normalizer))
+    assert len(restored._memo) == 0
+    assert restored.normalize(text) == ' ni!  we say ni,\tni ni\n'
+
+
+@mock.patch.object(normalization_logger, '_handlers', [])
+def test_token_memo_whitespace():
+    normalizer = NormalizationAggregate()
+    normalizer.add(core.Unidecode())
+    normalizer.add(core.ReplaceWords('ab', 'x'))
+    # next line character is removed by unidecode
+    assert normalizer.normalize('ab a\x85b') == 'x x'
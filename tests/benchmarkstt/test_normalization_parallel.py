@@ -0,0 +1,178 @@
+from benchmarkstt.normalization import NormalizationAggregate, File
+from benchmarkstt.normalization.core import Lowercase, Regex, Replace, ReplaceWords, Unidecode
+from benchmarkstt.normalization.parallel import chunks, normalize, normalize_files, write_atomic
+from benchmarkstt.cli.entrypoints.normalization import expand_inputfiles
+from benchmarkstt.cli.tools import run as tools
+from tempfile import TemporaryDirectory
+from unittest import mock
+import os
+import pytest
+
+
+@pytest.fixture
+def tmpdir():
+    with TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def create_files(directory, files):
+    for name, text in files.items():
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='UTF-8') as f:
+            f.write(text)
+
+
+def read_files(directory):
+    result = {}
+    for root, _, files in os.walk(directory):
+        for file in files:
+            with open(os.path.join(root, file), encoding='UTF-8') as f:
+                result[os.path.relpath(os.path.join(root, file), directory)] = f.read()
+    return result
+
+
+def test_chunks():
+    text = 'a\nbb\nccc\n\nd'
+    assert list(chunks(text, 1)) == ['a\n', 'bb\n', 'ccc\n', '\n', 'd']
+    assert list(chunks(text, 4)) == ['a\nbb\n', 'ccc\n', '\nd']
+    assert list(chunks(text, 100)) == [text]
+    assert list(chunks('', 10)) == []
+    assert ''.join(chunks(text * 100, 7)) == text * 100
+
+
+def test_line_local():
+    assert Lowercase().line_local
+    assert Unidecode().line_local
+    assert Replace('a', 'b').line_local
+    assert not Replace('a\n', 'b').line_local
+    assert not Replace('', 'b').line_local
+    assert ReplaceWords('a', 'b').line_local
+    assert Regex(r'\bcolou?r\b', 'color').line_local
+    assert Regex(r'[a-z]+', 'x').line_local
+    assert not Regex(r'\s+', ' ').line_local
+    assert not Regex(r'[^a]', 'x').line_local
+    assert not Regex(r'^a', 'x').line_local
+    # lookahead can't be analyzed
+    assert not File(Regex, './resources/test/normalizers/regex/en_US').line_local
+
+    composite = NormalizationAggregate()
+    composite.add(Lowercase())
+    assert composite.line_local
+    composite.add(Regex(r'\s+', ' '))
+    assert not composite.line_local
+
+
+def test_normalize():
+    composite = NormalizationAggregate()
+    composite.add(Unidecode())
+    composite.add(Lowercase())
+    composite.add(Regex(r'\b(candide|cunegonde)\b', '<\\1>'))
+    composite.add(ReplaceWords('the', 'a'))
+    with open('./resources/test/_data/candide.txt', encoding='UTF-8') as f:
+        text = f.read() * 20
+    assert ''.join(normalize(composite, text, 2, 1000)) == composite.normalize(text)
+
+    with pytest.raises(ValueError):
+        next(normalize(Regex(r'\s+', ' '), text, 2))
+
+
+@pytest.mark.parametrize('args,expected', [
+    (['--jobs', '2'], 0),
+    (['--jobs', '2', '--log'], 2),
+    (['--jobs', '0'], 2),
+])
+def test_cli(args, expected, capsys):
+    argv = ['benchmarkstt-tools', 'normalization', '-i', './resources/test/_data/candide.txt', '--lowercase'] + args
+    with mock.patch('sys.argv', argv):
+        with pytest.raises(SystemExit) as err:
+            tools()
+    assert err.value.code == expected
+    if expected == 0:
+        with open('./resources/test/_data/candide.txt', encoding='UTF-8') as f:
+            assert capsys.readouterr().out == f.read().lower()
+
+
+def test_write_atomic(tmpdir):
+    path = os.path.join(tmpdir, 'out.txt')
+    write_atomic(path, ('a', 'b'))
+
+    def interrupted():
+        yield 'c'
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        write_atomic(path, interrupted(), 'UTF-8')
+    assert read_files(tmpdir) == {'out.txt': 'ab'}
+
+
+def test_write_atomic_permissions(tmpdir):
+    umask = os.umask(0o027)
+    try:
+        write_atomic(os.path.join(tmpdir, 'out.txt'), ('a',))
+    finally:
+        os.umask(umask)
+    assert os.stat(os.path.join(tmpdir, 'out.txt')).st_mode & 0o777 == 0o640
+
+
+def test_normalize_files(tmpdir):
+    files = {'in/%d.txt' % (idx,): 'Text NUMBER %d\n' % (idx,) for idx in range(20)}
+    create_files(tmpdir, files)
+    pairs = [(os.path.join(tmpdir, 'in', '%d.txt' % (idx,)), os.path.join(tmpdir, '%d.out' % (idx,)))
+             for idx in range(20)]
+    assert sorted(normalize_files(Lowercase(), pairs, 3, 'UTF-8')) == sorted(output for _, output in pairs)
+    expected = {'%d.out' % (idx,): 'text number %d\n' % (idx,) for idx in range(20)}
+    expected.update(files)
+    assert read_files(tmpdir) == expected
+
+
+def test_expand_inputfiles(tmpdir):
+    create_files(tmpdir, {'a.txt': '', 'b.txt': '', 'sub/c.txt': '', 'sub/d.csv': ''})
+    join = os.path.join
+    assert expand_inputfiles([tmpdir]) == [(join(tmpdir, 'a.txt'), 'a.txt'), (join(tmpdir, 'b.txt'), 'b.txt'),
+                                           (join(tmpdir, 'sub', 'c.txt'), join('sub', 'c.txt')),
+                                           (join(tmpdir, 'sub', 'd.csv'), join('sub', 'd.csv'))]
+    assert expand_inputfiles([join(tmpdir, '**', '*.txt')]) == [(join(tmpdir, 'a.txt'), 'a.txt'),
+                                                                (join(tmpdir, 'b.txt'), 'b.txt'),
+                                                                (join(tmpdir, 'sub', 'c.txt'), join('sub', 'c.txt'))]
+    assert expand_inputfiles([join(tmpdir, 'sub', 'd.csv'), join(tmpdir, '*.none')]) == \
+        [(join(tmpdir, 'sub', 'd.csv'), 'd.csv')]
+
+
+@pytest.mark.parametrize('jobs', ['1', '3'])
+def test_cli_output_dir(jobs, tmpdir):
+    files = {'%d.txt' % (idx,): 'Text NUMBER %d\n' % (idx,) for idx in range(10)}
+    files['sub/x.txt'] = 'SUB'
+    create_files(os.path.join(tmpdir, 'in'), files)
+    argv = ['benchmarkstt-tools', 'normalization', '-i', os.path.join(tmpdir, 'in'), '--output-dir',
+            os.path.join(tmpdir, 'out'), '--jobs', jobs, '--lowercase']
+    with mock.patch('sys.argv', argv):
+        with pytest.raises(SystemExit) as err:
+            tools()
+    assert err.value.code == 0
+    assert read_files(os.path.join(tmpdir, 'out')) == {name: text.lower() for name, text in files.items()}
+
+
+@pytest.mark.parametrize('args', [
+    ['-i', 'a.txt', 'b.txt', '--output-dir', 'out'],
+    ['-i', 'a.txt', '-o', 'x.txt', '--output-dir', 'out'],
+    ['--output-dir', 'out'],
+    ['-i', 'a.txt', '-i', 'sub/a.txt', '--output-dir', 'out'],
+    ['-i', 'a.txt', '-i', 'sub/a.txt', '-o', 'x.txt'],
+    ['-i', 'a.txt', '-o', 'a.txt'],
+    ['-i', 'a.txt', '--output-dir', '.'],
+    ['-i', '*.none', '-o', 'x.txt'],
+])
+def test_cli_errors(args, tmpdir):
+    create_files(tmpdir, {'a.txt': 'A', 'sub/a.txt': 'A'})
+    argv = ['benchmarkstt-tools', 'normalization', '--lowercase'] + args
+    cwd = os.getcwd()
+    os.chdir(tmpdir)
+    try:
+        with mock.patch('sys.argv', argv):
+            with pytest.raises(SystemExit) as err:
+                tools()
+    finally:
+        os.chdir(cwd)
+    assert err.value.code == 2
+    assert not os.path.exists(os.path.join(tmpdir, 'out'))
@@ -0,0 +1,76 @@
+from benchmarkstt.normalization import NormalizationAggregate
+from benchmarkstt.normalization.core import Lowercase, Regex, ReplaceWords, Unidecode
+from benchmarkstt.normalization.stream import line_blocks, normalize
+from benchmarkstt.cli.tools import run as tools
+from io import BytesIO, StringIO, TextIOWrapper, BufferedReader
+from unittest import mock
+import pytest
+
+
+class Trickle(BytesIO):
+    """Only makes a few bytes available at a time"""
+
+    size = 3
+
+    def readinto(self, b):
+        return super().readinto(memoryview(b)[:self.size])
+
+
+class Drip(Trickle):
+    size = 1
+
+
+def test_line_blocks():
+    assert list(line_blocks(StringIO('a\nb\nc'), 3)) == ['a\n', 'b\n', 'c']
+    assert list(line_blocks(StringIO('abcdef\ng\n'), 3)) == ['abcdef\ng\n']
+    assert list(line_blocks(StringIO(''))) == []
+
+    text = 'caf\xe9 na\xefve\r\nline\rthree\n\nend'
+    file = TextIOWrapper(BufferedReader(Trickle(text.encode('UTF-8'))), encoding='UTF-8')
+    blocks = list(line_blocks(file, 100))
+    assert len(blocks) > 2
+    assert all(block.endswith('\n') for block in blocks[:-1])
+    # same result as reading it at once
+    assert ''.join(blocks) == TextIOWrapper(BytesIO(text.encode('UTF-8')), encoding='UTF-8').read()
+
+
+def test_line_blocks_byte_by_byte():
+    # reads ending within a character, or with a '\r' that may be followed by '\n', decode to nothing
+    text = 'one\n\xe9 TWO\r\nTHREE\r\xe9\n'
+    file = TextIOWrapper(BufferedReader(Drip(text.encode('UTF-8')), 1), encoding='UTF-8')
+    assert ''.join(line_blocks(file, 1)) == 'one\n\xe9 TWO\nTHREE\n\xe9\n'
+
+    file = TextIOWrapper(BufferedReader(Drip(b'a\r'), 1), encoding='UTF-8')
+    assert list(line_blocks(file, 1)) == ['a\n']
+
+
+def test_normalize():
+    composite = NormalizationAggregate()
+    composite.add(Unidecode())
+    composite.add(Lowercase())
+    composite.add(Regex(r'\b(candide|cunegonde)\b', '<\\1>'))
+    composite.add(ReplaceWords('the', 'a'))
+    with open('./resources/test/_data/candide.txt', encoding='UTF-8') as f:
+        text = f.read()
+    assert ''.join(normalize(composite, StringIO(text), 100)) == composite.normalize(text)
+
+    with pytest.raises(ValueError):
+        next(normalize(Regex(r'\s+', ' '), StringIO(text)))
+
+
+@pytest.mark.parametrize('args,expected', [
+    (['--lowercase'], 0),
+    (['--regex', '\\s+', ' '], 2),
+    (['--lowercase', '--jobs', '2'], 2),
+    (['--lowercase', '-i', './resources/test/_data/candide.txt'], 2),
+])
+def test_cli(args, expected, capsys, monkeypatch):
+    with open('./resources/test/_data/candide.txt', encoding='UTF-8') as f:
+        text = f.read()
+    monkeypatch.setattr('sys.stdin', StringIO(text))
+    with mock.patch('sys.argv', ['benchmarkstt-tools', 'normalization', '--stream'] + args):
+        with pytest.raises(SystemExit) as err:
+            tools()
+    assert err.value.code == expected
+    if expected == 0:
+        assert capsys.readouterr().out == text.lower()
@@ -1,4 +1,12 @@
 from benchmarkstt.output import Output, factory
+from benchmarkstt.output.core import BufferedWriter
+from benchmarkstt.metrics.core import OpcodeCounts
+from collections import OrderedDict
+from io import StringIO, BytesIO
+import ast
+import math
+import struct
+import zipfile
 import pytest
 
 
@@ -39,6 +47,10 @@ result
         'json',
         '[\n\t{"title": "title", "result": "result"},\n\t{"title": "somethingelse", "result": 0.42}\n]\n'
     ],
+    [
+        'jsonlines',
+        '{"title": "title", "result": "result"}\n{"title": "somethingelse", "result": 0.42}\n'
+    ],
 ])
 def test_core(kind, expected, capsys):
     data = [
@@ -53,10 +65,92 @@ def test_core(kind, expected, capsys):
     assert captured.out == expected
 
 
-@pytest.mark.parametrize('cls', ['json'])
+@pytest.mark.parametrize('cls', ['json', 'jsonlines'])
 def test_already_open(cls):
     with pytest.raises(ValueError) as exc:
         with factory.create(cls) as instance:
             with instance as test:
                 raise NotImplementedError("Shouldnt get here")
     assert 'Already open' in str(exc)
+
+
+@pytest.mark.parametrize('kind,expected', [
+    ['json', '[\n\t{"title": "title", "result": [1, {"a": 2}]},\n\t{"title": "empty", "result": []}\n]\n'],
+    ['jsonlines', '{"title": "title", "result": [1, {"a": 2}]}\n{"title": "empty", "result": []}\n'],
+])
+@pytest.mark.parametrize('buffer_size', [1, 5, 1 << 16])
+def test_streaming(kind, expected, buffer_size, capsys):
+    with factory.create(kind, buffer_size=buffer_size) as out:
+        out.result('title', iter([1, {"a": 2}]))
+        out.result('empty', iter([]))
+    assert capsys.readouterr().out == expected
+
+
+def test_buffered_writer():
+    stream = StringIO()
+    writer = BufferedWriter(stream, buffer_size=4)
+    writer.write('ab')
+    assert stream.getvalue() == ''
+    writer.write('cd')
+    assert stream.getvalue() == 'abcd'
+    writer.write('e')
+    writer.flush()
+    assert stream.getvalue() == 'abcde'
+
+
+columnar_results = [
+    ['wer', 0.5],
+    ['diffcounts', OpcodeCounts(1, 1, 0, 0)],
+    ['worddiffs', iter([
+        OrderedDict((('type', 'equal'), ('reference', 'a'), ('hypothesis', 'a'))),
+        OrderedDict((('type', 'insert'), ('reference', None), ('hypothesis', 'bé'))),
+    ])],
+]
+
+
+def read_npy(data):
+    assert data[:8] == b'\x93NUMPY\x01\x00'
+    header_length = int.from_bytes(data[8:10], 'little')
+    assert (10 + header_length) % 64 == 0
+    header = ast.literal_eval(data[10:10 + header_length].decode('latin1'))
+    assert header['fortran_order'] is False
+    data = data[10 + header_length:]
+    if header['descr'] == '<f8':
+        return list(struct.unpack('<%dd' % header['shape'], data))
+    width = int(header['descr'][2:])
+    data = data.decode('utf-32-le')
+    return [data[i:i + width].rstrip('\0') for i in range(0, len(data), width)]
+
+
+def test_npz(capsysbinary):
+    with factory.create('npz') as out:
+        for row in columnar_results:
+            out.result(*row)
+
+    archive = zipfile.ZipFile(BytesIO(capsysbinary.readouterr().out))
+    result = {name[:-4]: read_npy(archive.read(name)) for name in archive.namelist()}
+    assert list(result.keys()) == ['title', 'key', 'value', 'type', 'reference', 'hypothesis']
+    assert result['title'] == ['wer'] + ['diffcounts'] * 4 + ['worddiffs'] * 2
+    assert result['key'] == ['', 'equal', 'replace', 'insert', 'delete', '', '']
+    assert result['value'][:5] == [0.5, 1., 1., 0., 0.]
+    assert all(math.isnan(v) for v in result['value'][5:])
+    assert result['type'] == [''] * 5 + ['equal', 'insert']
+    assert result['reference'] == [''] * 5 + ['a', '']
+    assert result['hypothesis'] == [''] * 5 + ['a', 'bé']
+
+
+def test_arrow(capsysbinary):
+    pa = pytest.importorskip('pyarrow')
+    with factory.create('arrow', batch_size=1) as out:
+        for row in columnar_results:
+            out.result(*row)
+
+    table = pa.ipc.open_stream(capsysbinary.readouterr().out).read_all()
+    assert table.to_pydict() == {
+        'title': ['wer'] + ['diffcounts'] * 4 + ['worddiffs'] * 2,
+        'key': [None, 'equal', 'replace', 'insert', 'delete', None, None],
+        'value': [0.5, 1., 1., 0., 0., None, None],
+        'type': [None] * 5 + ['equal', 'insert'],
+        'reference': [None] * 5 + ['a', None],
+        'hypothesis': [None] * 5 + ['a', 'bé'],
+    }
@@ -26,3 +26,37 @@ def test_simple(text, expected):
         assert type(gotten) is Item
         assert expected_raw == gotten['@raw']
         assert expected_raw.strip() == gotten['item']
+
+
+@pytest.mark.parametrize('text', [
+    ' \nÉén  twee\ndrie vier één\n\n',
+    '  test  B ',
+    'test',
+    '\u4eca\u65e5\u306f\u3044\u3044\u5929\u6c17\u3067\u3059 \u3002' * 20,
+    'a' * 300 + ' b',
+])
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_simple_chunks(text, chunk_size):
+    chunks = [text[idx:idx + chunk_size] for idx in range(0, len(text), chunk_size)]
+    assert list(core.Simple(iter(chunks))) == list(core.Simple(text))
+
+
+def test_simple_chunks_searched_once():
+    searched = []
+
+    class Pattern:
+        def __init__(self, pattern):
+            self._re = pattern
+
+        def finditer(self, text, pos):
+            searched.append(len(text) - pos)
+            return self._re.finditer(text, pos)
+
+        def __getattr__(self, name):
+            return getattr(self._re, name)
+
+    segmenter = core.Simple(iter(['a' * 100] * 100 + [' b']))
+    segmenter._re = Pattern(segmenter._re)
+    assert [item['item'] for item in segmenter] == ['a' * 10000, 'b']
+    # only the new chunk and the end of the carried text are searched
+    assert max(searched) <= 100 + core.Simple.overlap + 2